@@ -5,6 +5,7 @@ from lukefi.metsi.app.utils import ConfigurationException
 from lukefi.metsi.app.metsi_enum import (
     IntConfigEnum,
     RunMode,
+    Compression,
     StateFormat,
     StateInputFormat,
     StateOutputFormat,
@@ -29,12 +30,18 @@ class MetsiConfiguration(SimpleNamespace):
     state_input_container = StateInputFormat.CSV
     state_output_container: Optional[StateOutputFormat] = None
     derived_data_output_container: Optional[str] = None
+    output_compression: Optional[Compression] = None
+    consolidated_results = False
     formation_strategy = FormationStrategy.PARTIAL
     evaluation_strategy = EvaluationStrategy.DEPTH
     measured_trees = False
     strata = True
     strata_origin = StrataOrigin.INVENTORY
+    vectorized_input = False
     multiprocessing = False
+    pipelined = False
+    dry_run = False
+    resume = False
 
     def __init__(self, **kwargs):
         """Initialize the configuration with defaults and user-provided values."""
@@ -58,7 +65,12 @@ class MetsiConfiguration(SimpleNamespace):
             'target_directory': str,
             'measured_trees': bool,
             'strata': bool,
-            'multiprocessing': bool
+            'vectorized_input': bool,
+            'consolidated_results': bool,
+            'multiprocessing': bool,
+            'pipelined': bool,
+            'dry_run': bool,
+            'resume': bool
         }
         config_enums: dict[str, type[StringConfigEnum] | type[IntConfigEnum]] = {
             'run_modes': RunMode,
@@ -66,6 +78,7 @@ class MetsiConfiguration(SimpleNamespace):
             'state_input_container': StateInputFormat,
             'state_output_container': StateOutputFormat,
             'derived_data_output_container': DerivedDataOutputFormat,
+            'output_compression': Compression,
             'formation_strategy': FormationStrategy,
             'evaluation_strategy': EvaluationStrategy,
             'strata_origin': StrataOrigin,
@@ -133,6 +146,10 @@ def parse_cli_arguments(args: list[str]) -> dict:
     parser.add_argument('input_path', help='Application input file or directory')
     parser.add_argument('target_directory', help='Directory path for program output')
     parser.add_argument('control_file', nargs='?', help='Application control declaration file')
+    parser.add_argument('--dry-run', action='store_true', dest='dry_run',
+                        help='Report the simulation plan shape and projected memory use without simulating')
+    parser.add_argument('--resume', action='store_true', dest='resume',
+                        help='Continue an interrupted sliced run, skipping the stands recorded complete in its journal')
     return parser.parse_args(args).__dict__
 
 
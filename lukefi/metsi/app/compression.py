@@ -0,0 +1,122 @@
+""" Transparent compression of output and input files.
+
+Files are compressed with gzip, bz2 or lzma and recognized by their file name extension, so that readers open
+compressed and uncompressed files alike. Chunked files are concatenations of independently compressed members, each
+holding the data of a group of stands, which is still a valid single file for each of the codecs. An index file next
+to a chunked file lists the member of each stand, so that a stand is read by decompressing only its member.
+"""
+import bz2
+import csv
+import gzip
+import lzma
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from lukefi.metsi.app.utils import MetsiException
+
+EXTENSIONS: dict[str, str] = {
+    "gzip": ".gz",
+    "bz2": ".bz2",
+    "lzma": ".xz"
+}
+
+OPENERS: dict[str, Callable[..., IO[Any]]] = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "lzma": lzma.open
+}
+
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "lzma": lzma.compress
+}
+
+DECOMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": gzip.decompress,
+    "bz2": bz2.decompress,
+    "lzma": lzma.decompress
+}
+
+INDEX_SUFFIX = ".idx"
+
+
+def compressed_path(filepath: str | Path, compression: Optional[str]) -> Path:
+    """The path of the file compressed with the given codec, or the path itself without compression"""
+    if compression is None:
+        return Path(filepath)
+    if compression not in EXTENSIONS:
+        raise MetsiException(f"Unsupported compression '{compression}'")
+    return Path(f"{filepath}{EXTENSIONS[compression]}")
+
+
+def compression_of(filepath: str | Path) -> Optional[str]:
+    """The codec of a file by its extension, or None for uncompressed files"""
+    suffix = Path(filepath).suffix
+    return next((compression for compression, extension in EXTENSIONS.items() if extension == suffix), None)
+
+
+def open_file(filepath: str | Path, mode: str = "r", **kwargs) -> IO[Any]:
+    """Open a file for streaming, compressing or decompressing it when its extension names a codec. Text modes take
+    the keyword arguments of open, such as encoding and newline. Buffering is only used for uncompressed files."""
+    compression = compression_of(filepath)
+    if compression is None:
+        return open(filepath, mode, **kwargs)  # pylint: disable=unspecified-encoding
+    kwargs.pop("buffering", None)
+    if "b" not in mode and "t" not in mode:
+        mode = f"{mode}t"
+    return OPENERS[compression](filepath, mode, **kwargs)
+
+
+def index_path(filepath: str | Path) -> Path:
+    return Path(f"{filepath}{INDEX_SUFFIX}")
+
+
+def write_chunked(filepath: str | Path, chunks: Iterable[tuple[list[str], str]], header: str = ""):
+    """
+    Write a chunked file, compressing each chunk into its own member, and its stand index.
+
+    :param filepath: path of the file, with the extension of the codec
+    :param chunks: pairs of the stand identifiers of a chunk and the text holding their data
+    :param header: text written as an own member before the chunks, not included in the index
+    """
+    compression = compression_of(filepath)
+    if compression is None:
+        raise MetsiException(f"Chunked file '{filepath}' has no compression extension")
+    compress = COMPRESSORS[compression]
+    with open(filepath, "wb") as file, \
+            open(index_path(filepath), "w", newline="", encoding="utf-8") as index_file:
+        index = csv.writer(index_file, delimiter=";")
+        if header:
+            file.write(compress(header.encode("utf-8")))
+        for identifiers, text in chunks:
+            offset = file.tell()
+            member = compress(text.encode("utf-8"))
+            file.write(member)
+            index.writerows((identifier, offset, len(member)) for identifier in identifiers)
+
+
+def is_chunked(filepath: str | Path) -> bool:
+    return index_path(filepath).is_file()
+
+
+def read_chunk_index(filepath: str | Path) -> dict[str, tuple[int, int]]:
+    """Offset and length of the member holding each stand of a chunked file"""
+    with open(index_path(filepath), "r", newline="", encoding="utf-8") as file:
+        return {identifier: (int(offset), int(length))
+                for identifier, offset, length in csv.reader(file, delimiter=";")}
+
+
+def read_chunk(filepath: str | Path, offset: int, length: int) -> str:
+    """Decompress the member at the given offset of a chunked file"""
+    compression = compression_of(filepath)
+    if compression is None:
+        raise MetsiException(f"Chunked file '{filepath}' has no compression extension")
+    with open(filepath, "rb") as file:
+        file.seek(offset)
+        return DECOMPRESSORS[compression](file.read(length)).decode("utf-8")
+
+
+__all__ = ["compressed_path", "compression_of", "open_file", "index_path", "write_chunked", "is_chunked",
+           "read_chunk_index", "read_chunk"]
@@ -9,3 +9,9 @@ def runtime_now() -> float:
 
 def print_logline(message: str):
     print(f"{runtime_now()} {message}")
+
+
+def restart_clock():
+    """Restart the runtime clock of the log lines, for processes running several jobs"""
+    global start_time  # pylint: disable=global-statement
+    start_time = time.time_ns()
@@ -0,0 +1,349 @@
+""" Daemon mode of the application.
+
+A daemon keeps a pool of warm worker processes, which have imported the application and its libraries once and keep
+the control files they have compiled, so that runs submitted to it skip the startup cost of a fresh process. Jobs are
+submitted over a local Unix socket, or a TCP socket on the loopback interface, as a JSON object on a single line:
+
+    {"input_path": ..., "target_directory": ..., "control_file": ..., "dry_run": false, "resume": false,
+     "working_directory": ...}
+
+The daemon answers with one JSON event per line: "started" when a worker picks up the job, "log" for each line of
+output of the run, and finally "done" with the exit status of the run. A connection may submit several jobs in turn.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+import types
+from collections.abc import Generator, Iterator, Sequence
+from contextlib import closing, redirect_stderr, redirect_stdout
+from importlib import import_module
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Optional
+
+from lukefi.metsi.app.app_io import MetsiConfiguration
+from lukefi.metsi.app.console_logging import print_logline, restart_clock
+from lukefi.metsi.app.utils import MetsiException
+
+DEFAULT_SOCKET = "mela2.sock"
+LOCALHOST = "127.0.0.1"
+
+# modules imported by each worker at startup
+PRELOADED_MODULES = ["lukefi.metsi.app.metsi", "lukefi.metsi.domain.pre_ops", "lukefi.metsi.domain.events"]
+
+Address = str | tuple[str, int]
+Event = dict[str, Any]
+
+# compiled control files of a worker process by absolute path, with the modification time they were compiled at
+_compiled_controls: dict[Path, tuple[int, types.CodeType]] = {}
+
+
+def read_compiled_control(control_path: str, control: str = "control_structure") -> dict[str, Any]:
+    """Read the control declaration of a control file as read_control_module, compiling the file only when it has
+    changed since it was last compiled in this process. The module is executed anew on each call."""
+    path = Path(control_path).resolve()
+    modified = path.stat().st_mtime_ns
+    cached = _compiled_controls.get(path)
+    if cached is None or cached[0] != modified:
+        cached = (modified, compile(path.read_text(encoding="utf-8"), str(path), "exec"))
+        _compiled_controls[path] = cached
+    module = types.ModuleType(path.stem)
+    module.__file__ = str(path)
+    exec(cached[1], module.__dict__)  # pylint: disable=exec-used
+    if hasattr(module, control):
+        return getattr(module, control)
+    raise AttributeError(f"Variable '{control}' not found in {path}")
+
+
+def job_request(request: Any) -> dict[str, Any]:
+    """Validate a job request, returning it with the optional fields filled in"""
+    if not isinstance(request, dict):
+        raise MetsiException("Job request must be a JSON object")
+    for field in ("input_path", "target_directory"):
+        if not isinstance(request.get(field), str):
+            raise MetsiException(f"Job request is missing '{field}'")
+    for field in ("control_file", "working_directory"):
+        if not isinstance(request.get(field, ""), (str, type(None))):
+            raise MetsiException(f"Job request field '{field}' must be a string")
+    return {
+        "input_path": request["input_path"],
+        "target_directory": request["target_directory"],
+        "control_file": request.get("control_file"),
+        "dry_run": bool(request.get("dry_run", False)),
+        "resume": bool(request.get("resume", False)),
+        "working_directory": request.get("working_directory")
+    }
+
+
+class _LogWriter(io.StringIO):
+    """Text stream sending each line written to it as a log event instead of keeping it"""
+
+    def __init__(self, connection: Connection):
+        super().__init__()
+        self.connection = connection
+        self.pending = ""
+        self.lock = threading.Lock()
+
+    def write(self, s: str) -> int:
+        with self.lock:
+            self.pending += s
+            *lines, self.pending = self.pending.split("\n")
+            for line in lines:
+                self.connection.send({"event": "log", "message": line})
+        return len(s)
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                self.connection.send({"event": "log", "message": self.pending})
+                self.pending = ""
+
+
+def _run_job(request: dict[str, Any], connection: Connection):
+    # Lazy import of the application, imported by the worker at startup
+    from lukefi.metsi.app.metsi import run  # pylint: disable=import-outside-toplevel
+    restart_clock()
+    connection.send({"event": "started", "worker": os.getpid()})
+    working_directory = os.getcwd()
+    log = _LogWriter(connection)
+    with redirect_stdout(log), redirect_stderr(log):
+        try:
+            os.chdir(request["working_directory"] or working_directory)
+            cli_arguments = {field: request[field]
+                             for field in ("input_path", "target_directory", "control_file", "dry_run", "resume")}
+            status = run(cli_arguments, control_reader=read_compiled_control)
+        except Exception:  # pylint: disable=broad-exception-caught
+            traceback.print_exc()
+            status = 1
+        finally:
+            os.chdir(working_directory)
+    log.flush()
+    connection.send({"event": "done", "status": status})
+
+
+def _worker_loop(connection: Connection, preload: Sequence[str]):
+    # workers are stopped by the daemon, not by interrupts to the process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module in preload:
+        import_module(module)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        _run_job(request, connection)
+
+
+class _Worker:
+    """A worker process and the connection to it"""
+
+    def __init__(self, preload: Sequence[str]):
+        self.connection, worker_end = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_loop, args=(worker_end, preload), daemon=False)
+        self.process.start()
+        worker_end.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """Warm worker processes running one job at a time each. Jobs wait for an idle worker."""
+
+    def __init__(self, workers: int = 1, preload: Sequence[str] = tuple(PRELOADED_MODULES)):
+        """
+        :param workers: number of worker processes
+        :param preload: modules imported by each worker at startup
+        """
+        self.preload = list(preload)
+        self.workers = [_Worker(self.preload) for _ in range(max(1, workers))]
+        self.idle: queue.Queue[_Worker] = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def run(self, request: dict[str, Any]) -> Generator[Event, None, None]:
+        """Run a job in the next idle worker, yielding its events up to and including the done event. A worker is
+        released only after its job is done, even when the iteration is closed early."""
+        worker = self.idle.get()
+        done = False
+        try:
+            worker.connection.send(request)
+            while not done:
+                try:
+                    event = worker.connection.recv()
+                except (EOFError, OSError):
+                    done = True
+                    worker = self._replace(worker)
+                    yield {"event": "done", "status": 1, "error": "Worker process exited unexpectedly"}
+                    return
+                done = event["event"] == "done"
+                yield event
+        finally:
+            while not done:
+                try:
+                    done = worker.connection.recv()["event"] == "done"
+                except (EOFError, OSError):
+                    done = True
+                    worker = self._replace(worker)
+            self.idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.stop()
+        replacement = _Worker(self.preload)
+        self.workers[self.workers.index(worker)] = replacement
+        return replacement
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        pool: WorkerPool = getattr(self.server, "pool")
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = job_request(json.loads(line))
+            except (ValueError, MetsiException) as e:
+                self.send({"event": "done", "status": 1, "error": str(e)})
+                continue
+            with closing(pool.run(request)) as events:
+                for event in events:
+                    self.send(event)
+
+    def send(self, event: Event):
+        self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+def create_server(address: Address, pool: WorkerPool) -> socketserver.BaseServer:
+    """Create a job server on a Unix socket path, or a (host, port) TCP address, running jobs in the pool"""
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.remove(address)
+        server: Any = socketserver.ThreadingUnixStreamServer(address, _JobHandler)
+    else:
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer(address, _JobHandler)
+    server.daemon_threads = True
+    server.pool = pool
+    return server
+
+
+def serve(address: Address, workers: int = 1, preload: Sequence[str] = ()):
+    """Run the daemon until interrupted"""
+    pool = WorkerPool(workers, [*PRELOADED_MODULES, *preload])
+    server = create_server(address, pool)
+    print_logline(f"Serving jobs with {len(pool.workers)} workers on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print_logline("Interrupted, stopping")
+    finally:
+        server.server_close()
+        pool.close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.remove(address)
+
+
+def submit(address: Address,
+           input_path: str,
+           target_directory: str,
+           control_file: Optional[str] = None,
+           dry_run: bool = False,
+           resume: bool = False) -> Iterator[Event]:
+    """Submit a job to a daemon, yielding its events. Relative paths are relative to the current directory, and the
+    control file defaults to the control file of the application in it."""
+    request = {
+        "input_path": input_path,
+        "target_directory": target_directory,
+        "control_file": control_file or MetsiConfiguration.control_file,
+        "dry_run": dry_run,
+        "resume": resume,
+        "working_directory": os.getcwd()
+    }
+    if isinstance(address, str):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    with connection:
+        connection.connect(address)
+        connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as events:
+            for line in events:
+                event = json.loads(line)
+                yield event
+                if event["event"] == "done":
+                    return
+    raise MetsiException("Daemon closed the connection before the job was done")
+
+
+def parse_daemon_arguments(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Mela2.0 daemon with warm worker processes')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='Run the daemon')
+    serve_parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+    serve_parser.add_argument('--preload', action='append', default=[],
+                              help='Module imported by the workers at startup, may be repeated')
+    submit_parser = commands.add_parser('submit', help='Submit a job to a running daemon')
+    submit_parser.add_argument('input_path', help='Application input file or directory')
+    submit_parser.add_argument('target_directory', help='Directory path for program output')
+    submit_parser.add_argument('control_file', nargs='?', help='Application control declaration file')
+    submit_parser.add_argument('--dry-run', action='store_true', dest='dry_run',
+                               help='Report the simulation plan shape and projected memory use without simulating')
+    submit_parser.add_argument('--resume', action='store_true', dest='resume',
+                               help='Continue an interrupted sliced run, skipping the stands recorded complete in its '
+                                    'journal')
+    for command in (serve_parser, submit_parser):
+        command.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path of the daemon')
+        command.add_argument('--port', type=int, help=f'TCP port of the daemon on {LOCALHOST}, instead of a socket')
+    return parser.parse_args(args)
+
+
+def main() -> int:
+    arguments = parse_daemon_arguments(sys.argv[1:])
+    address: Address = arguments.socket if arguments.port is None else (LOCALHOST, arguments.port)
+    if arguments.command == 'serve':
+        serve(address, arguments.workers, arguments.preload)
+        return 0
+    status = 1
+    try:
+        for event in submit(address, arguments.input_path, arguments.target_directory, arguments.control_file,
+                            arguments.dry_run, arguments.resume):
+            if event["event"] == "log":
+                print(event["message"])
+            elif event["event"] == "done":
+                status = event["status"]
+                if "error" in event:
+                    print(event["error"], file=sys.stderr)
+    except (OSError, MetsiException) as e:
+        print(f"Could not submit the job to the daemon at {address}: {e}", file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+__all__ = ["read_compiled_control", "job_request", "WorkerPool", "create_server", "serve", "submit", "main"]
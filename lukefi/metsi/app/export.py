@@ -6,7 +6,9 @@ from lukefi.metsi.app.app_io import MetsiConfiguration
 from lukefi.metsi.app.app_types import ExportableContainer
 from lukefi.metsi.app.export_handlers.j import j_out, parse_j_config
 from lukefi.metsi.app.console_logging import print_logline
-from lukefi.metsi.app.file_io import write_stands_to_file, determine_file_path
+from lukefi.metsi.app.compression import compressed_path
+from lukefi.metsi.app.file_io import write_stands_chunked, write_stands_to_file, determine_file_path
+from lukefi.metsi.app.utils import ConfigurationException
 from lukefi.metsi.domain.forestry_types import SimResults, StandList
 from lukefi.metsi.sim.operations import simple_processable_chain
 from lukefi.metsi.sim.runners import evaluate_sequence
@@ -33,7 +35,11 @@ def export_preprocessed(target_directory: str, decl: dict[str, Any], stands: Sta
         operations: Optional[list[Callable[[StandList], StandList]]] = decl[output_format].get('operations', None)
         operation_params: Optional[dict[Callable, Any]] = decl[output_format].get('operation_params', None)
         additional_varnames: Optional[list[str]] = decl[output_format].get('additional_variables', None)
-        file_name = f"preprocessing_result.{output_format}"
+        compression: Optional[str] = decl[output_format].get('compression', None)
+        chunk_size: Optional[int] = decl[output_format].get('chunk_size', None)
+        if chunk_size is not None and compression is None:
+            raise ConfigurationException(f"Chunked output of '{output_format}' requires compression")
+        file_name = preprocessing_result_name(output_format, compression)
         filepaths = determine_file_path(target_directory, file_name)
         if operations is not None:
             operation_chain = simple_processable_chain(operations, operation_params or {})
@@ -42,4 +48,11 @@ def export_preprocessed(target_directory: str, decl: dict[str, Any], stands: Sta
         else:
             result = ExportableContainer(stands, additional_varnames)
         print_logline(f"Writing preprocessed data to '{target_directory}\\{file_name}'")
-        write_stands_to_file(result, filepaths, output_format)
+        if chunk_size is not None:
+            write_stands_chunked(result, filepaths, output_format, chunk_size)
+        else:
+            write_stands_to_file(result, filepaths, output_format)
+
+
+def preprocessing_result_name(output_format: str, compression: Optional[str] = None) -> str:
+    return compressed_path(f"preprocessing_result.{output_format}", compression).name
@@ -2,19 +2,39 @@ import csv
 import os
 import pickle
 import importlib.util
-from collections.abc import Iterator, Callable
+from collections.abc import Iterable, Iterator, Callable, Sequence
+from itertools import batched
 from pathlib import Path
 from typing import Any, Optional
 import numpy as np
-import jsonpickle
-from lukefi.metsi.data.formats.forest_builder import VMI13Builder, VMI12Builder, XMLBuilder, GeoPackageBuilder
+from lukefi.metsi.data.formats.forest_builder import (
+    VMIBuilder,
+    VMI13Builder,
+    VMI12Builder,
+    XMLBuilder,
+    GeoPackageBuilder)
+from lukefi.metsi.data.formats.fdm_columnar import ColumnarStandStore, read_columnar, write_columnar
+from lukefi.metsi.data.formats.fdm_csv import read_csv_columnar
+from lukefi.metsi.data.formats import json_codec
+from lukefi.metsi.data.formats.mapped_pickle import read_mapped_pickle, write_mapped_pickle
 from lukefi.metsi.data.formats.io_utils import (
-    stands_to_csv_content,
+    csv_rows,
     csv_content_to_stands,
-    stands_to_rst_content,
+    rst_rows,
     mela_par_file_content)
 from lukefi.metsi.app.app_io import MetsiConfiguration
+from lukefi.metsi.app.metsi_enum import Compression
 from lukefi.metsi.app.app_types import ExportableContainer
+from lukefi.metsi.app.compression import (
+    compressed_path,
+    compression_of,
+    is_chunked,
+    open_file,
+    read_chunk,
+    read_chunk_index,
+    write_chunked)
+from lukefi.metsi.app.result_store import ResultStore, ResultStoreWriter, is_result_store
+from lukefi.metsi.app.sim_results import LazySimResults
 from lukefi.metsi.domain.forestry_types import SimResults
 from lukefi.metsi.domain.forestry_types import ForestOpPayload, StandList, ForestStand
 from lukefi.metsi.data.formats.declarative_conversion import Conversion
@@ -22,10 +42,17 @@ from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.sim.collected_data import CollectedData
 
 StandReader = Callable[[str | Path], StandList]
+StandStreamReader = Callable[[str | Path], Iterator[ForestStand]]
 StandWriter = Callable[[Path, ExportableContainer[ForestStand]], None]
 ObjectLike = StandList | SimResults | CollectedData
 ObjectWriter = Callable[[Path, ObjectLike], None]
 
+COMPRESSIONS = [str(codec.value) for codec in Compression]
+
+# rows joined into a single write, and the file buffer size of row writers
+ROW_BLOCK_SIZE = 10000
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
 # io_utils?
 def prepare_target_directory(path_descriptor: str) -> Path:
     """
@@ -61,6 +88,12 @@ def stand_writer(container_format: str) -> StandWriter:
         return npy_writer
     if container_format == "npz":
         return npz_writer
+    if container_format == "columnar":
+        return columnar_writer
+    if container_format == "mapped_pickle":
+        return mapped_pickle_writer
+    if container_format == "ndjson":
+        return ndjson_writer
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 
@@ -71,6 +104,44 @@ def write_stands_to_file(
     writer = stand_writer(state_output_container)
     writer(filepath, result)
 
+def write_stands_chunked(result: ExportableContainer[ForestStand], filepath: Path, state_output_container: str,
+                         chunk_size: int):
+    """
+    Write ForestStands into a chunked compressed file, compressing the stands of each chunk of chunk_size stands
+    separately, so that read_stand_from_chunked can read a stand by decompressing only its chunk. Supported for
+    csv and ndjson containers. The codec is given by the extension of filepath.
+    """
+    if state_output_container == "csv":
+        header = ""
+        chunks = (([stand.identifier for stand in batch],
+                   "".join(f"{row}\n" for row in csv_rows(list(batch), ';', result.additional_vars)))
+                  for batch in batched(result.export_objects, chunk_size))
+    elif state_output_container == "ndjson":
+        header = f"{json_codec.ndjson_header()}\n"
+        chunks = (([stand.identifier for stand in batch],
+                   "".join(f"{json_codec.ndjson_line(stand)}\n" for stand in batch))
+                  for batch in batched(result.export_objects, chunk_size))
+    else:
+        raise MetsiException(f"Chunked output is not supported for container format '{state_output_container}'")
+    write_chunked(filepath, chunks, header)
+
+
+def read_stand_from_chunked(filepath: str | Path, container_format: str, identifier: str) -> ForestStand:
+    """Read a single ForestStand of a chunked file written by write_stands_chunked"""
+    if not is_chunked(filepath):
+        raise MetsiException(f"File '{filepath}' is not a chunked file")
+    location = read_chunk_index(filepath).get(identifier)
+    if location is None:
+        raise MetsiException(f"Stand '{identifier}' not found in '{filepath}'")
+    text = read_chunk(filepath, *location)
+    if container_format == "csv":
+        stands = csv_content_to_stands(list(csv.reader(text.splitlines(), delimiter=';')))
+    elif container_format == "ndjson":
+        stands = list(json_codec.decode_ndjson_lines(text.splitlines()))
+    else:
+        raise MetsiException(f"Chunked input is not supported for container format '{container_format}'")
+    return next(stand for stand in stands if stand.identifier == identifier)
+
 # solve ObjectWriter
 def object_writer(container_format: str) -> ObjectWriter:
     """Return a serialization file writer function for arbitrary data"""
@@ -78,6 +149,8 @@ def object_writer(container_format: str) -> ObjectWriter:
         return pickle_writer
     if container_format == "json":
         return json_writer
+    if container_format == "mapped_pickle":
+        return mapped_pickle_writer
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 # io_utils
@@ -86,7 +159,7 @@ def determine_file_path(dir_: str | Path, filename: str) -> Path:
 
 # io_utils
 def file_contents(file_path: str | Path) -> str:
-    with open(file_path, 'r', encoding="utf-8") as f:
+    with open_file(file_path, 'r', encoding="utf-8") as f:
         return f.read()
 
 # solve FdmReader
@@ -98,6 +171,12 @@ def fdm_reader(container_format: str) -> StandReader:
         return json_reader
     if container_format == "csv":
         return lambda path: csv_content_to_stands(csv_file_reader(path))
+    if container_format == "columnar":
+        return read_columnar
+    if container_format == "mapped_pickle":
+        return read_mapped_pickle
+    if container_format == "ndjson":
+        return json_codec.read_ndjson
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 # solve ObjectReader
@@ -106,6 +185,8 @@ def object_reader(container_format: str) -> Any:
         return pickle_reader
     if container_format == "json":
         return json_reader
+    if container_format == "mapped_pickle":
+        return read_mapped_pickle
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 # SourceDataReaders
@@ -116,35 +197,126 @@ def external_reader(state_format: str, conversions, **builder_flags) -> StandRea
     if state_format == "vmi12":
         return lambda path: VMI12Builder(builder_flags, conversions.get('vmi12', {}), vmi_file_reader(path)).build()
     if state_format == "xml":
-        return lambda path: XMLBuilder(builder_flags, conversions.get('xml', {}), xml_file_reader(path)).build()
+        return lambda path: list(XMLBuilder(builder_flags, conversions.get('xml', {})).stream(path))
     if state_format == "gpkg":
         return lambda path: GeoPackageBuilder(builder_flags, conversions.get('gpkg', {}), str(path)).build()
     raise MetsiException(f"Unsupported state format '{state_format}'")
 
+def vmi_parallel_reader(state_format: str, conversions, **builder_flags) -> StandReader:
+    """Resolve and prepare a reader function decoding VMI data formats in a process pool"""
+    if state_format == "vmi13":
+        return lambda path: VMI13Builder(builder_flags, conversions.get('vmi13', {})).build_parallel(path)
+    if state_format == "vmi12":
+        return lambda path: VMI12Builder(builder_flags, conversions.get('vmi12', {})).build_parallel(path)
+    raise MetsiException(f"Unsupported state format for parallel reading '{state_format}'")
+
+def external_stream_reader(state_format: str, conversions, **builder_flags) -> StandStreamReader:
+    """Resolve and prepare a lazy reader function for VMI and Forest Centre XML data formats"""
+    if state_format == "vmi13":
+        return lambda path: stream_vmi_stands(VMI13Builder(builder_flags, conversions.get('vmi13', {})), path)
+    if state_format == "vmi12":
+        return lambda path: stream_vmi_stands(VMI12Builder(builder_flags, conversions.get('vmi12', {})), path)
+    if state_format == "xml":
+        return lambda path: XMLBuilder(builder_flags, conversions.get('xml', {})).stream(path)
+    raise MetsiException(f"Unsupported state format for streaming '{state_format}'")
+
+
+def stream_vmi_stands(builder: VMIBuilder, path: str | Path) -> Iterator[ForestStand]:
+    """Lazily build ForestStands from a VMI source file without reading it into memory. The file is read once and
+    grouped by stand through temporary files. Source files with the rows of each stand grouped together keep their
+    stand order."""
+    return builder.stream_spilled(vmi_row_iterator(path))
+
+
+def stream_stands_from_file(app_config: MetsiConfiguration,
+                            conversions: dict[str, Conversion]) -> Iterator[ForestStand]:
+    """
+    Lazily read ForestStands from given file with given configuration. VMI12, VMI13 and Forest Centre XML data is
+    streamed one stand at a time, columnar FDM stands are materialized one at a time from a memory mapped stand
+    store and NDJSON FDM stands are decoded one line at a time. Other formats are read in full with
+    read_stands_from_file.
+
+    :param app_config: Mela2Configuration
+    :return: iterator of ForestStands as computational units for simulation
+    """
+    if app_config.state_format in ("vmi13", "vmi12", "xml"):
+        return external_stream_reader(
+            app_config.state_format.value,
+            conversions,
+            strata=app_config.strata,
+            measured_trees=app_config.measured_trees,
+            strata_origin=app_config.strata_origin,
+            vectorized=app_config.vectorized_input)(app_config.input_path)
+    if app_config.state_format == "fdm" and app_config.state_input_container == "columnar":
+        return iter(ColumnarStandStore(app_config.input_path))
+    if app_config.state_format == "fdm" and app_config.state_input_container == "ndjson":
+        return json_codec.iter_ndjson(app_config.input_path)
+    return iter(read_stands_from_file(app_config, conversions))
+
+
+def read_stand_sequence(app_config: MetsiConfiguration,
+                        conversions: dict[str, Conversion]) -> Sequence[ForestStand]:
+    """
+    Read ForestStands for a run starting from simulation. Columnar FDM data is opened as a lazy ColumnarStandStore,
+    building each stand only when it is accessed. Other formats are read in full with read_stands_from_file.
+
+    Stands of a lazy store are built anew on each access, so changes made to them in place are not retained. The
+    store is thus not suitable as input for preprocessing.
+
+    :param app_config: Mela2Configuration
+    :return: sequence of ForestStands as computational units for simulation
+    """
+    store = open_stand_store(app_config)
+    return store if store is not None else read_stands_from_file(app_config, conversions)
+
+
+def open_stand_store(app_config: MetsiConfiguration) -> Optional[ColumnarStandStore]:
+    """Open columnar FDM input as a lazy ColumnarStandStore, or None for input of other formats"""
+    if app_config.state_format == "fdm" and app_config.state_input_container == "columnar":
+        return ColumnarStandStore(app_config.input_path)
+    return None
+
+
 # source data main entry function
 def read_stands_from_file(app_config: MetsiConfiguration, conversions: dict[str, Conversion]) -> StandList:
     """
     Read a list of ForestStands from given file with given configuration. Directly reads FDM format data. Utilizes
-    FDM ForestBuilder utilities to transform VMI12, VMI13 or Forest Centre data into FDM ForestStand format.
+    FDM ForestBuilder utilities to transform VMI12, VMI13 or Forest Centre data into FDM ForestStand format. VMI12 and
+    VMI13 data is decoded in parallel with multiprocessing enabled, unless the file is compressed and can thus not be
+    split into byte ranges. FDM CSV data is decoded column-wise into vectorized
+    stands with vectorized_input enabled.
 
     :param app_config: Mela2Configuration
     :return: list of ForestStands as computational units for simulation
     """
     if app_config.state_format == "fdm":
+        if app_config.state_input_container == "csv" and app_config.vectorized_input:
+            return read_csv_columnar(app_config.input_path)
         return fdm_reader(app_config.state_input_container.value)(app_config.input_path)
+    if app_config.state_format in ("vmi13", "vmi12") and app_config.multiprocessing \
+            and compression_of(app_config.input_path) is None:
+        return vmi_parallel_reader(
+            app_config.state_format.value,
+            conversions,
+            strata=app_config.strata,
+            measured_trees=app_config.measured_trees,
+            strata_origin=app_config.strata_origin,
+            vectorized=app_config.vectorized_input)(app_config.input_path)
     if app_config.state_format in ("vmi13", "vmi12", "xml", "gpkg"):
         return external_reader(
             app_config.state_format.value,
             conversions,
             strata=app_config.strata,
             measured_trees=app_config.measured_trees,
-            strata_origin=app_config.strata_origin)(app_config.input_path)
+            strata_origin=app_config.strata_origin,
+            vectorized=app_config.vectorized_input)(app_config.input_path)
     raise MetsiException(f"Unsupported state format '{app_config.state_format}'")
 
 # io_util?
 def scan_dir_for_file(dirpath: Path, basename: str, suffixes: list[str]) -> Optional[tuple[Path, str]]:
     """
-    From given directory path, find the filename for given basename with list of possible file suffixes.
+    From given directory path, find the filename for given basename with list of possible file suffixes. Files
+    compressed with any of the supported codecs are found as well.
     Raises Exception if directory path is not a directory.
     :returns a pair with full filename and matching suffix
     """
@@ -153,8 +325,9 @@ def scan_dir_for_file(dirpath: Path, basename: str, suffixes: list[str]) -> Opti
     _, _, files = next(os.walk(dirpath))
     filenames_with_suffix = list(map(lambda suffix: (f"{basename}.{suffix}", suffix), suffixes))
     for filename, suffix in filenames_with_suffix:
-        if filename in files:
-            return Path(dirpath, filename), suffix
+        for candidate in [filename, *(compressed_path(filename, codec).name for codec in COMPRESSIONS)]:
+            if candidate in files:
+                return Path(dirpath, candidate), suffix
     return None
 
 # io_util?
@@ -167,13 +340,17 @@ def parse_file_or_default(file: Path, reader: Callable[[Path], Any], default=Non
 # SimResultReader utility - scans schedules from files
 def read_schedule_payload_from_directory(schedule_path: Path) -> ForestOpPayload:
     """
-    Create an OperationPayload from a directory which optionally contains usable unit_state and derived_data files.
+    Create an OperationPayload from a directory which optionally contains usable unit_state (or sim_result) and
+    derived_data files.
     Utilizes a scanner function to resolve the files with known container formats. Files may not exist.
 
     :param schedule_path: Path for a schedule directory
     :return: OperationPayload with computational_unit and collected_data if found
     """
-    scan_result = scan_dir_for_file(schedule_path, "unit_state", ["csv", "json", "pickle"])
+    unit_state_suffixes = ["csv", "json", "ndjson", "pickle", "columnar", "mapped_pickle"]
+    # schedules are written as sim_result files by write_full_simulation_result_dirtree
+    scan_result = scan_dir_for_file(schedule_path, "unit_state", unit_state_suffixes) or \
+        scan_dir_for_file(schedule_path, "sim_result", unit_state_suffixes)
     # unit_state_file, input_container = scan_dir_for_file(schedule_path, "unit_state", ["csv", "json", "pickle"])
     if scan_result is not None:
         unit_state_file, input_container = scan_result
@@ -181,7 +358,7 @@ def read_schedule_payload_from_directory(schedule_path: Path) -> ForestOpPayload
         unit_state_file = None
         input_container = None
 
-    scan_result = scan_dir_for_file(schedule_path, "derived_data", ["json", "pickle"])
+    scan_result = scan_dir_for_file(schedule_path, "derived_data", ["json", "pickle", "mapped_pickle"])
     # derived_data_file, derived_data_container = scan_dir_for_file(schedule_path, "derived_data", ["json", "pickle"])
     if scan_result is not None:
         derived_data_file, derived_data_container = scan_result
@@ -212,22 +389,35 @@ def read_full_simulation_result_dirtree(source_path: str | Path) -> SimResults:
     """
     Read simulation results from a given source directory, packing them into the simulation results dict structure.
     Utilizes a directory scanner function to find unit_state and derived_data files for known possible container
-    formats.
+    formats. Results consolidated into a result store are read from the store.
 
     :param source_path: Path for simulation results
     :return: simulation results dict structure
     """
-    def schedulepaths_for_stand(stand_path: Path) -> Iterator[Path]:
-        schedules = get_subdirectory_names(stand_path)
-        return map(lambda schedule: Path(stand_path, schedule), schedules)
-    result = {}
-    stand_identifiers = get_subdirectory_names(source_path)
-    stands_to_schedules = map(lambda stand_id: (
-        stand_id, schedulepaths_for_stand(Path(source_path, stand_id))), stand_identifiers)
-    for stand_id, schedulepaths in stands_to_schedules:
-        payloads = list(map(read_schedule_payload_from_directory, schedulepaths))
-        result[stand_id] = payloads
-    return result
+    if is_result_store(source_path):
+        with ResultStore(source_path) as store:
+            return store.read_all()
+    return dict(lazy_simulation_results(source_path).items())
+
+
+def lazy_simulation_results(source_path: str | Path, prefetch: int = 4) -> LazySimResults:
+    """
+    Open simulation results of a given source directory as a lazy mapping. Stand identifiers are listed up front,
+    while the schedules of a stand are read from its directory, or from the result store, only when accessed.
+
+    :param source_path: Path for simulation results
+    :param prefetch: number of stands read ahead in a thread pool when iterating over the results
+    :return: lazy simulation results mapping
+    """
+    if is_result_store(source_path):
+        store = ResultStore(source_path)
+        return LazySimResults(store.stands(), store.read_stand, prefetch)
+
+    def read_stand_schedules(stand_id: str) -> list[ForestOpPayload]:
+        stand_path = Path(source_path, stand_id)
+        schedulepaths = map(lambda schedule: Path(stand_path, schedule), get_subdirectory_names(stand_path))
+        return list(map(read_schedule_payload_from_directory, schedulepaths))
+    return LazySimResults(get_subdirectory_names(source_path), read_stand_schedules, prefetch)
 
 # CollectedResults writer, done when SimResults are written.
 # - can be seen as indivudual entry for writing CollectedResults
@@ -244,26 +434,53 @@ def write_full_simulation_result_dirtree(result: SimResults, app_arguments: Mets
     """
     Unwraps the given simulation result structure into computational units and further into produced schedules.
     Writes these as a matching directory structure, splitting OperationPayloads into unit_state and derived_data files.
-    Details for output directory, unit state container format and derived data container format are extracted from
-    given app_arguments structure.
+    Details for output directory, unit state container format, derived data container format and output compression
+    are extracted from given app_arguments structure.
 
     :param result: the simulation results structure
     :param app_arguments: application run configuration
     :return: None
     """
+    if app_arguments.consolidated_results:
+        write_simulation_result_store(result, app_arguments)
+        return
+    compression = None if app_arguments.output_compression is None else app_arguments.output_compression.value
     for stand_id, schedules in result.items():
         for i, schedule in enumerate(schedules):
             if app_arguments.state_output_container is not None:
                 schedule_dir = prepare_target_directory(f"{app_arguments.target_directory}/{stand_id}/{i}")
-                filepath = determine_file_path(schedule_dir, f"sim_result.{app_arguments.state_output_container.value}")
+                filepath = compressed_path(
+                    determine_file_path(schedule_dir, f"sim_result.{app_arguments.state_output_container.value}"),
+                    container_compression(app_arguments.state_output_container.value, compression))
                 write_stands_to_file(ExportableContainer([schedule.computational_unit], None),
                                      filepath,
                                      app_arguments.state_output_container.value)
             if app_arguments.derived_data_output_container is not None:
                 schedule_dir = prepare_target_directory(f"{app_arguments.target_directory}/{stand_id}/{i}")
-                filepath = determine_file_path(schedule_dir, app_arguments.derived_data_output_container)
-                write_derived_data_to_file(schedule.collected_data, filepath,
-                                           app_arguments.derived_data_output_container)
+                derived_data_container = str(app_arguments.derived_data_output_container).lower()
+                filepath = compressed_path(determine_file_path(schedule_dir, f"derived_data.{derived_data_container}"),
+                                           container_compression(derived_data_container, compression))
+                write_derived_data_to_file(schedule.collected_data, filepath, derived_data_container)
+
+
+def write_simulation_result_store(result: SimResults, app_arguments: MetsiConfiguration):
+    """
+    Append the given simulation results into the result store of the target directory, as single records per
+    schedule holding the unit state and derived data of the schedule. The unit state or derived data is included when
+    its output container is configured.
+
+    :param result: the simulation results structure
+    :param app_arguments: application run configuration
+    :return: None
+    """
+    with ResultStoreWriter(app_arguments.target_directory) as writer:
+        for stand_id, schedules in result.items():
+            for i, schedule in enumerate(schedules):
+                writer.append(
+                    stand_id,
+                    i,
+                    schedule.computational_unit if app_arguments.state_output_container is not None else None,
+                    schedule.collected_data if app_arguments.derived_data_output_container is not None else None)
 
 
 def read_control_module(control_path: str, control: str = "control_structure") -> dict[str, Any]:
@@ -282,46 +499,77 @@ def read_control_module(control_path: str, control: str = "control_structure") -
 
 
 ##### FileWriters start #####
+# containers read by memory mapping or random access, written without compression
+UNCOMPRESSED_CONTAINERS = ("npz", "columnar", "mapped_pickle")
+
+
 def pickle_writer(filepath: Path, container: ObjectLike | ExportableContainer):
     outputtable = container.export_objects if isinstance(container, ExportableContainer) else container
-    with open(filepath, 'wb') as f:
+    with open_file(filepath, 'wb') as f:
         pickle.dump(outputtable, f, protocol=5)
 
 
+def mapped_pickle_writer(filepath: Path, container: ObjectLike | ExportableContainer):
+    uncompressed_only(filepath, "mapped_pickle")
+    outputtable = container.export_objects if isinstance(container, ExportableContainer) else container
+    write_mapped_pickle(filepath, outputtable)
+
+
 def json_writer(filepath: Path, container: ObjectLike | ExportableContainer):
     outputtable = container.export_objects if isinstance(container, ExportableContainer) else container
-    jsonpickle.set_encoder_options("json", indent=2)
-    with open(filepath, 'w', newline='\n', encoding="utf-8") as f:
-        f.write(str(jsonpickle.encode(outputtable)))
+    with open_file(filepath, 'w', newline='\n', encoding="utf-8") as f:
+        f.write(json_codec.dumps(outputtable))
+
+
+def ndjson_writer(filepath: Path, container: ExportableContainer[ForestStand]):
+    json_codec.write_ndjson(filepath, container.export_objects)
 
 # generic writer
-def row_writer(filepath: Path, rows: list[str]):
-    with open(filepath, 'a', newline='\n', encoding="utf-8") as file:
-        for row in rows:
-            file.write(row)
+def row_writer(filepath: Path, rows: Iterable[str]):
+    """Append the rows to the file, writing them in blocks of ROW_BLOCK_SIZE rows"""
+    with open_file(filepath, 'a', newline='\n', encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as file:
+        for block in batched(rows, ROW_BLOCK_SIZE):
+            file.write('\n'.join(block))
             file.write('\n')
 
 
 def csv_writer(filepath: Path, container: ExportableContainer[ForestStand]):
-    row_writer(filepath, stands_to_csv_content(container, ';'))
+    row_writer(filepath, csv_rows(container.export_objects, ';', container.additional_vars))
 
 
 def rst_writer(filepath: Path, container: ExportableContainer[ForestStand]):
-    rows = stands_to_rst_content(container)
-    row_writer(filepath, rows)
+    row_writer(filepath, rst_rows(container.export_objects, container.additional_vars or []))
     if container.additional_vars is not None:
         par_writer(filepath, container.additional_vars)
 
 def npy_writer(filepath: Path, container: ExportableContainer):
     stands = container.export_objects
-    np.save(filepath, allow_pickle=True, arr=np.array(stands, dtype=object))
+    with open_file(filepath, 'wb') as f:
+        np.save(f, allow_pickle=True, arr=np.array(stands, dtype=object))
 
 
 def npz_writer(filepath: Path, container: ExportableContainer):
+    uncompressed_only(filepath, "npz")
     stands = container.export_objects
     np.savez(filepath, allow_pickle=True, *[np.array(stand) for stand in stands])
 
 
+def columnar_writer(filepath: Path, container: ExportableContainer[ForestStand]):
+    uncompressed_only(filepath, "columnar")
+    write_columnar(filepath, container.export_objects)
+
+
+def container_compression(container_format: str, compression: Optional[str]) -> Optional[str]:
+    """The compression of output in the given container, None for containers which are not compressed"""
+    return None if container_format in UNCOMPRESSED_CONTAINERS else compression
+
+
+def uncompressed_only(filepath: Path, container_format: str):
+    """Containers read by memory mapping or random access are not compressed"""
+    if compression_of(filepath) is not None:
+        raise MetsiException(f"Container format '{container_format}' does not support compression")
+
+
 def par_writer(filepath: Path, var_names: list[str]):
     def to_par_filepath(filepath: Path):
         dir_parts = list(filepath.parts)[0:-1]
@@ -330,30 +578,35 @@ def par_writer(filepath: Path, var_names: list[str]):
 
 ##### SourceFileReaders start #####
 def vmi_file_reader(file: str | Path) -> list[str]:
-    with open(file, 'r', encoding='utf-8') as input_file:
+    with open_file(file, 'r', encoding='utf-8') as input_file:
         return input_file.readlines()
 
 
+def vmi_row_iterator(file: str | Path) -> Iterator[str]:
+    with open_file(file, 'r', encoding='utf-8') as input_file:
+        yield from input_file
+
+
 def xml_file_reader(file: str | Path) -> str:
-    with open(file, 'r', encoding='utf-8') as input_file:
+    with open_file(file, 'r', encoding='utf-8') as input_file:
         return input_file.read()
 
 
 def csv_file_reader(file: str | Path) -> list[list[str]]:
-    with open(file, 'r', encoding='utf-8') as input_file:
+    with open_file(file, 'r', encoding='utf-8') as input_file:
         return list(csv.reader(input_file, delimiter=';'))
 
 ## ObjectFileReaders start ##
 def json_reader(file_path: str | Path) -> StandList:
-    return jsonpickle.decode(file_contents(file_path)) # type: ignore
+    return json_codec.loads(file_contents(file_path))
 
 
 def pickle_reader(file_path: str | Path) -> StandList:
-    with open(file_path, 'rb') as f:
+    with open_file(file_path, 'rb') as f:
         return pickle.load(f)
 
 def npy_file_reader(file_path: str | Path) -> np.ndarray:
-    with open(file_path, 'rb') as f:
+    with open_file(file_path, 'rb') as f:
         return np.load(f, allow_pickle=True)
 
 def npz_file_reader(file_path: str | Path):
@@ -0,0 +1,133 @@
+""" Slice sizing by a memory budget.
+
+The memory footprint of a stand is estimated from the slices run so far, as the bytes of the vectorized data of its
+input state and of the states of all its simulated alternatives. Each following slice is sized to fit the budget by
+the largest footprint per stand seen, growing at most twofold from the previous slice. Slices whose measured peak
+resident set size exceeds the budget shrink the following slice in proportion.
+"""
+import re
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from lukefi.metsi.app.utils import ConfigurationException
+from lukefi.metsi.data.formats.fdm_columnar import ColumnarStandStore
+
+# stands in the first slice, used to measure the footprint per stand, when no slice_size is given
+INITIAL_SLICE_SIZE = 10
+
+# share of the budget filled by the estimated footprint of a slice, leaving room for the interpreter and event trees
+BUDGET_FILL = 0.8
+
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_memory_budget(value: int | str) -> int:
+    """Memory budget in bytes from a number of bytes, or a string with a K, M, G or T suffix, such as '512M'"""
+    if isinstance(value, int) and value > 0:
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(value), re.IGNORECASE)
+    if match is None or float(match.group(1)) <= 0:
+        raise ConfigurationException(f"Invalid memory_budget '{value}'")
+    return int(float(match.group(1)) * UNITS[match.group(2).upper()])
+
+
+def format_bytes(nbytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} TiB"
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak resident set size of the process, which is only supported on Linux"""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of the process in bytes since start or the last reset, if known"""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+@dataclass
+class SliceUsage:
+    """Memory use of a slice, recorded from the stands and simulation results of its run modes"""
+    stands: int = 0
+    stand_nbytes: int = 0  # vectorized data of the input stands
+    result_nbytes: int = 0  # vectorized data of the states of all alternatives
+    peak_rss: Optional[int] = None
+
+    def record(self, data: Any):
+        """Record the size of stands or simulation results, keeping the largest seen"""
+        if isinstance(data, Mapping):
+            self.stands = max(self.stands, len(data))
+            self.result_nbytes = max(self.result_nbytes, sum(
+                schedule.computational_unit.nbytes for schedules in data.values() for schedule in schedules))
+        else:
+            self.stands = max(self.stands, len(data))
+            # the size of a columnar stand store is read from its column offsets without building its stands
+            nbytes = data.nbytes if isinstance(data, ColumnarStandStore) else sum(stand.nbytes for stand in data)
+            self.stand_nbytes = max(self.stand_nbytes, nbytes)
+
+    @property
+    def footprint(self) -> float:
+        """Estimated bytes per stand"""
+        return (self.stand_nbytes + self.result_nbytes) / self.stands if self.stands > 0 else 0.0
+
+    def report(self) -> str:
+        rss = "unknown" if self.peak_rss is None else format_bytes(self.peak_rss)
+        return f"{self.stands} stands, {format_bytes(self.footprint)} per stand, peak RSS {rss}"
+
+
+class SliceSizer:
+    """Size of the next slice within a memory budget, adapted to the usage of the slices run so far"""
+
+    def __init__(self, memory_budget: int, initial_size: int = INITIAL_SLICE_SIZE, concurrent_slices: int = 1):
+        """
+        :param memory_budget: bytes available for the run
+        :param initial_size: stands in the first slice
+        :param concurrent_slices: slices held in memory at once, sharing the budget
+        """
+        self.memory_budget = memory_budget
+        self.concurrent_slices = concurrent_slices
+        self.size = max(1, initial_size)
+        self.footprint: Optional[float] = None
+
+    @property
+    def slice_budget(self) -> float:
+        return self.memory_budget / self.concurrent_slices
+
+    def next_size(self) -> int:
+        return self.size
+
+    def observe(self, usage: SliceUsage):
+        """Adapt the size of the following slices to the usage of a finished slice"""
+        if usage.stands == 0:
+            return
+        self.footprint = max(self.footprint or 0.0, usage.footprint)
+        fitting = self.slice_budget * BUDGET_FILL / self.footprint if self.footprint > 0 else float("inf")
+        if usage.peak_rss is not None and usage.peak_rss > self.slice_budget:
+            fitting = min(fitting, usage.stands * self.slice_budget / usage.peak_rss)
+        self.size = max(1, int(min(fitting, 2 * max(usage.stands, self.size))))
+
+
+__all__ = ["parse_memory_budget", "format_bytes", "reset_peak_rss", "peak_rss", "SliceUsage", "SliceSizer"]
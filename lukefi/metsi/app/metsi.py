@@ -1,25 +1,43 @@
 import os
+import re
 import sys
 import copy
+import shutil
 import traceback
-from typing import Callable
+from collections.abc import Iterable, Iterator, Sequence
+from functools import partial
+from typing import Any, Callable, Optional
 from pathlib import Path
 from lukefi.metsi.app.preprocessor import (
     preprocess_stands,
     slice_stands_by_percentage,
-    slice_stands_by_size
+    stream_stands_by_size,
+    stream_stands_by_budget,
+    remaining_stands,
+    stream_remaining_stands,
+    stand_identifiers
 )
 from lukefi.metsi.app.app_io import parse_cli_arguments, MetsiConfiguration, generate_application_configuration, RunMode
 from lukefi.metsi.domain.forestry_types import SimResults
-from lukefi.metsi.domain.forestry_types import StandList
-from lukefi.metsi.app.export import export_files, export_preprocessed
-from lukefi.metsi.app.file_io import prepare_target_directory, read_stands_from_file, \
-    read_full_simulation_result_dirtree, write_full_simulation_result_dirtree, read_control_module
+from lukefi.metsi.domain.forestry_types import ForestStand, StandList
+from lukefi.metsi.app.compression import index_path
+from lukefi.metsi.app.export import export_files, export_preprocessed, preprocessing_result_name
+from lukefi.metsi.app.file_io import prepare_target_directory, read_stands_from_file, stream_stands_from_file, \
+    read_stand_sequence, open_stand_store, lazy_simulation_results, write_full_simulation_result_dirtree, \
+    read_control_module
+from lukefi.metsi.app.memory_budget import INITIAL_SLICE_SIZE, SliceSizer, SliceUsage, parse_memory_budget, \
+    peak_rss, reset_peak_rss
+from lukefi.metsi.app.pipeline import run_pipeline
 from lukefi.metsi.app.post_processing import post_process_alternatives
+from lukefi.metsi.app.result_store import remove_result_store
+from lukefi.metsi.app.run_journal import RunJournal, remove_journal
+from lukefi.metsi.app.sim_results import LazySimResults
 from lukefi.metsi.domain.stand_runner import run_stands
 from lukefi.metsi.sim.simulator import simulate_alternatives
+from lukefi.metsi.sim.planner import plan_simulation, plan_report
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
 from lukefi.metsi.app.console_logging import print_logline
-from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.app.utils import ConfigurationException, MetsiException
 
 
 def preprocess(config: MetsiConfiguration, control: dict, stands: StandList) -> StandList:
@@ -31,20 +49,24 @@ def preprocess(config: MetsiConfiguration, control: dict, stands: StandList) ->
 
 def simulate(config: MetsiConfiguration, control: dict, stands: StandList) -> SimResults:
     print_logline("Simulating alternatives...")
-    result = simulate_alternatives(config, control, stands, run_stands)
-    if config.state_output_container is not None or config.derived_data_output_container is not None:
-        print_logline(f"Writing simulation results to '{config.target_directory}'")
-        write_full_simulation_result_dirtree(result, config)
-    return result
+    return simulate_alternatives(config, control, stands, run_stands)
 
 
 def post_process(config: MetsiConfiguration, control: dict, data: SimResults) -> SimResults:
     print_logline("Post-processing alternatives...")
-    result = post_process_alternatives(config, control['post_processing'], data)
-    if config.state_output_container is not None or config.derived_data_output_container is not None:
-        print_logline(f"Writing post-processing results to '{config.target_directory}'")
-        write_full_simulation_result_dirtree(result, config)
-    return result
+    return post_process_alternatives(config, control['post_processing'], data)
+
+
+def write_simulation_results(config: MetsiConfiguration, control: dict, data: SimResults) -> None:
+    _ = control
+    print_logline(f"Writing simulation results to '{config.target_directory}'")
+    write_full_simulation_result_dirtree(data, config)
+
+
+def write_post_processing_results(config: MetsiConfiguration, control: dict, data: SimResults) -> None:
+    _ = control
+    print_logline(f"Writing post-processing results to '{config.target_directory}'")
+    write_full_simulation_result_dirtree(data, config)
 
 
 def export(config: MetsiConfiguration, control: dict, data: SimResults) -> None:
@@ -53,14 +75,27 @@ def export(config: MetsiConfiguration, control: dict, data: SimResults) -> None:
         export_files(config, control['export'], data)
 
 
-def export_prepro(config: MetsiConfiguration, control: dict, data: StandList) -> StandList:
+def export_prepro(config: MetsiConfiguration, control: dict, data: StandList) -> None:
     print_logline("Exporting preprocessing results...")
     if control.get('export_prepro', None):
         export_preprocessed(config.target_directory, control['export_prepro'], data)
     else:
         print_logline("Declaration for 'export_prerocessed' not found from control.")
         print_logline("Skipping export of preprocessing results.")
-    return data  # returned as is just for workflow reasons
+
+
+def dry_run(config: MetsiConfiguration, control: dict) -> None:
+    """Report the shape of the declared simulation and its projected cost for the input stands without simulating.
+    Input stands are preprocessed first if preprocessing is a configured run mode."""
+    if config.run_modes[0] not in [RunMode.PREPROCESS, RunMode.SIMULATE]:
+        raise MetsiException("Dry run requires a run mode reading stand input")
+    stands = read_stands_from_file(config, control.get('conversions', {}))
+    if RunMode.PREPROCESS in config.run_modes:
+        stands = preprocess(config, control, stands)
+    print_logline("Planning simulation...")
+    plan = plan_simulation(SimConfiguration(**control))
+    for line in plan_report(plan, [stand.nbytes for stand in stands]):
+        print_logline(line)
 
 
 def remove_existing_export_files(config: MetsiConfiguration, control: dict):
@@ -82,8 +117,10 @@ def remove_existing_export_files(config: MetsiConfiguration, control: dict):
 
     # Add preprocessing known output names
     if 'export_prepro' in control:
-        for ext in control['export_prepro'].keys():
-            safe_targets.add(f"preprocessing_result.{ext}")
+        for ext, decl in control['export_prepro'].items():
+            file_name = preprocessing_result_name(ext, (decl or {}).get('compression'))
+            safe_targets.add(file_name)
+            safe_targets.add(index_path(file_name).name)
 
     # Delete all collected files if they exist in the correct directory
     for filename in safe_targets:
@@ -95,50 +132,301 @@ def remove_existing_export_files(config: MetsiConfiguration, control: dict):
             print_logline(f"Warning: Failed to delete file {file_path}: {e}")
 
 
+# computing step of each run mode, returning the data passed on to the next run mode
 mode_runners: dict[RunMode, Callable] = {
     RunMode.PREPROCESS: preprocess,
-    RunMode.EXPORT_PREPRO: export_prepro,
     RunMode.SIMULATE: simulate,
-    RunMode.POSTPROCESS: post_process,
+    RunMode.POSTPROCESS: post_process
+}
+
+# output step of each run mode, writing the data returned by its computing step or passed on to it
+mode_writers: dict[RunMode, Callable] = {
+    RunMode.EXPORT_PREPRO: export_prepro,
+    RunMode.SIMULATE: write_simulation_results,
+    RunMode.POSTPROCESS: write_post_processing_results,
     RunMode.EXPORT: export
 }
 
 
-def main() -> int:
-    cli_arguments = parse_cli_arguments(sys.argv[1:])
+def writes_output(config: MetsiConfiguration, mode: RunMode) -> bool:
+    if mode in (RunMode.SIMULATE, RunMode.POSTPROCESS):
+        return config.state_output_container is not None or config.derived_data_output_container is not None
+    return mode in mode_writers
+
+
+def run_slice(config: MetsiConfiguration,
+              control: dict,
+              data: Any,
+              usage: Optional[SliceUsage] = None) -> Iterator[tuple[RunMode, Any]]:
+    """Run the computing step of each run mode over the input data of a slice in turn. Yield the data to write for
+    each run mode with output, before continuing to the next run mode. The size of the data of each run mode is
+    recorded into the given usage."""
+    current = data
+    if usage is not None:
+        usage.record(current)
+    for mode in config.run_modes:
+        if mode in mode_runners:
+            current = mode_runners[mode](config, control, current)
+            if usage is not None:
+                usage.record(current)
+        if writes_output(config, mode):
+            yield mode, current
+
+
+def write_slice(config: MetsiConfiguration, control: dict, outputs: Iterable[tuple[RunMode, Any]]) -> None:
+    for mode, data in outputs:
+        mode_writers[mode](config, control, data)
+
+
+def slice_configuration(config: MetsiConfiguration, index: int, sliced: bool) -> MetsiConfiguration:
+    """Configuration of a single slice. Slices of sliced input are written into own slice_N subdirectories of the
+    target directory."""
+    slice_config = copy.copy(config)
+    if sliced:
+        slice_config.target_directory = os.path.join(config.target_directory, f"slice_{index + 1}")
+    return slice_config
+
+
+def prepare_slice_directory(config: MetsiConfiguration, control: dict, sliced: bool) -> None:
+    """Prepare the target directory of a slice, removing output of earlier runs from slice subdirectories"""
+    prepare_target_directory(config.target_directory)
+    if sliced:
+        remove_existing_export_files(config, control)
+        remove_result_store(config.target_directory)
+
+
+def remove_incomplete_slices(directory: str, next_slice: int) -> None:
+    """Remove the slice_N subdirectories of slices not recorded complete in the journal of an interrupted run"""
+    for name in os.listdir(directory):
+        match = re.fullmatch(r"slice_(\d+)", name)
+        if match is not None and int(match.group(1)) > next_slice and os.path.isdir(Path(directory, name)):
+            print_logline(f"Removing incomplete slice directory '{name}'")
+            shutil.rmtree(Path(directory, name))
+
+
+def remove_if_empty(directory: str) -> None:
+    _, dirs, files = next(os.walk(directory))
+    if len(dirs) == 0 and len(files) == 0:
+        os.rmdir(directory)
+
+
+def measure_slice(measured: bool) -> Optional[SliceUsage]:
+    """Start recording the memory use of a slice, when slices are sized by a memory budget"""
+    if not measured:
+        return None
+    reset_peak_rss()
+    return SliceUsage()
+
+
+def adapt_slice_size(index: int, usage: Optional[SliceUsage], sizer: Optional[SliceSizer]) -> None:
+    if sizer is None or usage is None:
+        return
+    sizer.observe(usage)
+    print_logline(f"Slice {index + 1}: {usage.report()}, next slice size {sizer.next_size()}")
+
+
+_worker_control: dict[str, Any] = {}
+
+
+def _init_slice_worker(control_file: str) -> None:
+    """Read the control declaration in a worker process. The declaration is read from its file, as it may hold
+    objects which can not be pickled."""
+    _worker_control.update(read_control_module(control_file))
+
+
+# slice index, slice configuration, input data and whether memory use is recorded
+SliceWork = tuple[int, MetsiConfiguration, Any, bool]
+# slice index, slice configuration, input stand identifiers, outputs of the run modes and recorded memory use
+ComputedSlice = tuple[int, MetsiConfiguration, list[str], list[tuple[RunMode, Any]], Optional[SliceUsage]]
+
+
+def _compute_slice(work: SliceWork) -> ComputedSlice:
+    index, config, data, measured = work
+    identifiers = stand_identifiers(data)
+    usage = measure_slice(measured)
+    outputs = list(run_slice(config, _worker_control, data, usage))
+    if usage is not None:
+        usage.peak_rss = peak_rss()
+    return index, config, identifiers, outputs, usage
+
+
+def _write_computed_slice(control: dict,
+                          sliced: bool,
+                          sizer: Optional[SliceSizer],
+                          journal: Optional[RunJournal],
+                          computed: ComputedSlice) -> None:
+    index, config, identifiers, outputs, usage = computed
+    adapt_slice_size(index, usage, sizer)
+    prepare_slice_directory(config, control, sliced)
+    write_slice(config, control, outputs)
+    if sliced:
+        remove_if_empty(config.target_directory)
+    if journal is not None:
+        journal.record(index, identifiers)
+
+
+def pipeline_workers(config: MetsiConfiguration) -> int:
+    return (os.cpu_count() or 1) if config.multiprocessing else 1
+
+
+def run_sequential(config: MetsiConfiguration,
+                   control: dict,
+                   input_data: Iterable[Any],
+                   sliced: bool,
+                   sizer: Optional[SliceSizer] = None,
+                   journal: Optional[RunJournal] = None) -> None:
+    """Run the slices through the run modes one at a time. With a slice sizer, the memory use of each slice is
+    reported and adapts the size of the following slices. With a journal, the input stands of each slice are recorded
+    complete once its output is written, and slices are numbered after those already recorded."""
+    first = 0 if journal is None else journal.next_slice
+    for index, data in enumerate(input_data, first):
+        identifiers = [] if journal is None else stand_identifiers(data)
+        slice_config = slice_configuration(config, index, sliced)
+        prepare_slice_directory(slice_config, control, sliced)
+        usage = measure_slice(sizer is not None)
+        write_slice(slice_config, control, run_slice(slice_config, control, data, usage))
+        if usage is not None:
+            usage.peak_rss = peak_rss()
+        adapt_slice_size(index, usage, sizer)
+        if sliced:
+            remove_if_empty(slice_config.target_directory)
+        if journal is not None:
+            journal.record(index, identifiers)
+
+
+def run_pipelined(config: MetsiConfiguration,
+                  control: dict,
+                  control_file: str,
+                  input_data: Iterable[Any],
+                  sliced: bool,
+                  sizer: Optional[SliceSizer] = None,
+                  journal: Optional[RunJournal] = None) -> None:
+    """Run the slices through the run modes with reading of the next slice, computing of the current slice and
+    writing of the previous slice overlapping. Slices are computed in worker processes, one slice per available CPU
+    with multiprocessing enabled. With a slice sizer, the memory use of each slice is reported and adapts the size
+    of the slices read after the slice has been computed. With a journal, slices are recorded complete as they are
+    written."""
+    workers = pipeline_workers(config)
+    first = 0 if journal is None else journal.next_slice
+    print_logline(f"Running slices pipelined with {workers} worker process(es)")
+    run_pipeline(
+        ((index, slice_configuration(config, index, sliced), data, sizer is not None)
+         for index, data in enumerate(input_data, first)),
+        _compute_slice,
+        partial(_write_computed_slice, control, sliced, sizer, journal),
+        workers=workers,
+        initializer=_init_slice_worker,
+        initargs=(control_file,))
+
+
+def read_input_stands(config: MetsiConfiguration,
+                      conversions: dict,
+                      completed: Optional[RunJournal] = None) -> Sequence[ForestStand]:
+    """Read the input stands of the run, skipping those recorded complete in the journal of a resumed run"""
+    # without preprocessing, stands may be built lazily as the simulation reaches them
+    reader = read_stand_sequence if config.run_modes[0] == RunMode.SIMULATE else read_stands_from_file
+    stands = reader(config, conversions)
+    return stands if completed is None else remaining_stands(stands, completed)
+
+
+def stream_input_stands(config: MetsiConfiguration,
+                        conversions: dict,
+                        completed: Optional[RunJournal] = None) -> Iterable[ForestStand]:
+    """Lazily read the input stands of the run, skipping those recorded complete in the journal of a resumed run"""
+    # without preprocessing, a columnar stand store is sliced without building its stands
+    store = open_stand_store(config) if config.run_modes[0] == RunMode.SIMULATE else None
+    if store is not None:
+        return store if completed is None else remaining_stands(store, completed)
+    stands = stream_stands_from_file(config, conversions)
+    return stands if completed is None else stream_remaining_stands(stands, completed)
+
+
+def run(cli_arguments: dict[str, Any], control_reader: Callable[[str], dict] = read_control_module) -> int:
+    """
+    Run the application with the given command line arguments.
+
+    :param cli_arguments: arguments as parsed by parse_cli_arguments
+    :param control_reader: reader of the control declaration from the control file
+    :return: exit status
+    """
     control_file = \
         MetsiConfiguration.control_file if cli_arguments["control_file"] is None else cli_arguments['control_file']
     try:
-        control_structure = read_control_module(control_file)
+        control_structure = control_reader(control_file)
     except IOError:
         print(f"Application control file path '{control_file}' can not be read. Aborting....")
         return 1
     try:
         app_config = generate_application_configuration({**cli_arguments, **control_structure['app_configuration']})
+        if app_config.dry_run:
+            dry_run(app_config, control_structure)
+            return 0
+        stand_input = app_config.run_modes[0] in [RunMode.PREPROCESS, RunMode.SIMULATE]
+        sliced = stand_input and any(control_structure.get(key) is not None
+                                     for key in ('slice_percentage', 'slice_size', 'memory_budget'))
+        # completed slices of sliced runs reading stands are recorded, so that an interrupted run can be resumed. A run
+        # without slicing writes its output at once, so there is nothing to resume.
+        if app_config.resume and not sliced:
+            raise ConfigurationException("Only sliced runs reading stand input can be resumed, declare slice_size, "
+                                         "slice_percentage or memory_budget to journal the run")
         prepare_target_directory(app_config.target_directory)
-        print_logline("Reading input...")
-
-        # deleting old target files
-        remove_existing_export_files(app_config, control_structure)
 
-        if app_config.run_modes[0] in [RunMode.PREPROCESS, RunMode.SIMULATE]:
-            # 1) read full stand list
-            full_stands = read_stands_from_file(app_config, control_structure.get('conversions', {}))
+        journal: Optional[RunJournal] = None
+        if sliced:
+            journal = RunJournal(app_config.target_directory, app_config.resume)
+        elif stand_input:
+            remove_journal(app_config.target_directory)
+        completed = journal if journal is not None and len(journal) > 0 else None
+        print_logline("Reading input...")
 
-            # 2) split it if slice_* parameters are given
+        if completed is not None:
+            # output of the completed slices is kept, output of an interrupted slice is written anew
+            print_logline(f"Resuming run, skipping {len(completed)} completed stands")
+            remove_incomplete_slices(app_config.target_directory, completed.next_slice)
+        else:
+            # deleting old target files
+            remove_existing_export_files(app_config, control_structure)
+            if stand_input:
+                # consolidated results are appended to the store, so a new simulation starts from an empty store
+                remove_result_store(app_config.target_directory)
+
+        sizer: Optional[SliceSizer] = None
+        stand_sublists: Iterable[Sequence[ForestStand]]
+        if stand_input:
+            # split the stands if slice_* parameters are given
             pct = control_structure.get('slice_percentage')
             sz = control_structure.get('slice_size')
-            if pct is not None:
-                stand_sublists = slice_stands_by_percentage(full_stands, pct)
+            budget = control_structure.get('memory_budget')
+            conversions = control_structure.get('conversions', {})
+            if budget is not None:
+                if pct is not None:
+                    raise ConfigurationException("memory_budget can not be used with slice_percentage")
+                # slices are read lazily, each sized by the memory use of the slices run before it
+                sizer = SliceSizer(parse_memory_budget(budget),
+                                   sz or INITIAL_SLICE_SIZE,
+                                   # slices read ahead and waiting to be written share the budget when pipelined
+                                   pipeline_workers(app_config) + 2 if app_config.pipelined else 1)
+                stand_sublists = stream_stands_by_budget(stream_input_stands(app_config, conversions, completed),
+                                                         sizer)
+            elif pct is not None:
+                stand_sublists = slice_stands_by_percentage(read_input_stands(app_config, conversions), pct)
+                if completed is not None:
+                    # the percentage is of all input stands, so that slices of a resumed run keep their bounds
+                    stand_sublists = [remaining_stands(stands, completed) for stands in stand_sublists]
             elif sz is not None:
-                stand_sublists = slice_stands_by_size(full_stands, sz)
+                # slices of a fixed size are read lazily, one slice at a time
+                stand_sublists = stream_stands_by_size(stream_input_stands(app_config, conversions, completed), sz)
             else:
-                stand_sublists = [full_stands]
+                stand_sublists = [read_input_stands(app_config, conversions, completed)]
+            if completed is not None:
+                # no slice is written for a resumed run with all stands completed
+                stand_sublists = (stands for stands in stand_sublists if len(stands) > 0)
 
-            input_data: list[StandList] | SimResults = stand_sublists
+            input_data: Iterable[Sequence[ForestStand]] | list[LazySimResults] = stand_sublists
 
         elif app_config.run_modes[0] in [RunMode.POSTPROCESS, RunMode.EXPORT]:
-            input_data = read_full_simulation_result_dirtree(app_config.input_path)
+            # schedules are read stand by stand as post-processing and export reach them
+            input_data = [lazy_simulation_results(app_config.input_path)]
         else:
             raise MetsiException("Can not determine input data for unknown run mode")
     except Exception:  # pylint: disable=broad-exception-caught
@@ -146,32 +434,21 @@ def main() -> int:
         print("Aborting run...")
         return 1
 
-    # now run each slice in turn
-    for _, stands in enumerate(input_data):
-        # -- optional slice folder (disabled for now) --
-        # slice_target = os.path.join(app_config.target_directory, f"slice_{slice_idx+1}")
-        # prepare_target_directory(slice_target)
-
-        # use original directory instead (to overwrite for now)
-        prepare_target_directory(app_config.target_directory)
-
-        # clone config so we don’t stomp on the original
-        cfg = copy.copy(app_config)
-        cfg.target_directory = app_config.target_directory
-
-        # feed this sub‐list of stands through the normal run_modes
-        current = stands
-        for mode in cfg.run_modes:
-            runner = mode_runners[mode]
-            current = runner(cfg, control_structure, current)
+    # each slice of sliced input is written into its own slice_N subdirectory of the target directory
+    if app_config.pipelined and sliced:
+        run_pipelined(app_config, control_structure, control_file, input_data, sliced, sizer, journal)
+    else:
+        run_sequential(app_config, control_structure, input_data, sliced, sizer, journal)
 
-    _, dirs, files = next(os.walk(app_config.target_directory))
-    if len(dirs) == 0 and len(files) == 0:
-        os.rmdir(app_config.target_directory)
+    remove_if_empty(app_config.target_directory)
 
     print_logline("Exiting successfully")
     return 0
 
 
+def main() -> int:
+    return run(parse_cli_arguments(sys.argv[1:]))
+
+
 if __name__ == '__main__':
     sys.exit(main())
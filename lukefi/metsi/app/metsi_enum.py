@@ -79,11 +79,13 @@ class StrataOrigin(IntConfigEnum):
 class FormationStrategy(StringConfigEnum):
     PARTIAL = 'partial'
     FULL = 'full'
+    AUTO = 'auto'
 
 
 class EvaluationStrategy(StringConfigEnum):
     DEPTH = 'depth'
     CHAINS = 'chains'
+    AUTO = 'auto'
 
 
 class StateFormat(StringConfigEnum):
@@ -98,6 +100,9 @@ class StateInputFormat(StringConfigEnum):
     PICKLE = 'pickle'
     JSON = 'json'
     CSV = 'csv'
+    COLUMNAR = 'columnar'
+    MAPPED_PICKLE = 'mapped_pickle'
+    NDJSON = 'ndjson'
 
 
 class StateOutputFormat(StringConfigEnum):
@@ -105,11 +110,21 @@ class StateOutputFormat(StringConfigEnum):
     JSON = 'json'
     CSV = 'csv'
     RST = 'rst'
+    COLUMNAR = 'columnar'
+    MAPPED_PICKLE = 'mapped_pickle'
+    NDJSON = 'ndjson'
+
+
+class Compression(StringConfigEnum):
+    GZIP = 'gzip'
+    BZ2 = 'bz2'
+    LZMA = 'lzma'
 
 
 class DerivedDataOutputFormat(StringConfigEnum):
     PICKLE = 'pickle'
     JSON = 'json'
+    MAPPED_PICKLE = 'mapped_pickle'
 
 
 # Expose public API
@@ -122,4 +137,5 @@ __all__ = [
     "StateInputFormat",
     "StateOutputFormat",
     "DerivedDataOutputFormat",
+    "Compression",
 ]
@@ -0,0 +1,112 @@
+""" Pipelined processing of input slices.
+
+Items of a source are read in a thread, computed in a process pool and written in a thread, so that reading the next
+item, computing the current one and writing the previous one overlap. Queues between the stages are bounded, so that
+only a fixed number of items is held in memory at any stage.
+"""
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Optional
+
+# interval for rechecking whether a blocked stage should stop
+_POLL_INTERVAL = 0.1
+
+
+class _End:
+    """Marker for the end of a prefetched source, carrying the exception raised by the source, if any"""
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+def _read_ahead(source: Iterable[Any], items: queue.Queue, stop: threading.Event):
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for item in source:
+            if not put(item):
+                return
+    except BaseException as e:  # pylint: disable=broad-exception-caught
+        put(_End(e))
+        return
+    put(_End())
+
+
+def prefetched[T](source: Iterable[T], depth: int = 1) -> Generator[T, None, None]:
+    """Iterate the source in a background thread, reading at most `depth` items ahead of the consumer. Exceptions
+    raised by the source are raised to the consumer. Closing the iterator stops the reading thread."""
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_ahead, args=(source, items, stop), daemon=True)
+    reader.start()
+    try:
+        while not isinstance(item := items.get(), _End):
+            yield item
+        if item.error is not None:
+            raise item.error
+    finally:
+        stop.set()
+        reader.join()
+
+
+def run_pipeline[T, R](source: Iterable[T],
+                       compute: Callable[[T], R],
+                       write: Callable[[R], None],
+                       workers: int = 1,
+                       depth: int = 1,
+                       initializer: Optional[Callable[..., None]] = None,
+                       initargs: tuple = ()):
+    """
+    Compute and write each item of the source, reading, computing and writing concurrently. Items are read ahead in a
+    thread, computed in a pool of worker processes and written in order in a single thread. Items and computation
+    results are pickled between processes, so compute must be a module level function. The first exception raised by
+    any stage stops the pipeline and is raised to the caller, after the results computed before it have been written.
+
+    :param source: items to compute, read in a background thread
+    :param compute: computation of an item in a worker process
+    :param write: output of a computation result, run in a writer thread
+    :param workers: number of worker processes and items computed at a time
+    :param depth: number of items read ahead and of computed results waiting to be written
+    :param initializer: called in each worker process at startup
+    :param initargs: arguments of the initializer
+    """
+    items = prefetched(source, depth)
+    computing: deque[Future[R]] = deque()
+    writing: deque[Future[None]] = deque()
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as processes, \
+            ThreadPoolExecutor(1) as writer:
+        def hand_over_oldest():
+            result = computing.popleft().result()
+            writing.append(writer.submit(write, result))
+            while len(writing) > depth:
+                writing.popleft().result()
+
+        try:
+            for item in items:
+                computing.append(processes.submit(compute, item))
+                if len(computing) >= workers:
+                    hand_over_oldest()
+            while computing:
+                hand_over_oldest()
+            while writing:
+                writing.popleft().result()
+        except BaseException:
+            # results computed before the failure are still written
+            for future in computing:
+                future.cancel()
+            raise
+        finally:
+            items.close()
+
+
+__all__ = ["prefetched", "run_pipeline"]
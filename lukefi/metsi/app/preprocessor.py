@@ -1,3 +1,8 @@
+from collections.abc import Callable, Container, Iterable, Iterator, Sequence
+from itertools import islice
+from lukefi.metsi.app.memory_budget import SliceSizer
+from lukefi.metsi.data.formats.fdm_columnar import ColumnarStandStore
+from lukefi.metsi.data.model import ForestStand
 from lukefi.metsi.domain.forestry_types import StandList
 from lukefi.metsi.sim.operations import simple_processable_chain
 from lukefi.metsi.sim.runners import evaluate_sequence
@@ -11,7 +16,7 @@ def preprocess_stands(stands: StandList, simulation_declaration: dict) -> StandL
     return stands
 
 
-def slice_stands_by_percentage(stands: StandList, percent: float) -> list[StandList]:
+def slice_stands_by_percentage(stands: Sequence[ForestStand], percent: float) -> list[Sequence[ForestStand]]:
     """Split `stands` into batches each containing approx `percent%` of the total."""
     total = len(stands)
     # at least one stand per batch
@@ -29,3 +34,52 @@ def slice_stands_by_size(stands: StandList, size: int) -> list[StandList]:
         stands[i: i + size]
         for i in range(0, total, size)
     ]
+
+
+def stream_stands_by_size(stands: Iterable[ForestStand], size: int) -> Iterator[Sequence[ForestStand]]:
+    """Lazily split `stands` into batches of up to `size` stands each, consuming the source one batch at a time. A
+    columnar stand store is split into lazy stores without building its stands."""
+    if isinstance(stands, ColumnarStandStore):
+        yield from _store_slices(stands, lambda: size)
+        return
+    source = iter(stands)
+    while batch := list(islice(source, size)):
+        yield batch
+
+
+def stream_stands_by_budget(stands: Iterable[ForestStand], sizer: SliceSizer) -> Iterator[Sequence[ForestStand]]:
+    """Lazily split `stands` into batches sized by `sizer` at the time each batch is read, so that the size of each
+    batch adapts to the usage of the batches run before it. A columnar stand store is split into lazy stores without
+    building its stands."""
+    if isinstance(stands, ColumnarStandStore):
+        yield from _store_slices(stands, sizer.next_size)
+        return
+    source = iter(stands)
+    while batch := list(islice(source, sizer.next_size())):
+        yield batch
+
+
+def _store_slices(store: ColumnarStandStore, next_size: Callable[[], int]) -> Iterator[ColumnarStandStore]:
+    start = 0
+    while start < len(store):
+        end = start + next_size()
+        yield store[start:end]
+        start = end
+
+
+def remaining_stands(stands: Sequence[ForestStand], completed: Container[str]) -> Sequence[ForestStand]:
+    """Stands of `stands` whose identifier is not among the `completed` ones. A columnar stand store stays lazy."""
+    if isinstance(stands, ColumnarStandStore):
+        return stands.excluding(completed)
+    return [stand for stand in stands if stand.identifier not in completed]
+
+
+def stream_remaining_stands(stands: Iterable[ForestStand], completed: Container[str]) -> Iterator[ForestStand]:
+    """Lazily skip the stands whose identifier is among the `completed` ones"""
+    return (stand for stand in stands if stand.identifier not in completed)
+
+
+def stand_identifiers(stands: Sequence[ForestStand]) -> list[str]:
+    if isinstance(stands, ColumnarStandStore):
+        return stands.identifiers
+    return [stand.identifier for stand in stands]
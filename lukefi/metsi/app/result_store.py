@@ -0,0 +1,163 @@
+""" Consolidated storage for simulation results.
+
+Schedules are stored as records appended to chunked data files, instead of as files in a directory per schedule. An
+index file lists the chunk, offset and length of the record of each (stand, schedule) pair, so that any schedule can be
+read without reading the others. Records are pickled pairs of unit state and derived data, either of which may be None.
+
+Records appended later for an already stored (stand, schedule) pair supersede the earlier ones.
+"""
+import csv
+import mmap
+import os
+import pickle
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.domain.forestry_types import ForestOpPayload, SimResults
+
+INDEX_FILE = "index.csv"
+CHUNK_SIZE = 256 * 1024 * 1024
+BUFFER_SIZE = 4 * 1024 * 1024
+
+RecordLocation = tuple[int, int, int]
+
+
+def chunk_path(directory: str | Path, chunk: int) -> Path:
+    return Path(directory, f"data-{chunk:05d}.bin")
+
+
+def is_result_store(directory: str | Path) -> bool:
+    return Path(directory, INDEX_FILE).is_file()
+
+
+def remove_result_store(directory: str | Path):
+    """Remove the index and data files of a result store, if any"""
+    if not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename == INDEX_FILE or (filename.startswith("data-") and filename.endswith(".bin")):
+            os.remove(Path(directory, filename))
+
+
+def _read_index(directory: str | Path) -> dict[tuple[str, int], RecordLocation]:
+    index: dict[tuple[str, int], RecordLocation] = {}
+    with open(Path(directory, INDEX_FILE), "r", newline="", encoding="utf-8") as file:
+        for stand_id, schedule, chunk, offset, length in csv.reader(file, delimiter=";"):
+            index[(stand_id, int(schedule))] = (int(chunk), int(offset), int(length))
+    return index
+
+
+class ResultStoreWriter:
+    """Buffered append-only writer of simulation result records. Appends to the existing records of the directory,
+    starting a new data file whenever the current one reaches the chunk size."""
+
+    def __init__(self, directory: str | Path, chunk_size: int = CHUNK_SIZE, buffer_size: int = BUFFER_SIZE):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.buffer_size = buffer_size
+        os.makedirs(directory, exist_ok=True)
+        chunks = [location[0] for location in _read_index(directory).values()] if is_result_store(directory) else []
+        self.chunk = max(chunks, default=0)
+        self._data: Optional[IO[bytes]] = None
+        # pylint: disable-next=consider-using-with
+        self._index = open(Path(directory, INDEX_FILE), "a", newline="", encoding="utf-8", buffering=buffer_size)
+        self._index_writer = csv.writer(self._index, delimiter=";")
+
+    def __enter__(self) -> "ResultStoreWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _open_chunk(self) -> IO[bytes]:
+        return open(chunk_path(self.directory, self.chunk), "ab", buffering=self.buffer_size)
+
+    def _data_file(self) -> IO[bytes]:
+        if self._data is None:
+            self._data = self._open_chunk()
+        if self._data.tell() >= self.chunk_size:
+            self._data.close()
+            self.chunk += 1
+            self._data = self._open_chunk()
+        return self._data
+
+    def append(self, stand_id: str, schedule: int, unit_state: Any = None, derived_data: Any = None):
+        record = pickle.dumps((unit_state, derived_data), protocol=pickle.HIGHEST_PROTOCOL)
+        data = self._data_file()
+        offset = data.tell()
+        data.write(record)
+        self._index_writer.writerow((stand_id, schedule, self.chunk, offset, len(record)))
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        self._index.close()
+
+
+class ResultStore:
+    """Random access reader of the simulation result records of a directory. Data files are memory mapped as records
+    in them are first read. Records may be read from several threads."""
+
+    def __init__(self, directory: str | Path):
+        if not is_result_store(directory):
+            raise MetsiException(f"Directory '{directory}' does not contain a simulation result store")
+        self.directory = directory
+        self.index = _read_index(directory)
+        self._schedules: dict[str, list[int]] = {}
+        for stand_id, schedule in self.index:
+            self._schedules.setdefault(stand_id, []).append(schedule)
+        self._chunks: dict[int, mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.index
+
+    def stands(self) -> list[str]:
+        return list(self._schedules)
+
+    def schedules(self, stand_id: str) -> list[int]:
+        return sorted(self._schedules.get(stand_id, []))
+
+    def _chunk(self, chunk: int) -> mmap.mmap:
+        with self._lock:
+            if chunk not in self._chunks:
+                with open(chunk_path(self.directory, chunk), "rb") as file:
+                    self._chunks[chunk] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._chunks[chunk]
+
+    def __getitem__(self, key: tuple[str, int]) -> ForestOpPayload:
+        if key not in self.index:
+            raise KeyError(key)
+        chunk, offset, length = self.index[key]
+        unit_state, derived_data = pickle.loads(self._chunk(chunk)[offset:offset + length])
+        return ForestOpPayload(computational_unit=unit_state, collected_data=derived_data, operation_history=[])
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        return iter(self.index)
+
+    def read_stand(self, stand_id: str) -> list[ForestOpPayload]:
+        return [self[(stand_id, schedule)] for schedule in self.schedules(stand_id)]
+
+    def read_all(self) -> SimResults:
+        return {stand_id: self.read_stand(stand_id) for stand_id in self.stands()}
+
+    def close(self):
+        for mapped in self._chunks.values():
+            mapped.close()
+        self._chunks.clear()
+
+
+__all__ = ["ResultStoreWriter", "ResultStore", "is_result_store", "remove_result_store"]
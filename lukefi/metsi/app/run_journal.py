@@ -0,0 +1,73 @@
+""" Completion journal of a run.
+
+The journal in the target directory records the stands whose output has been written. A line is appended for each
+slice once all of its output has been written, listing the slice index and the identifiers of its input stands, and
+the line is flushed to disk before the next slice is written. A line cut short by an interrupted run is not counted,
+so the stands of a slice are either all recorded or none of them are.
+
+A resumed run skips the recorded stands, and writes the remaining ones as slices numbered after the last recorded one.
+Only sliced runs are journaled and resumed, as a run without slicing writes all of its output at once.
+"""
+import csv
+import io
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+JOURNAL_FILE = "run_journal.csv"
+
+
+class RunJournal:
+    """Append-only record of the completed slices of a run and their stands"""
+
+    def __init__(self, directory: str | Path, resume: bool = False):
+        """
+        :param directory: target directory of the run
+        :param resume: continue from the records of an earlier run, instead of starting an empty journal
+        """
+        self.path = Path(directory, JOURNAL_FILE)
+        self.completed: dict[str, int] = {}
+        self.next_slice = 0
+        if resume and self.path.is_file():
+            self._read()
+        elif self.path.exists():
+            self.path.unlink()
+
+    def _read(self):
+        with open(self.path, "rb") as file:
+            content = file.read()
+        # only lines ended by a line break were fully written
+        complete = content[:content.rfind(b"\n") + 1]
+        for row in csv.reader(io.StringIO(complete.decode("utf-8")), delimiter=";"):
+            index = int(row[0])
+            self.completed.update((identifier, index) for identifier in row[1:])
+            self.next_slice = max(self.next_slice, index + 1)
+        if len(complete) < len(content):
+            with open(self.path, "r+b") as file:
+                file.truncate(len(complete))
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self.completed
+
+    def record(self, index: int, identifiers: Iterable[str]):
+        """Record the input stands of a slice as completed, once all output of the slice has been written"""
+        identifiers = list(identifiers)
+        line = io.StringIO()
+        csv.writer(line, delimiter=";", lineterminator="\n").writerow([index, *identifiers])
+        with open(self.path, "a", encoding="utf-8", newline="") as file:
+            file.write(line.getvalue())
+            file.flush()
+            os.fsync(file.fileno())
+        self.completed.update((identifier, index) for identifier in identifiers)
+        self.next_slice = max(self.next_slice, index + 1)
+
+
+def remove_journal(directory: str | Path):
+    """Remove the journal of an earlier run from the target directory, if any"""
+    Path(directory, JOURNAL_FILE).unlink(missing_ok=True)
+
+
+__all__ = ["JOURNAL_FILE", "RunJournal", "remove_journal"]
@@ -0,0 +1,74 @@
+""" Lazily loaded simulation results """
+from collections import deque
+from collections.abc import Callable, ItemsView, Iterator, Mapping, ValuesView
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+
+from lukefi.metsi.domain.forestry_types import ForestOpPayload
+
+ScheduleLoader = Callable[[str], list[ForestOpPayload]]
+
+
+class LazySimResults(Mapping[str, list[ForestOpPayload]]):
+    """Read-only simulation results mapping of stand identifiers to schedules. The stand identifiers are known up front
+    but the schedules of a stand are loaded only when accessed, and not retained afterwards. Iterating the items or
+    values loads the schedules of the next stands in a thread pool while the current stand is processed, so that at
+    most `prefetch` stands besides the current one are held in memory."""
+
+    def __init__(self, stand_ids: list[str], loader: ScheduleLoader, prefetch: int = 4):
+        self._stand_ids = stand_ids
+        self._known = set(stand_ids)
+        self._loader = loader
+        self.prefetch = prefetch
+
+    def __getitem__(self, stand_id: str) -> list[ForestOpPayload]:
+        if stand_id not in self._known:
+            raise KeyError(stand_id)
+        return self._loader(stand_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._stand_ids)
+
+    def __len__(self) -> int:
+        return len(self._stand_ids)
+
+    def __contains__(self, stand_id: object) -> bool:
+        return stand_id in self._known
+
+    def items(self) -> ItemsView[str, list[ForestOpPayload]]:
+        return _PrefetchingItems(self)
+
+    def values(self) -> ValuesView[list[ForestOpPayload]]:
+        return _PrefetchingValues(self)
+
+    def prefetched(self) -> Iterator[tuple[str, list[ForestOpPayload]]]:
+        """Iterate stand identifiers with their schedules, loading the next stands ahead in a thread pool"""
+        if self.prefetch < 1:
+            yield from ((stand_id, self._loader(stand_id)) for stand_id in self._stand_ids)
+            return
+        with ThreadPoolExecutor(self.prefetch) as executor:
+            stand_ids = iter(self._stand_ids)
+            pending: deque[tuple[str, Future[list[ForestOpPayload]]]] = deque(
+                (stand_id, executor.submit(self._loader, stand_id)) for stand_id in islice(stand_ids, self.prefetch))
+            while pending:
+                stand_id, future = pending.popleft()
+                for next_id in islice(stand_ids, 1):
+                    pending.append((next_id, executor.submit(self._loader, next_id)))
+                yield stand_id, future.result()
+
+
+class _PrefetchingItems(ItemsView[str, list[ForestOpPayload]]):
+    _mapping: LazySimResults
+
+    def __iter__(self) -> Iterator[tuple[str, list[ForestOpPayload]]]:
+        return self._mapping.prefetched()
+
+
+class _PrefetchingValues(ValuesView[list[ForestOpPayload]]):
+    _mapping: LazySimResults
+
+    def __iter__(self) -> Iterator[list[ForestOpPayload]]:
+        return (schedules for _, schedules in self._mapping.prefetched())
+
+
+__all__ = ["LazySimResults"]
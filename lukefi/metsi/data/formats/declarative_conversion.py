@@ -30,6 +30,10 @@ class ConversionMapper():
                 subset.update({k: dconv})
         return subset
 
+    def conversions_for(self, obj: Any) -> dict[str, Conversion]:
+        """ Declared conversions which apply to the given object """
+        return self._filter_declaration_by_instance(obj)
+
     def apply_conversions[T](self, obj: T, source: list[Any]) -> T:
         """ Applies declared conversions with source data and
             adds the mapping result to the given object.
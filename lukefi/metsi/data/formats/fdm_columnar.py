@@ -0,0 +1,215 @@
+""" Columnar binary container for FDM stand data.
+
+A container file holds the reference trees and tree strata of all stands as one array per column, with the rows of
+each stand concatenated in stand order. Offset arrays give the row range of each stand. Stand attributes are stored as
+a table of internal row values in the JSON header. Columns are loaded by memory mapping the file, so that the
+ReferenceTrees and TreeStrata of each stand are read-only views into the file instead of deserialized objects.
+
+Layout: 8 byte magic, little-endian uint64 header length, JSON header, and the column data. Each column starts at a
+64 byte aligned offset from the start of the file.
+"""
+import copy
+import json
+import struct
+from collections.abc import Callable, Container, Iterator, Sequence
+from pathlib import Path
+from typing import Any, Optional, overload
+
+import numpy as np
+import numpy.typing as npt
+
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.io_utils import csv_value
+from lukefi.metsi.data.model import ForestStand, stand_as_internal_row
+from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata, VectorData
+from lukefi.metsi.domain.forestry_types import StandList
+
+MAGIC = b"METSIFDM"
+VERSION = 1
+ALIGNMENT = 64
+
+# constructors of the empty container of each target
+CONTAINERS: dict[str, Callable[[], ReferenceTrees | TreeStrata]] = {
+    "reference_trees": ReferenceTrees,
+    "tree_strata": TreeStrata
+}
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def stand_container(stand: ForestStand, target: str) -> VectorData:
+    """The target data of a stand as a vectorized container, vectorizing entries not yet vectorized"""
+    entries = getattr(stand, f"{target}_pre_vec", [])
+    if len(entries) > 0:
+        container = CONTAINERS[target]()
+        return container.vectorize({name: [getattr(entry, name, None) for entry in entries]
+                                    for name in container.dtypes})
+    return getattr(stand, target)
+
+
+def _columns(containers: list[VectorData], container_type: Callable[[], VectorData]) -> dict[str, npt.NDArray]:
+    empty = container_type()
+    columns = {}
+    for name in empty.dtypes:
+        arrays = [getattr(container, name) for container in containers if container.size > 0]
+        columns[name] = np.ascontiguousarray(np.concatenate(arrays)) if len(arrays) > 0 else getattr(empty, name)
+        if columns[name].dtype.hasobject:
+            raise MetsiException(f"Column '{name}' of {type(empty).__name__} holds Python objects")
+    return columns
+
+
+def write_columnar(filepath: str | Path, stands: StandList):
+    """Write the given stands into a columnar container file"""
+    header: dict[str, Any] = {
+        "version": VERSION,
+        "stands": {
+            "identifier": [str(stand.identifier) for stand in stands],
+            "rows": [[csv_value(value) for value in stand_as_internal_row(stand)] for stand in stands]
+        },
+        "containers": {}
+    }
+    arrays: list[npt.NDArray] = []
+    for target, container_type in CONTAINERS.items():
+        containers = [stand_container(stand, target) for stand in stands]
+        offsets = np.cumsum([0] + [container.size for container in containers], dtype=np.int64)
+        columns = {"offsets": offsets, **_columns(containers, container_type)}
+        header["containers"][target] = {
+            name: {"index": len(arrays) + i, "dtype": column.dtype.str, "shape": list(column.shape)}
+            for i, (name, column) in enumerate(columns.items())
+        }
+        arrays.extend(columns.values())
+
+    # column offsets depend on the header length, which depends on the offsets written into it
+    header["offsets"] = [0] * len(arrays)
+    while True:
+        start = _aligned(len(MAGIC) + 8 + len(json.dumps(header).encode("utf-8")))
+        column_offsets = []
+        for array in arrays:
+            column_offsets.append(start)
+            start = _aligned(start + array.nbytes)
+        if column_offsets == header["offsets"]:
+            break
+        header["offsets"] = column_offsets
+    encoded = json.dumps(header).encode("utf-8")
+
+    with open(filepath, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(encoded)))
+        file.write(encoded)
+        for offset, array in zip(header["offsets"], arrays):
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(array.tobytes())
+        # trailing empty columns are mapped at the aligned end of the file
+        file.write(b"\0" * (_aligned(file.tell()) - file.tell()))
+
+
+def _read_header(filepath: str | Path) -> dict[str, Any]:
+    with open(filepath, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise MetsiException(f"File '{filepath}' is not a columnar FDM container")
+        (length,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(length).decode("utf-8"))
+    if header.get("version") != VERSION:
+        raise MetsiException(f"Unsupported columnar FDM container version '{header.get('version')}' in '{filepath}'")
+    return header
+
+
+class ColumnarStandStore(Sequence[ForestStand]):
+    """Lazy read-only sequence of the stands in a columnar container file. The file is memory mapped on first access
+    and a ForestStand is built only when indexed, with its reference trees and tree strata as read-only views into the
+    mapping. Slicing gives a store of the selected stands. A store is pickled as its file path and stand indices, so
+    that another process opens the file itself instead of receiving the stand data."""
+
+    def __init__(self, filepath: str | Path, indices: Optional[Sequence[int]] = None):
+        self.filepath = filepath
+        self._header = _read_header(filepath)
+        self.indices = range(len(self._header["stands"]["identifier"])) if indices is None else indices
+        self._columns: Optional[dict[str, dict[str, npt.NDArray]]] = None
+
+    def __reduce__(self):
+        return self.__class__, (self.filepath, self.indices)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @overload
+    def __getitem__(self, index: int) -> ForestStand: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ColumnarStandStore": ...
+
+    def __getitem__(self, index: int | slice) -> "ForestStand | ColumnarStandStore":
+        if isinstance(index, slice):
+            store = copy.copy(self)
+            store.indices = self.indices[index]
+            store._columns = self._mapped_columns() if len(store.indices) > 0 else None
+            return store
+        return self._stand(self.indices[index])
+
+    def __iter__(self) -> Iterator[ForestStand]:
+        for index in self.indices:
+            yield self._stand(index)
+
+    @property
+    def identifiers(self) -> list[str]:
+        """Identifiers of the stands of the store, read without building the stands"""
+        return [self._header["stands"]["identifier"][index] for index in self.indices]
+
+    @property
+    def nbytes(self) -> int:
+        """Size in bytes of the tree and stratum data of the stands of the store, summed from the column offsets
+        without building the stands"""
+        if len(self.indices) == 0:
+            return 0
+        indices = np.asarray(self.indices, dtype=np.int64)
+        total = 0
+        for columns in self._mapped_columns().values():
+            offsets = columns["offsets"]
+            rows = int(np.sum(offsets[indices + 1] - offsets[indices]))
+            total += rows * sum(column.dtype.itemsize * int(np.prod(column.shape[1:]))
+                                for name, column in columns.items() if name != "offsets")
+        return total
+
+    def excluding(self, identifiers: Container[str]) -> "ColumnarStandStore":
+        """Store of the stands whose identifier is not among the given ones"""
+        store = copy.copy(self)
+        store.indices = [index for index in self.indices
+                         if self._header["stands"]["identifier"][index] not in identifiers]
+        return store
+
+    def _mapped_columns(self) -> dict[str, dict[str, npt.NDArray]]:
+        if self._columns is None:
+            mapped = np.memmap(self.filepath, dtype=np.uint8, mode="r")
+            self._columns = {
+                target: {
+                    name: np.ndarray(tuple(meta["shape"]), np.dtype(meta["dtype"]), mapped,
+                                     self._header["offsets"][meta["index"]])
+                    for name, meta in self._header["containers"][target].items()
+                }
+                for target in CONTAINERS
+            }
+        return self._columns
+
+    def _stand(self, index: int) -> ForestStand:
+        stand = ForestStand()
+        stand.identifier = self._header["stands"]["identifier"][index]
+        stand.from_row(self._header["stands"]["rows"][index])
+        del stand.reference_trees_pre_vec
+        del stand.tree_strata_pre_vec
+        for target, columns in self._mapped_columns().items():
+            start, end = columns["offsets"][index:index + 2]
+            setattr(stand, target, CONTAINERS[target]().assign({name: column[start:end]
+                                                                for name, column in columns.items()
+                                                                if name != "offsets"}))
+        return stand
+
+
+def read_columnar(filepath: str | Path) -> StandList:
+    """Read all stands from a columnar container file. Reference trees and tree strata are read-only views into the
+    memory mapped file, copied by VectorData only when modified."""
+    return list(ColumnarStandStore(filepath))
+
+
+__all__ = ["write_columnar", "read_columnar", "stand_container", "ColumnarStandStore"]
@@ -0,0 +1,159 @@
+""" Column-wise reading of FDM CSV files into vectorized containers """
+import csv
+import io
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from lukefi.metsi.app.compression import open_file
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata, VectorData
+from lukefi.metsi.domain.forestry_types import StandList
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Decoder(NamedTuple):
+    """Conversion of a CSV column. Numeric columns are parsed by pandas with 'None' as the missing value, which is
+    replaced with the default. Other columns are read as text."""
+    numeric: bool
+    convert: Callable[["pd.Series"], npt.NDArray]
+
+
+def _floats(default: float = np.nan) -> Decoder:
+    return Decoder(True, lambda column: column.fillna(default).to_numpy(np.float64))
+
+
+def _ints(default: int = -1) -> Decoder:
+    return Decoder(True, lambda column: column.fillna(default).to_numpy(np.int64))
+
+
+def _flags() -> Decoder:
+    return Decoder(False, lambda column: (column == "True").to_numpy())
+
+
+def _texts() -> Decoder:
+    return Decoder(False, lambda column: column.mask(column == "None", "").to_numpy(str))
+
+
+# CSV column index and decoder of each attribute, matching ReferenceTree.from_csv_row and TreeStratum.from_csv_row
+# followed by vectorization
+TREE_SCHEMA: dict[str, tuple[int, Decoder]] = {
+    "identifier": (1, _texts()),
+    "species": (2, _ints()),
+    "origin": (3, _ints()),
+    "stems_per_ha": (4, _floats()),
+    "breast_height_diameter": (5, _floats()),
+    "height": (6, _floats()),
+    "measured_height": (7, _floats()),
+    "breast_height_age": (8, _floats()),
+    "biological_age": (9, _floats()),
+    "saw_log_volume_reduction_factor": (10, _floats()),
+    "pruning_year": (11, _ints(0)),
+    "age_when_10cm_diameter_at_breast_height": (12, _ints()),
+    "tree_number": (13, _ints()),
+    "lowest_living_branch_height": (17, _floats()),
+    "management_category": (18, _ints()),
+    "tree_category": (19, _texts()),
+    "sapling": (20, _flags()),
+    "storey": (21, _ints()),
+    "tree_type": (22, _texts()),
+    "tuhon_ilmiasu": (23, _texts()),
+}
+
+STRATUM_SCHEMA: dict[str, tuple[int, Decoder]] = {
+    "identifier": (1, _texts()),
+    "species": (2, _ints()),
+    "origin": (3, _ints()),
+    "stems_per_ha": (4, _floats()),
+    "mean_diameter": (5, _floats()),
+    "mean_height": (6, _floats()),
+    "breast_height_age": (7, _floats()),
+    "biological_age": (8, _floats()),
+    "basal_area": (9, _floats()),
+    "saw_log_volume_reduction_factor": (10, _floats()),
+    "cutting_year": (11, _ints()),
+    "age_when_10cm_diameter_at_breast_height": (12, _ints()),
+    "tree_number": (13, _ints()),
+    "lowest_living_branch_height": (17, _floats()),
+    "management_category": (18, _ints()),
+    "sapling_stems_per_ha": (19, _floats()),
+    "sapling_stratum": (20, _flags()),
+    "storey": (21, _ints()),
+}
+
+# columns of the stand origin relative position, with missing values as 0.0
+POSITION = (14, 15, 16)
+
+# row type, target attribute, container constructor and schema of the row blocks
+BLOCKS: list[tuple[str, str, Callable[[], VectorData], dict[str, tuple[int, Decoder]]]] = [
+    ("tree", "reference_trees", ReferenceTrees, TREE_SCHEMA),
+    ("stratum", "tree_strata", TreeStrata, STRATUM_SCHEMA),
+]
+
+
+def decode_block(lines: list[str], schema: dict[str, tuple[int, Decoder]]) -> dict[str, npt.NDArray]:
+    """Parse CSV rows of a single row type at once and decode each attribute of the schema column-wise"""
+    if len(lines) == 0:
+        return {}
+    # Lazy import of pandas, needed only for vectorized CSV input.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    numeric = [index for index, decoder in schema.values() if decoder.numeric] + list(POSITION)
+    # columns are addressed by their position, as the rows have no header
+    missing: dict[Any, list[str]] = {index: ["None"] for index in numeric}
+    frame = pd.read_csv(
+        io.StringIO("".join(lines)),
+        sep=";",
+        header=None,
+        usecols=[index for index, _ in schema.values()] + list(POSITION),
+        dtype={index: str for index, decoder in schema.values() if not decoder.numeric},
+        na_values=missing,
+        keep_default_na=False)
+    columns = {name: decoder.convert(frame[index]) for name, (index, decoder) in schema.items()}
+    columns["stand_origin_relative_position"] = frame[list(POSITION)].fillna(0.0).to_numpy(np.float64)
+    return columns
+
+
+def read_csv_columnar(filepath: str | Path) -> StandList:
+    """
+    Read stands from an FDM CSV file, decoding the reference tree and tree stratum rows column-wise directly into
+    ReferenceTrees and TreeStrata. Stand rows are read as with csv_content_to_stands. The resulting stands are
+    vectorized and have no per-row reference tree or tree stratum objects.
+
+    :param filepath: path of the CSV file
+    :return: list of vectorized ForestStands
+    """
+    stands: list[ForestStand] = []
+    lines: dict[str, list[str]] = {kind: [] for kind, *_ in BLOCKS}
+    counts: dict[str, list[int]] = {kind: [] for kind, *_ in BLOCKS}
+    with open_file(filepath, "r", encoding="utf-8", newline="") as file:
+        for line in file:
+            kind = line[:line.find(";")]
+            if kind == "stand":
+                stands.append(ForestStand.from_csv_row(next(csv.reader([line], delimiter=";"))))
+                for block_counts in counts.values():
+                    block_counts.append(0)
+            elif kind in lines:
+                if len(stands) == 0:
+                    raise MetsiException(f"Row of type '{kind}' before any stand row in '{filepath}'")
+                lines[kind].append(line)
+                counts[kind][-1] += 1
+
+    for kind, target, container_type, schema in BLOCKS:
+        columns = decode_block(lines[kind], schema)
+        offsets = np.cumsum([0] + counts[kind])
+        for stand, start, end in zip(stands, offsets[:-1], offsets[1:]):
+            setattr(stand, target, container_type().assign({name: column[start:end]
+                                                            for name, column in columns.items()}))
+    for stand in stands:
+        del stand.reference_trees_pre_vec
+        del stand.tree_strata_pre_vec
+    return stands
+
+
+__all__ = ["read_csv_columnar", "decode_block"]
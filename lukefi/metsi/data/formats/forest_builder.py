@@ -1,10 +1,21 @@
-from collections.abc import Sequence, Iterable
+import contextlib
+import heapq
+import io
+import itertools
+import json
+import os
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from collections.abc import Sequence, Iterable, Iterator
 from abc import ABC, abstractmethod
-from typing import overload
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Optional, overload
 import xml.etree.ElementTree as ET
-from pandas import DataFrame, Series
 
 from lukefi.metsi.app.console_logging import print_logline
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.data.enums.internal import OwnerCategory
 from lukefi.metsi.data.formats.vmi_const import (
     VMI12_STAND_INDICES,
@@ -15,11 +26,15 @@ from lukefi.metsi.data.formats.vmi_const import (
     VMI13_TREE_INDICES
 )
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
+from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata
 from lukefi.metsi.data.conversion import vmi2internal, fc2internal
-from lukefi.metsi.data.formats import smk_util, util, vmi_util, gpkg_util
+from lukefi.metsi.data.formats import smk_util, util, vmi_util, vmi_columnar
 from lukefi.metsi.data.formats.declarative_conversion import ConversionMapper
 from lukefi.metsi.domain.forestry_types import StandList
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 
 class ForestBuilder(ABC):
     """Abstract base class of forest builders"""
@@ -29,9 +44,63 @@ class ForestBuilder(ABC):
         ...
 
 
+@dataclass
+class DecodedVMIRows:
+    """Decoded VMI source rows with reference trees and tree strata grouped by stand identifier, either as lists of
+    entries or as vectorized containers"""
+    stands: list[ForestStand]
+    tree_strata: dict[str, list[TreeStratum] | TreeStrata] = field(default_factory=dict)
+    reference_trees: dict[str, list[ReferenceTree] | ReferenceTrees] = field(default_factory=dict)
+
+
+def vmi_chunk_ranges(path: str | Path, chunks: int) -> list[tuple[int, int]]:
+    """Split a VMI source file into at most the given number of byte ranges of about equal size, each ending at a
+    row boundary"""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as source:
+        for i in range(1, chunks):
+            offset = i * size // chunks
+            if offset <= boundaries[-1]:
+                continue
+            source.seek(offset - 1)
+            source.readline()
+            if source.tell() >= size:
+                break
+            boundaries.append(source.tell())
+    return list(zip(boundaries, boundaries[1:] + [size]))
+
+
+def vmi_chunk_rows(path: str | Path, start: int, end: int) -> Iterator[str]:
+    """Raw source rows of a byte range of a VMI source file, as they would be read line by line from the file"""
+    with open(path, 'rb') as source:
+        source.seek(start)
+        text = source.read(end - start).decode('utf-8')
+    yield from io.StringIO(text, newline=None)
+
+
+_CHUNK_BUILDER: Optional["VMIBuilder"] = None
+
+
+def _set_chunk_builder(builder: "VMIBuilder"):
+    global _CHUNK_BUILDER  # pylint: disable=global-statement
+    _CHUNK_BUILDER = builder
+
+
+def _decode_vmi_chunk(path: str | Path, start: int, end: int) -> DecodedVMIRows:
+    """Decode the rows of a byte range of a VMI source file with the builder set for the worker process"""
+    if _CHUNK_BUILDER is None:
+        raise MetsiException("VMI chunk builder is not set")
+    return _CHUNK_BUILDER.decode_chunk(path, start, end)
+
+
 class VMIBuilder(ForestBuilder):
     """Shared functionality of VMI* builders"""
 
+    stand_indices: dict
+    stratum_indices: dict
+    tree_indices: dict
+
     def __init__(self, builder_flags: dict, declared_conversions: dict, data_rows: Iterable):
         """
         Initialize instance variable lists for forest stands, reference trees and tree strata.
@@ -48,18 +117,285 @@ class VMIBuilder(ForestBuilder):
         self.conversion_reader = ConversionMapper(declared_conversions)
 
         for row in data_rows:
+            row_type = self._addressable_row_type(row)
+            if row_type == 1:
+                self.forest_stands.append(row)
+            elif row_type == 2:
+                self.tree_strata.append(row)
+            elif row_type == 3:
+                self.reference_trees.append(row)
+
+    def _addressable_row_type(self, row) -> Optional[int]:
+        """Return the data type of the row, or None with a warning if the row is not addressable"""
+        try:
+            return self.find_row_type(row)
+        except (IndexError, TypeError) as e:
+            print(e)
+            print('warning: VMI row not addressable: ')
+            print('    ' + str(row))
+            return None
+
+    def parse_row(self, raw: str):
+        """Prepare a raw source row for addressing with the builder's indices"""
+        return raw
+
+    def uses_columnar_decoding(self, entry: ReferenceTree | TreeStratum) -> bool:
+        """Reference trees and tree strata are decoded column-wise directly into vectorized containers when the
+        'vectorized' builder flag is set and no declared conversions apply to their type"""
+        return bool(self.builder_flags.get('vectorized')) and \
+            len(self.conversion_reader.conversions_for(entry)) == 0
+
+    def build_stands(self,
+                     stand_rows: Sequence,
+                     strata_rows: Sequence,
+                     tree_rows: Sequence,
+                     stand_ids: Optional[Iterable[int]] = None) -> StandList:
+        """Populate a list of ForestStand with associated reference tree and tree stratum entries out of parsed source
+        rows of types 1, 2 and 3. With the 'vectorized' builder flag, reference trees and tree strata are decoded
+        column-wise into ReferenceTrees and TreeStrata.
+
+        :param stand_rows: type 1 rows
+        :param strata_rows: type 2 rows
+        :param tree_rows: type 3 rows
+        :param stand_ids: order numbers for the stand rows, by default their positions counting from 1
+        :raises MetsiException: if a tree or stratum row refers to a stand missing from the stand rows
+        :return: list of ForestStands in stand row order
+        """
+        return self.assemble_stands([self.decode_rows(stand_rows, strata_rows, tree_rows)], stand_ids)
+
+    def decode_rows(self, stand_rows: Sequence, strata_rows: Sequence, tree_rows: Sequence) -> DecodedVMIRows:
+        """Decode parsed source rows of types 1, 2 and 3 without associating the entries to stands"""
+        result = DecodedVMIRows([self.convert_stand_entry(self.stand_indices, row) for row in stand_rows])
+        if self.builder_flags['strata']:
+            if self.uses_columnar_decoding(TreeStratum()):
+                identifiers, columns = vmi_columnar.decode_tree_strata(strata_rows, self.stratum_indices)
+                result.tree_strata.update(vmi_columnar.split_by_stand(identifiers, columns, TreeStrata))
+            else:
+                strata: dict[str, list[TreeStratum]] = {}
+                for row in strata_rows:
+                    stand_identifier = vmi_util.generate_stand_identifier(row, self.stand_indices)
+                    strata.setdefault(stand_identifier, []).append(
+                        self.convert_stratum_entry(self.stratum_indices, row))
+                result.tree_strata.update(strata)
+        if self.builder_flags['measured_trees']:
+            if self.uses_columnar_decoding(ReferenceTree()):
+                identifiers, columns = vmi_columnar.decode_reference_trees(
+                    tree_rows, self.tree_indices, isinstance(self, VMI12Builder))
+                result.reference_trees.update(vmi_columnar.split_by_stand(identifiers, columns, ReferenceTrees))
+            else:
+                trees: dict[str, list[ReferenceTree]] = {}
+                for row in tree_rows:
+                    stand_identifier = vmi_util.generate_stand_identifier(row, self.stand_indices)
+                    trees.setdefault(stand_identifier, []).append(
+                        self.convert_tree_entry(self.tree_indices, row))
+                result.reference_trees.update(trees)
+        return result
+
+    def assemble_stands(self, parts: Iterable[DecodedVMIRows], stand_ids: Optional[Iterable[int]] = None) -> StandList:
+        """Associate decoded reference trees and tree strata to their stands. Entries of a single stand may be spread
+        over several parts, in which case they are joined in part order.
+
+        :param parts: decoded source rows in source order
+        :param stand_ids: order numbers for the stands, by default their positions counting from 1
+        :raises MetsiException: if an entry refers to a stand missing from all parts
+        :return: list of ForestStands in stand order
+        """
+        ids = iter(stand_ids) if stand_ids is not None else itertools.count(1)
+        result: dict[str, ForestStand] = {}
+        strata: dict[str, list] = {}
+        trees: dict[str, list] = {}
+        for part in parts:
+            for stand in part.stands:
+                stand.set_identifiers(next(ids))
+                result[stand.identifier] = stand
+            for stand_identifier, stand_strata in part.tree_strata.items():
+                strata.setdefault(stand_identifier, []).append(stand_strata)
+            for stand_identifier, stand_trees in part.reference_trees.items():
+                trees.setdefault(stand_identifier, []).append(stand_trees)
+        if self.builder_flags['strata']:
+            self._attach(result, "tree_strata", strata, self.uses_columnar_decoding(TreeStratum()))
+        if self.builder_flags['measured_trees']:
+            self._attach(result, "reference_trees", trees, self.uses_columnar_decoding(ReferenceTree()))
+        return list(result.values())
+
+    def _attach(self, stands: dict[str, ForestStand], target: str, entries: dict[str, list], columnar: bool):
+        """Set the entries of each stand as its target data. Vectorized containers replace the lists of
+        pre-vectorized entries, stands without entries getting empty containers."""
+        for stand_identifier in entries:
+            if stand_identifier not in stands:
+                raise MetsiException(f"VMI stand row missing for stand '{stand_identifier}'")
+        for stand_identifier, stand in stands.items():
+            parts = entries.get(stand_identifier, [])
+            if columnar:
+                setattr(stand, target, vmi_columnar.concatenate(parts, type(getattr(stand, target))))
+                if hasattr(stand, f"{target}_pre_vec"):
+                    delattr(stand, f"{target}_pre_vec")
+            else:
+                pre_vec = getattr(stand, f"{target}_pre_vec")
+                for part in parts:
+                    for entry in part:
+                        entry.stand = stand
+                        pre_vec.append(entry)
+
+    def build_parallel(self, path: str | Path, workers: Optional[int] = None) -> StandList:
+        """Build ForestStands from a VMI source file in parallel. The file is split into chunks at row boundaries and
+        the chunks are decoded in a process pool. Reference trees and tree strata of a stand found in several chunks
+        are joined in source order, so that the result equals build over the whole file.
+
+        :param path: path of the VMI source file
+        :param workers: number of worker processes, by default the number of CPUs
+        :return: list of ForestStands in stand order
+        """
+        workers = workers or os.cpu_count() or 1
+        ranges = vmi_chunk_ranges(path, workers * 4)
+        if workers == 1 or len(ranges) == 1:
+            return self.assemble_stands(self.decode_chunk(path, start, end) for start, end in ranges)
+        with ProcessPoolExecutor(workers, initializer=_set_chunk_builder, initargs=(self,)) as executor:
+            return self.assemble_stands(executor.map(_decode_vmi_chunk,
+                                                     itertools.repeat(path),
+                                                     [start for start, _ in ranges],
+                                                     [end for _, end in ranges]))
+
+    def decode_chunk(self, path: str | Path, start: int, end: int) -> DecodedVMIRows:
+        """Decode the rows of a byte range of a VMI source file"""
+        rows_by_type: dict[int, list] = {1: [], 2: [], 3: []}
+        for raw in vmi_chunk_rows(path, start, end):
+            row = self.parse_row(raw)
+            row_type = self._addressable_row_type(row)
+            if row_type in rows_by_type:
+                rows_by_type[row_type].append(row)
+        return self.decode_rows(rows_by_type[1], rows_by_type[2], rows_by_type[3])
+
+    def build_stand(self, rows: list, stand_id: int) -> ForestStand:
+        """Create a ForestStand with its reference trees and tree strata out of all parsed source rows of a single
+        stand"""
+        return self._build_groups([rows], [stand_id])[0]
+
+    def _build_groups(self, groups: list[list], stand_ids: list[int]) -> StandList:
+        """Build the stands of the given groups of parsed source rows. Each group holds all rows of a single stand."""
+        rows_by_type: dict[int, list] = {1: [], 2: [], 3: []}
+        for group in groups:
+            for row in group:
+                rows_by_type.get(self.find_row_type(row), []).append(row)
+        stands = self.build_stands(rows_by_type[1], rows_by_type[2], rows_by_type[3], stand_ids)
+        if len(stands) < len(groups):
+            identifiers = {stand.identifier for stand in stands}
+            for group in groups:
+                stand_identifier = vmi_util.generate_stand_identifier(group[0], self.stand_indices)
+                if stand_identifier not in identifiers:
+                    raise MetsiException(f"VMI stand row missing for stand '{stand_identifier}'")
+        return stands
+
+    def _keyed_rows(self, data_rows: Iterable[str]) -> Iterator[tuple[str, int, object, str]]:
+        """Parse raw source rows lazily into tuples of stand identifier, row type, parsed row and raw row. Rows which
+        are not addressable are skipped with a warning."""
+        for raw in data_rows:
+            row = self.parse_row(raw)
+            row_type = self._addressable_row_type(row)
+            if row_type is None:
+                continue
+            yield vmi_util.generate_stand_identifier(row, self.stand_indices), row_type, row, raw
+
+    def stream(self, data_rows: Iterable[str], chunk_rows: int = 10000) -> Iterator[ForestStand]:
+        """Lazily build ForestStands from raw source rows in which the rows of each stand are contiguous. Stands are
+        built in chunks of whole stands of about the given number of rows, so that only the rows of a single chunk are
+        held in memory at a time. Stands are yielded in source order and numbered as in build.
+
+        :param data_rows: Iterable raw data rows from a VMI source file, grouped by stand
+        :param chunk_rows: number of source rows after which the stands read so far are built
+        :raises MetsiException: if the rows of a stand are not contiguous
+        :return: iterator of ForestStands
+        """
+        completed: set[str] = set()
+        current: Optional[str] = None
+        groups: list[list] = []
+        stand_ids: list[int] = []
+        chunk_size = 0
+        stand_id = 0
+        for stand_identifier, row_type, row, _ in self._keyed_rows(data_rows):
+            if stand_identifier != current:
+                if chunk_size >= chunk_rows:
+                    yield from self._build_groups(groups, stand_ids)
+                    groups, stand_ids, chunk_size = [], [], 0
+                if stand_identifier in completed:
+                    raise MetsiException(f"VMI source rows of stand '{stand_identifier}' are not contiguous")
+                completed.add(stand_identifier)
+                current = stand_identifier
+                groups.append([])
+            if row_type == 1:
+                stand_id += 1
+                stand_ids.append(stand_id)
+            groups[-1].append(row)
+            chunk_size += 1
+        if len(groups) > 0:
+            yield from self._build_groups(groups, stand_ids)
+
+    def stream_spilled(self,
+                       data_rows: Iterable[str],
+                       buckets: int = 64,
+                       directory: Optional[str | Path] = None) -> Iterator[ForestStand]:
+        """Lazily build ForestStands from raw source rows in any order, reading the rows only once. Rows are spilled
+        into temporary bucket files by stand identifier, after which stands are built holding only a part of the rows
+        in memory. If the rows of each stand were contiguous, the buckets are merged back into source order and built
+        in chunks as in stream. Otherwise stands are built one bucket at a time, yielded in source order within each
+        bucket. Stands are numbered as in build.
+
+        :param data_rows: Iterable raw data rows from a VMI source file
+        :param buckets: number of temporary bucket files
+        :param directory: optional parent directory for the temporary files
+        :return: iterator of ForestStands
+        """
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            paths = [Path(tmp, f"bucket_{i}.jsonl") for i in range(buckets)]
+            bucket_files = [open(path, 'w', encoding='utf-8') for path in paths]  # pylint: disable=consider-using-with
             try:
+                grouped = True
+                completed: set[str] = set()
+                current: Optional[str] = None
+                stand_id = 0
+                for stand_identifier, row_type, _, raw in self._keyed_rows(data_rows):
+                    if stand_identifier != current:
+                        grouped = grouped and stand_identifier not in completed
+                        completed.add(stand_identifier)
+                        current = stand_identifier
+                    if row_type == 1:
+                        stand_id += 1
+                    bucket = zlib.crc32(stand_identifier.encode()) % buckets
+                    entry = [len(completed), stand_id if row_type == 1 else 0, raw]
+                    bucket_files[bucket].write(json.dumps(entry) + "\n")
+            finally:
+                for bucket_file in bucket_files:
+                    bucket_file.close()
+            if grouped:
+                yield from self._stream_merged(paths)
+            else:
+                for path in paths:
+                    yield from self._build_bucket(path)
+
+    def _stream_merged(self, paths: list[Path]) -> Iterator[ForestStand]:
+        """Stream the stands of bucket files of contiguous stands in source order"""
+        with contextlib.ExitStack() as stack:
+            bucket_files = [stack.enter_context(open(path, 'r', encoding='utf-8')) for path in paths]
+            entries = heapq.merge(*(map(json.loads, bucket_file) for bucket_file in bucket_files),
+                                  key=lambda entry: entry[0])
+            yield from self.stream(raw for _, _, raw in entries)
+
+    def _build_bucket(self, path: Path) -> StandList:
+        """Build the stands of a single bucket file"""
+        stand_rows: list[tuple[int, object]] = []
+        rows_by_type: dict[int, list] = {2: [], 3: []}
+        with open(path, 'r', encoding='utf-8') as bucket_file:
+            for line in bucket_file:
+                _, row_stand_id, raw = json.loads(line)
+                row = self.parse_row(raw)
                 row_type = self.find_row_type(row)
                 if row_type == 1:
-                    self.forest_stands.append(row)
-                elif row_type == 2:
-                    self.tree_strata.append(row)
-                elif row_type == 3:
-                    self.reference_trees.append(row)
-            except (IndexError, TypeError) as e:
-                print(e)
-                print('warning: VMI row not addressable: ')
-                print('    ' + str(row))
+                    stand_rows.append((row_stand_id, row))
+                elif row_type in rows_by_type:
+                    rows_by_type[row_type].append(row)
+        stand_rows.sort(key=lambda item: item[0])
+        return self.build_stands([row for _, row in stand_rows], rows_by_type[2], rows_by_type[3],
+                                 [row_stand_id for row_stand_id, _ in stand_rows])
 
     @overload
     def convert_stand_entry(self, indices: dict[str, int],
@@ -188,6 +524,10 @@ class VMIBuilder(ForestBuilder):
 class VMI12Builder(VMIBuilder):
     """VMI12 specific builder implementation"""
 
+    stand_indices = VMI12_STAND_INDICES
+    stratum_indices = VMI12_STRATUM_INDICES
+    tree_indices = VMI12_TREE_INDICES
+
     def __init__(self,
                  builder_flags: dict,
                  declared_conversions: dict,
@@ -266,32 +606,16 @@ class VMI12Builder(VMIBuilder):
         Returns:
         StandList:populated and parsed VMI12 forest stands with reference trees and tree strata
         """
-        result: dict[str, ForestStand] = {}
-        for i, row in enumerate(self.forest_stands):
-            stand = self.convert_stand_entry(VMI12_STAND_INDICES, row, i + 1)
-            result[stand.identifier] = stand
-        if self.builder_flags['strata']:
-            for i, row in enumerate(self.tree_strata):
-                stratum = self.convert_stratum_entry(VMI12_STRATUM_INDICES, row)
-                stand_id = vmi_util.generate_stand_identifier(row, VMI12_STAND_INDICES)
-                stand = result[stand_id]
-                stratum.stand = stand
-                stand.tree_strata_pre_vec.append(stratum)
-
-        if self.builder_flags['measured_trees']:
-            for i, row in enumerate(self.reference_trees):
-                tree = self.convert_tree_entry(VMI12_TREE_INDICES, row)
-                stand_id = vmi_util.generate_stand_identifier(row, VMI12_STAND_INDICES)
-                stand = result[stand_id]
-                tree.stand = stand
-                stand.reference_trees_pre_vec.append(tree)
-
-        return list(result.values())
+        return self.build_stands(self.forest_stands, self.tree_strata, self.reference_trees)
 
 
 class VMI13Builder(VMIBuilder):
     """VMI13 specific builder implementation"""
 
+    stand_indices = VMI13_STAND_INDICES
+    stratum_indices = VMI13_STRATUM_INDICES
+    tree_indices = VMI13_TREE_INDICES
+
     def __init__(self,
                  builder_flags: dict,
                  declared_conversions: dict,
@@ -305,6 +629,9 @@ class VMI13Builder(VMIBuilder):
         """Return VMI13 data type of the row"""
         return int(row[0])
 
+    def parse_row(self, raw: str):
+        return raw.split()
+
     def convert_stand_entry(self, indices, data_row, stand_id: int | None = None) -> ForestStand:
         """Create a ForestStand out of given VMI13 type 1 data row using given data indices and order number"""
         # Fixed conversions
@@ -372,28 +699,7 @@ class VMI13Builder(VMIBuilder):
         Returns:
         StandList:populated and parsed VMI13 forest stands with reference trees and tree strata
         """
-        result: dict[str, ForestStand] = {}
-        for i, row in enumerate(self.forest_stands):
-            stand = self.convert_stand_entry(VMI13_STAND_INDICES, row, i + 1)
-            result[stand.identifier] = stand
-
-        if self.builder_flags['strata']:
-            for i, row in enumerate(self.tree_strata):
-                stratum = self.convert_stratum_entry(VMI13_STRATUM_INDICES, row)
-                stand_id = vmi_util.generate_stand_identifier(row, VMI13_STAND_INDICES)
-                stand = result[stand_id]
-                stratum.stand = stand
-                stand.tree_strata_pre_vec.append(stratum)
-
-        if self.builder_flags['measured_trees']:
-            for i, row in enumerate(self.reference_trees):
-                tree = self.convert_tree_entry(VMI13_TREE_INDICES, row)
-                stand_id = vmi_util.generate_stand_identifier(row, VMI13_STAND_INDICES)
-                stand = result[stand_id]
-                tree.stand = stand
-                stand.reference_trees_pre_vec.append(tree)
-
-        return list(result.values())
+        return self.build_stands(self.forest_stands, self.tree_strata, self.reference_trees)
 
 
 class ForestCentreBuilder(ForestBuilder):
@@ -417,8 +723,13 @@ class XMLBuilder(ForestCentreBuilder):
     xpath_strata = './ts:TreeStandData/ts:TreeStandDataDate[@type="{}"]/tst:TreeStrata/tst:TreeStratum'
     xpath_stand = "st:Stands/st:Stand"
 
-    def __init__(self, builder_flags: dict, declared_conversions: dict, data: str):
-        self.root: ET.Element = ET.fromstring(data)
+    def __init__(self, builder_flags: dict, declared_conversions: dict, data: Optional[str] = None):
+        """
+        :param builder_flags: building process spesific flags
+        :param declared_conversions: callable data extractor
+        :param data: XML source document for build, not needed for stream
+        """
+        self.root: Optional[ET.Element] = ET.fromstring(data) if data is not None else None
         self.builder_flags = builder_flags
         self.xpath_strata = self.xpath_strata.format(builder_flags['strata_origin'].value)
         self.declared_conversions = declared_conversions  # NOTE: not in use
@@ -518,39 +829,65 @@ class XMLBuilder(ForestCentreBuilder):
         stratum.storey = fc2internal.convert_storey(stratum_data.Storey)
         return stratum
 
+    def build_stand(self, estand: ET.Element) -> ForestStand:
+        """Create a ForestStand with its tree strata out of a Stand element"""
+        stand = self.convert_stand_entry(estand)
+        strata = []
+        estrata = estand.findall(self.xpath_strata, smk_util.NS)
+        for estratum in estrata:
+            stratum = self.convert_stratum_entry(estratum)
+            stratum.identifier = f"{stand.identifier}.{stratum.tree_number or stratum.identifier}-stratum"
+            stratum.stand = stand
+            strata.append(stratum)
+        stand.tree_strata_pre_vec = strata
+        stand.basal_area = smk_util.calculate_stand_basal_area(stand.tree_strata_pre_vec)
+        return stand
+
     def build(self) -> StandList:
-        stands = []
+        if self.root is None:
+            raise MetsiException("XML source document not given for building")
         estands = self.root.findall(self.xpath_stand, smk_util.NS)
-        for estand in estands:
-            stand = self.convert_stand_entry(estand)
-            strata = []
-            estrata = estand.findall(self.xpath_strata, smk_util.NS)
-            for estratum in estrata:
-                stratum = self.convert_stratum_entry(estratum)
-                stratum.identifier = f"{stand.identifier}.{stratum.tree_number or stratum.identifier}-stratum"
-                stratum.stand = stand
-                strata.append(stratum)
-            stand.tree_strata_pre_vec = strata
-            stand.basal_area = smk_util.calculate_stand_basal_area(stand.tree_strata_pre_vec)
-            stands.append(stand)
-        return stands
+        return [self.build_stand(estand) for estand in estands]
+
+    def stream(self, source: str | Path | IO[bytes]) -> Iterator[ForestStand]:
+        """Lazily build ForestStands from an XML source file. The document is parsed incrementally, and each Stand
+        element is built and then discarded as soon as it is complete, so that memory use does not depend on the
+        number of stands in the file.
+
+        :param source: path or binary file object of the XML source document
+        :return: iterator of ForestStands in document order
+        """
+        stands_tag = f"{{{smk_util.NS['st']}}}Stands"
+        stand_tag = f"{{{smk_util.NS['st']}}}Stand"
+        path: list[ET.Element] = []
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                path.append(element)
+                continue
+            path.pop()
+            if element.tag == stand_tag and len(path) == 2 and path[1].tag == stands_tag:
+                yield self.build_stand(element)
+                path[1].remove(element)
 
 
 class GeoPackageBuilder(ForestCentreBuilder):
     """ ForestBuilder for geopackage format spesification """
-    stands: DataFrame
-    strata: DataFrame
+    stands: "DataFrame"
+    strata: "DataFrame"
     type_value = None
 
     def __init__(self, builder_flags: dict, declared_conversions: dict, db_path: str):
         """ Reads Geopackage format into pandas dataframe representing stands and strata """
+        # Lazy import of GeoPackage reading, pulling in pandas, geopandas and shapely.
+        from lukefi.metsi.data.formats import gpkg_util  # pylint: disable=import-outside-toplevel
         self.type_value = builder_flags['strata_origin'].value
         (self.stands,
          self.strata) = gpkg_util.read_geopackage(db_path, self.type_value)
         self.declared_conversions = declared_conversions  # NOTE: not in use
 
-    def convert_stand_entry(self, entry: Series) -> ForestStand:
-        """ Converts a single pandas Series object into a ForestStand object
+    def convert_stand_entry(self, entry: Any) -> ForestStand:
+        """ Converts a single stand row, as a pandas Series object or a named tuple of DataFrame.itertuples, into a
+        ForestStand object. Columns are read as attributes of the row.
         :return: ForestStand object
         """
         stand = ForestStand()
@@ -590,8 +927,9 @@ class GeoPackageBuilder(ForestCentreBuilder):
         # RST record 33 and 34 unused
         return stand
 
-    def convert_stratum_entry(self, entry: Series) -> TreeStratum:
-        """ Converts a single pandas Series object into a TreeStratum object
+    def convert_stratum_entry(self, entry: Any) -> TreeStratum:
+        """ Converts a single stratum row, as a pandas Series object or a named tuple of DataFrame.itertuples, into a
+        TreeStratum object. Columns are read as attributes of the row.
         :return: TreeStratum object
         """
         stratum = TreeStratum()
@@ -610,15 +948,14 @@ class GeoPackageBuilder(ForestCentreBuilder):
         """ Converts geopackage into list of ForestStand objects.
         :return: List of ForestStand objects
         """
+        strata_rows = list(self.strata.itertuples(index=False))
+        strata_by_stand = self.strata.groupby('standid', sort=False).indices
         stands = []
-        for _, rowi in self.stands.iterrows():
-            # for each stand row
-            stand = self.convert_stand_entry(rowi)
+        for entry in self.stands.itertuples(index=False):
+            stand = self.convert_stand_entry(entry)
             strata = []
-            i_strata = self.strata[self.strata['standid'] == stand.identifier]
-            for _, rowj in i_strata.iterrows():
-                # for each strata row
-                stratum = self.convert_stratum_entry(rowj)
+            for i in strata_by_stand.get(stand.identifier, ()):
+                stratum = self.convert_stratum_entry(strata_rows[i])
                 stratum.stand = stand
                 strata.append(stratum)
             stand.tree_strata_pre_vec = strata
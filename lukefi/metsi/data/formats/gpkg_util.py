@@ -1,9 +1,13 @@
+from collections.abc import Sequence
 from typing import Any, TypedDict
 import sqlite3
 import pandas as pd
 import geopandas
+import shapely
 from shapely.geometry.polygon import Polygon
 import numpy as np
+import numpy.typing as npt
+from lukefi.metsi.app.utils import MetsiException
 
 
 def _read_stand_geometry(path: str) -> geopandas.GeoDataFrame:
@@ -13,10 +17,50 @@ def _read_stand_geometry(path: str) -> geopandas.GeoDataFrame:
     using geopandas to read geometry information is that it is 100-times slower than pure SQL request.
     In other words the reading the geometry from source could be optimized,
     but now (24.8.2023) a very little need for this was seen.
+
+    See _read_stand_centroids for reading stand locations without geopandas.
     '''
     return geopandas.read_file(path, layer="stand")
 
 
+# GeoPackage binary header envelope sizes in bytes by envelope contents indicator
+_ENVELOPE_SIZES = (0, 32, 48, 48, 64)
+
+
+def _gpkg_wkb(blob: bytes) -> bytes:
+    """ Strips the GeoPackage binary header from a geometry blob, leaving the standard WKB geometry """
+    envelope = (blob[3] >> 1) & 0b111
+    return blob[8 + _ENVELOPE_SIZES[envelope]:]
+
+
+def _read_stand_centroids(conn: sqlite3.Connection) -> pd.Series:
+    """ Reads the centroids of stand geometries with plain SQLite. Geometry blobs are decoded and their centroids
+    computed with shapely in a single vectorized pass.
+    :returns: Series of Centroid indexed by standid
+    """
+    column, srs_id = conn.execute(
+        "SELECT column_name, srs_id FROM gpkg_geometry_columns WHERE table_name='stand'").fetchone()
+    organization, coordsys_id = conn.execute(
+        "SELECT organization, organization_coordsys_id FROM gpkg_spatial_ref_sys WHERE srs_id=?", (srs_id,)).fetchone()
+    rows = conn.execute(f"SELECT standid, {column} FROM stand WHERE {column} IS NOT NULL").fetchall()
+    geometries = shapely.from_wkb([_gpkg_wkb(blob) for _, blob in rows])
+    return _stand_centroids([sid for sid, _ in rows], geometries, f"{organization}:{coordsys_id}")
+
+
+def _stand_centroids(standids: Sequence, geometries: npt.ArrayLike, crs: str) -> pd.Series:
+    """ Computes the centroids of stand geometries at once
+    :returns: Series of Centroid indexed by standid
+    """
+    centroids = shapely.centroid(np.asarray(geometries))
+    longitudes = np.round(shapely.get_x(centroids), 2).tolist()
+    latitudes = np.round(shapely.get_y(centroids), 2).tolist()
+    crs = crs.upper()
+    return pd.Series(
+        [{"centroid": (longitude, latitude), "crs": crs} for longitude, latitude in zip(longitudes, latitudes)],
+        index=pd.Index(standids, name='standid'),
+        dtype=object)
+
+
 def _read_from_gpkg(query, conn) -> pd.DataFrame:
     """ Extecutes sql query for connection to SQLite db """
     return pd.read_sql_query(query, conn)
@@ -40,14 +84,17 @@ def _extract_centroid(geometry: Polygon) -> Centroid:
     return {"centroid": (longitude, latitude), "crs": getattr(cid, "crs").srs.upper()}
 
 
-def _attach_location(df: pd.DataFrame, gdf: geopandas.GeoDataFrame) -> pd.DataFrame:
-    """ Inserts into df the centroid information from gdf """
-    centroids = []
-    for sid in df['standid']:
-        stand_geometry = gdf[gdf['standid'] == sid]
-        cid = _extract_centroid(stand_geometry['geometry'])
-        centroids.append(cid)
-    df.insert(0, 'centroid', centroids)
+def _attach_location(df: pd.DataFrame, gdf: geopandas.GeoDataFrame | pd.Series) -> pd.DataFrame:
+    """ Inserts into df the centroid information from gdf, or from a Series of Centroid indexed by standid """
+    if isinstance(gdf, geopandas.GeoDataFrame):
+        if gdf.crs is None:
+            raise MetsiException("Stand geometry has no coordinate reference system")
+        gdf = _stand_centroids(gdf['standid'].tolist(), gdf.geometry.values, gdf.crs.srs)
+    centroids = gdf[~gdf.index.duplicated(keep='first')]
+    located = df['standid'].isin(centroids.index)
+    if not located.all():
+        raise MetsiException(f"Stand geometry missing for stands {df['standid'][~located].tolist()}")
+    df.insert(0, 'centroid', centroids.reindex(df['standid']).tolist())
     return df
 
 
@@ -95,9 +142,9 @@ def read_geopackage(path: str, type_value: int = 1) -> tuple[pd.DataFrame, pd.Da
     conn = sqlite3.connect(path)
     stands = _read_from_gpkg(stands_query, conn)
     strata = _read_from_gpkg(strata_query, conn)
+    stand_centroids = _read_stand_centroids(conn)
     conn.close()
-    stand_geometries = _read_stand_geometry(path)
-    stands = _attach_location(stands, stand_geometries)
+    stands = _attach_location(stands, stand_centroids)
     stands = _replace_nan(stands)
     strata = _replace_nan(strata)
     return (stands, strata)
@@ -1,6 +1,9 @@
-from itertools import chain
+from itertools import batched, chain, repeat
 from typing import Any, Optional
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+
+import numpy as np
+import numpy.typing as npt
 
 from lukefi.metsi.app.app_types import ExportableContainer
 from lukefi.metsi.data.formats.util import parse_float
@@ -13,6 +16,9 @@ from lukefi.metsi.data.model import (
 from lukefi.metsi.data.formats.rst_const import MSBInitialDataRecordConst as msb_meta
 from lukefi.metsi.domain.forestry_types import StandList
 
+# number of stands whose reference tree and tree stratum rows are formatted at once
+FORMAT_BATCH_SIZE = 1000
+
 
 def rst_float(source: str | int | float | None) -> str:
     if source is not None:
@@ -73,8 +79,8 @@ def c_var_rst_row(stand: ForestStand, cvar_decl: list[str]) -> str:
     return cvars_row
 
 
-def rst_forest_stand_rows(stand: ForestStand, additional_vars: list[str]) -> list[str]:
-    """Generate RST data file rows (with MSB metadata) for a single ForestStand"""
+def rst_stand_rows(stand: ForestStand, additional_vars: list[str]) -> list[str]:
+    """Generate the C-variable and forest stand RST rows (with MSB metadata) for a single ForestStand"""
     result = []
     # Additional variables (C-variables) row
     if additional_vars:
@@ -87,40 +93,84 @@ def rst_forest_stand_rows(stand: ForestStand, additional_vars: list[str]) -> lis
         map(rst_float, stand_as_rst_row(stand)),
         msb_preliminary_records[2]
     )))
-    # Reference tree row(s)
-    for i in range(stand.reference_trees.size):
-        result.append(" ".join(map(rst_float, stand.reference_trees.as_rst_row(i))))
     return result
 
 
+def rst_forest_stand_rows(stand: ForestStand, additional_vars: list[str]) -> list[str]:
+    """Generate RST data file rows (with MSB metadata) for a single ForestStand"""
+    tree_rows = columnwise_rows([stand.reference_trees.rst_columns()], rst_cells, " ")[0]
+    return rst_stand_rows(stand, additional_vars) + tree_rows
+
+
 def csv_value(source: Any) -> str:
     if source in ("-1", "nan", "", None):
         return "None"
     return str(source)
 
 
+def distinct_formatted(column: npt.NDArray, formatter: Callable[[npt.NDArray], npt.NDArray]) -> npt.NDArray:
+    """Format a numeric column by formatting only its distinct values, as columns hold many repeated values"""
+    values, inverse = np.unique(column, return_inverse=True)
+    return formatter(values)[inverse]
+
+
+def csv_cells(column: npt.NDArray) -> npt.NDArray:
+    """csv_value of each value of the column, with the values converted to strings at once"""
+    if column.dtype.kind in "biuf":
+        cells = distinct_formatted(column, lambda values: values.astype(str))
+    else:
+        cells = column.astype(str)
+    return np.where(np.isin(cells, ("-1", "nan", "")), "None", cells)
+
+
+def rst_cells(column: npt.NDArray) -> npt.NDArray:
+    """rst_float of each value of a numeric column, with the values formatted at once"""
+    return distinct_formatted(column.astype(np.float64), lambda values: np.char.mod("%.6f", values))
+
+
+def columnwise_rows(containers: list[list[npt.NDArray]], formatter: Callable[[npt.NDArray], npt.NDArray],
+                    delimeter: str, prefix: Optional[str] = None) -> list[list[str]]:
+    """
+    Format the rows of several vectorized containers, given as lists of their columns. The columns of all containers
+    are concatenated and formatted as whole columns, and the rows are joined from the formatted cells.
+
+    :param containers: the columns of each container, in row value order
+    :param formatter: conversion of a column into an array of cell strings
+    :param delimeter: cell delimiter of a row
+    :param prefix: optional first cell of each row
+    :return: the rows of each container
+    """
+    if len(containers) == 0:
+        return []
+    cells = [formatter(np.concatenate(parts)).tolist() for parts in zip(*containers)]
+    leading = [repeat(prefix)] if prefix is not None else []
+    rows = [delimeter.join(row) for row in zip(*leading, *cells)]
+    offsets = np.cumsum([0] + [len(columns[0]) for columns in containers]).tolist()
+    return [rows[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
 def stand_to_csv_rows(stand: ForestStand, delimeter: str,
                       additional_vars: Optional[list[str]]) -> list[str]:
     """converts the :stand:, its reference trees and tree strata to csv rows."""
-    result = []
-    result.append(delimeter.join(map(csv_value, stand_as_internal_csv_row(stand, additional_vars))))
-
-    for i in range(stand.reference_trees.size):
-        result.append(delimeter.join(map(csv_value, stand.reference_trees.as_internal_csv_row(i))))
+    return list(csv_rows([stand], delimeter, additional_vars))
 
-    for i in range(stand.tree_strata.size):
-        result.append(delimeter.join(map(csv_value, stand.tree_strata.as_internal_csv_row(i))))
 
-    return result
+def csv_rows(stands: StandList, delimeter: str, additional_vars: Optional[list[str]]) -> Iterator[str]:
+    """CSV rows of the stands, their reference trees and tree strata. Tree and stratum rows are formatted column-wise
+    for batches of stands."""
+    for batch in batched(stands, FORMAT_BATCH_SIZE):
+        tree_rows = columnwise_rows([stand.reference_trees.internal_csv_columns() for stand in batch],
+                                    csv_cells, delimeter, "tree")
+        stratum_rows = columnwise_rows([stand.tree_strata.internal_csv_columns() for stand in batch],
+                                       csv_cells, delimeter, "stratum")
+        for stand, trees, strata in zip(batch, tree_rows, stratum_rows):
+            yield delimeter.join(map(csv_value, stand_as_internal_csv_row(stand, additional_vars)))
+            yield from trees
+            yield from strata
 
 
 def stands_to_csv_content(container: ExportableContainer[ForestStand], delimeter: str) -> list[str]:
-    stands = container.export_objects
-    additional_vars = container.additional_vars
-    result = []
-    for stand in stands:
-        result.extend(stand_to_csv_rows(stand, delimeter, additional_vars))
-    return result
+    return list(csv_rows(container.export_objects, delimeter, container.additional_vars))
 
 
 def csv_content_to_stands(csv_content: list[list[str]]) -> StandList:
@@ -152,9 +202,18 @@ def outputtable_rows(container: ExportableContainer[ForestStand], formatter: Cal
     return result
 
 
+def rst_rows(stands: StandList, additional_vars: list[str]) -> Iterator[str]:
+    """RST data file rows of the stands. Reference tree rows are formatted column-wise for batches of stands."""
+    for batch in batched(stands, FORMAT_BATCH_SIZE):
+        tree_rows = columnwise_rows([stand.reference_trees.rst_columns() for stand in batch], rst_cells, " ")
+        for stand, trees in zip(batch, tree_rows):
+            yield from rst_stand_rows(stand, additional_vars)
+            yield from trees
+
+
 def stands_to_rst_content(container: ExportableContainer[ForestStand]) -> list[str]:
     """Generate RST file contents for the given list of ForestStand"""
-    return outputtable_rows(container, rst_forest_stand_rows)
+    return list(rst_rows(container.export_objects, container.additional_vars or []))
 
 
 def mela_par_file_content(cvar_names: list[str]) -> list[str]:
@@ -0,0 +1,283 @@
+""" Schema-aware JSON encoding of forest data and collected data.
+
+ForestStands, ReferenceTrees, TreeStrata and CollectedData are encoded by their known structure: stand attributes
+as plain JSON values decoded by the type annotations of the model, and vectorized containers as one JSON array per
+column. Tuples, dicts with non-string keys and numpy arrays are encoded as objects tagged with a "$" key. Objects of
+other types fall back to jsonpickle.
+
+Documents are a single JSON object holding the encoded data. NDJSON files hold a header line followed by one encoded
+object per line, so that they can be written and read one object at a time.
+"""
+import dataclasses
+import json
+import types
+import typing
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from enum import Enum
+from pathlib import Path
+from typing import Any, Optional
+
+import jsonpickle
+import numpy as np
+
+from lukefi.metsi.app.compression import open_file
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
+from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata, VectorData
+from lukefi.metsi.sim.collected_data import CollectedData
+
+DOCUMENT_KEY = "metsi_json"
+NDJSON_KEY = "metsi_ndjson"
+VERSION = 1
+
+VECTOR_TYPES: dict[str, Callable[[], ReferenceTrees | TreeStrata]] = {
+    "ReferenceTrees": ReferenceTrees,
+    "TreeStrata": TreeStrata
+}
+
+RECORD_TYPES: dict[str, type] = {
+    "ReferenceTree": ReferenceTree,
+    "TreeStratum": TreeStratum
+}
+
+# fields encoded separately from the attributes of a stand, and back references left out of tree records
+STAND_CONTAINERS = ("reference_trees", "tree_strata")
+STAND_ENTRIES = {"reference_trees_pre_vec": "ReferenceTree", "tree_strata_pre_vec": "TreeStratum"}
+RECORD_EXCLUDED = ("stand",)
+
+
+def _field_decoder(hint: Any) -> Callable[[Any], Any]:
+    """Conversion of a decoded JSON value into the annotated type of a field"""
+    origin = typing.get_origin(hint)
+    if origin in (typing.Union, types.UnionType):
+        options = [option for option in typing.get_args(hint) if option is not type(None)]
+        if len(options) == 1:
+            inner = _field_decoder(options[0])
+            return lambda value: None if value is None else inner(value)
+        return lambda value: value
+    if origin is tuple:
+        return tuple
+    if isinstance(hint, type) and issubclass(hint, Enum):
+        return hint
+    return lambda value: value
+
+
+# field decoders by record class and excluded fields
+_schemas: dict[tuple[type, tuple[str, ...]], dict[str, Callable[[Any], Any]]] = {}
+
+
+def _schema(cls: type, excluded: tuple[str, ...]) -> dict[str, Callable[[Any], Any]]:
+    schema = _schemas.get((cls, excluded))
+    if schema is None:
+        hints = typing.get_type_hints(cls)
+        schema = {field.name: _field_decoder(hints[field.name])
+                  for field in dataclasses.fields(cls) if field.name not in excluded}
+        _schemas[(cls, excluded)] = schema
+    return schema
+
+
+def _field_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return encode(value.value)
+    if isinstance(value, tuple):
+        return [encode(item) for item in value]
+    return encode(value)
+
+
+def _encode_attributes(obj: Any, excluded: tuple[str, ...]) -> dict[str, Any]:
+    schema = _schema(type(obj), excluded)
+    result: dict[str, Any] = {"fields": {name: _field_value(getattr(obj, name)) for name in schema}}
+    extra = {name: value for name, value in vars(obj).items() if name not in schema and name not in excluded}
+    if extra:
+        result["extra"] = encode(extra)
+    return result
+
+
+def _decode_attributes[O](obj: O, data: dict[str, Any], excluded: tuple[str, ...]) -> O:
+    schema = _schema(type(obj), excluded)
+    for name, value in data["fields"].items():
+        setattr(obj, name, schema[name](decode(value)) if name in schema else decode(value))
+    for name, value in decode(data.get("extra", {})).items():
+        setattr(obj, name, value)
+    return obj
+
+
+def _encode_vectors(vectors: VectorData) -> dict[str, Any]:
+    return {
+        "$type": type(vectors).__name__,
+        "size": vectors.size,
+        "columns": {name: getattr(vectors, name).tolist() for name in vectors.dtypes}
+    }
+
+
+def _decode_vectors(data: dict[str, Any]) -> VectorData:
+    vectors = VECTOR_TYPES[data["$type"]]()
+    columns = {}
+    for name, values in data["columns"].items():
+        dtype = np.dtype(vectors.dtypes[name])
+        columns[name] = np.array(values, dtype.base).reshape((data["size"], *dtype.shape))
+    return vectors.assign(columns)
+
+
+def _encode_stand(stand: ForestStand) -> dict[str, Any]:
+    result = {"$type": "ForestStand", **_encode_attributes(stand, STAND_CONTAINERS + tuple(STAND_ENTRIES))}
+    for target in STAND_CONTAINERS:
+        result[target] = _encode_vectors(getattr(stand, target))
+    for target, record_type in STAND_ENTRIES.items():
+        if hasattr(stand, target):
+            result[target] = [{"$type": record_type, **_encode_attributes(entry, RECORD_EXCLUDED)}
+                              for entry in getattr(stand, target)]
+    return result
+
+
+def _decode_stand(data: dict[str, Any]) -> ForestStand:
+    stand = _decode_attributes(ForestStand(), data, STAND_CONTAINERS + tuple(STAND_ENTRIES))
+    for target in STAND_CONTAINERS:
+        setattr(stand, target, _decode_vectors(data[target]))
+    for target in STAND_ENTRIES:
+        if target in data:
+            entries = [decode(entry) for entry in data[target]]
+            for entry in entries:
+                entry.stand = stand
+            setattr(stand, target, entries)
+        else:
+            delattr(stand, target)
+    return stand
+
+
+def _encode_collected_data(collected_data: CollectedData) -> dict[str, Any]:
+    return {
+        "$type": "CollectedData",
+        "operation_results": encode(collected_data.operation_results),
+        "current_time_point": collected_data.current_time_point,
+        "initial_time_point": collected_data.initial_time_point
+    }
+
+
+def _decode_collected_data(data: dict[str, Any]) -> CollectedData:
+    return CollectedData(
+        treatment_results=decode(data["operation_results"]),
+        current_time_point=data["current_time_point"],
+        initial_time_point=data["initial_time_point"])
+
+
+def _encode_dict(value: dict) -> Any:
+    pairs = [[encode(key), encode(item)] for key, item in value.items()]
+    if isinstance(value, OrderedDict):
+        return {"$odict": pairs}
+    if all(isinstance(key, str) and not key.startswith("$") for key in value):
+        return {key: encode(item) for key, item in value.items()}
+    return {"$dict": pairs}
+
+
+def encode(value: Any) -> Any:
+    """Encode a value into JSON serializable data"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {"$tuple": [encode(item) for item in value]}
+    if isinstance(value, dict):
+        return _encode_dict(value)
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        return {"$ndarray": {"dtype": value.dtype.str, "shape": list(value.shape), "data": value.tolist()}}
+    if isinstance(value, ForestStand):
+        return _encode_stand(value)
+    if type(value) in VECTOR_TYPES.values():
+        return _encode_vectors(value)
+    if isinstance(value, CollectedData):
+        return _encode_collected_data(value)
+    return {"$jsonpickle": jsonpickle.Pickler().flatten(value)}
+
+
+def decode(data: Any) -> Any:
+    """Decode a value from data produced by encode"""
+    if isinstance(data, list):
+        return [decode(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if "$type" in data:
+        kind = data["$type"]
+        if kind == "ForestStand":
+            return _decode_stand(data)
+        if kind in VECTOR_TYPES:
+            return _decode_vectors(data)
+        if kind in RECORD_TYPES:
+            return _decode_attributes(RECORD_TYPES[kind](), data, RECORD_EXCLUDED)
+        if kind == "CollectedData":
+            return _decode_collected_data(data)
+        raise MetsiException(f"Unknown JSON encoded type '{kind}'")
+    if "$tuple" in data:
+        return tuple(decode(item) for item in data["$tuple"])
+    if "$odict" in data:
+        return OrderedDict((decode(key), decode(item)) for key, item in data["$odict"])
+    if "$dict" in data:
+        return {decode(key): decode(item) for key, item in data["$dict"]}
+    if "$ndarray" in data:
+        array = data["$ndarray"]
+        return np.array(array["data"], np.dtype(array["dtype"])).reshape(array["shape"])
+    if "$jsonpickle" in data:
+        return jsonpickle.Unpickler().restore(data["$jsonpickle"])
+    return {key: decode(item) for key, item in data.items()}
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """Encode the object as a JSON document. Without indent, the document is written compactly on one line."""
+    separators = (",", ":") if indent is None else None
+    return json.dumps({DOCUMENT_KEY: VERSION, "data": encode(obj)}, indent=indent, separators=separators)
+
+
+def loads(text: str) -> Any:
+    """Decode a JSON document written by dumps, or any jsonpickle document"""
+    document = json.loads(text)
+    if isinstance(document, dict) and DOCUMENT_KEY in document:
+        if document[DOCUMENT_KEY] != VERSION:
+            raise MetsiException(f"Unsupported JSON document version '{document[DOCUMENT_KEY]}'")
+        return decode(document["data"])
+    return jsonpickle.Unpickler().restore(document)
+
+
+def ndjson_header() -> str:
+    return json.dumps({NDJSON_KEY: VERSION})
+
+
+def ndjson_line(obj: Any) -> str:
+    return json.dumps(encode(obj), separators=(",", ":"))
+
+
+def write_ndjson(filepath: str | Path, objects: Iterable[Any]):
+    """Write the objects into an NDJSON file, one compactly encoded object per line"""
+    with open_file(filepath, "w", newline="\n", encoding="utf-8") as file:
+        file.write(ndjson_header())
+        file.write("\n")
+        for obj in objects:
+            file.write(ndjson_line(obj))
+            file.write("\n")
+
+
+def decode_ndjson_lines(lines: Iterable[str]) -> Iterator[Any]:
+    """Decode the objects of NDJSON lines following the header line"""
+    for line in lines:
+        if line.strip():
+            yield decode(json.loads(line))
+
+
+def iter_ndjson(filepath: str | Path) -> Iterator[Any]:
+    """Decode the objects of an NDJSON file one line at a time"""
+    with open_file(filepath, "r", encoding="utf-8") as file:
+        header = json.loads(file.readline() or "null")
+        if not isinstance(header, dict) or header.get(NDJSON_KEY) != VERSION:
+            raise MetsiException(f"File '{filepath}' is not a supported NDJSON file")
+        yield from decode_ndjson_lines(file)
+
+
+def read_ndjson(filepath: str | Path) -> list[Any]:
+    return list(iter_ndjson(filepath))
+
+
+__all__ = ["encode", "decode", "dumps", "loads", "ndjson_header", "ndjson_line", "write_ndjson", "decode_ndjson_lines",
+           "iter_ndjson", "read_ndjson"]
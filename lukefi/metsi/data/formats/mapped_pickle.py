@@ -0,0 +1,66 @@
+""" Pickle container with out-of-band buffers for memory mapped loading.
+
+An object is pickled with protocol 5, collecting the PickleBuffers of its arrays out-of-band instead of copying them
+into the pickle stream. The container file holds the pickle stream followed by the buffers, each starting at a
+64 byte aligned offset. Loading memory maps the file and passes views into the mapping to the unpickler, so that
+arrays of the loaded object are read-only views into the file instead of copies.
+
+Layout: 8 byte magic, little-endian uint64 pickle stream length and buffer count, a uint64 offset and length pair
+for each buffer, the pickle stream, and the buffers.
+"""
+import mmap
+import pickle
+import struct
+from pathlib import Path
+from typing import Any
+
+from lukefi.metsi.app.utils import MetsiException
+
+MAGIC = b"METSIPKL"
+ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_mapped_pickle(filepath: str | Path, obj: Any):
+    """Pickle the object into a container file, storing its out-of-band buffers aligned after the pickle stream"""
+    buffers: list[pickle.PickleBuffer] = []
+    stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    views = [buffer.raw() for buffer in buffers]
+    offset = len(MAGIC) + 16 + 16 * len(views) + len(stream)
+    table = []
+    for view in views:
+        offset = _aligned(offset)
+        table.append((offset, view.nbytes))
+        offset += view.nbytes
+
+    with open(filepath, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<QQ", len(stream), len(views)))
+        for entry in table:
+            file.write(struct.pack("<QQ", *entry))
+        file.write(stream)
+        for (start, _), view in zip(table, views):
+            file.write(b"\0" * (start - file.tell()))
+            file.write(view)
+
+
+def read_mapped_pickle(filepath: str | Path) -> Any:
+    """Load an object from a container file. The file is memory mapped and the buffers of the object are read-only
+    views into the mapping, which stays open as long as any of them is referenced."""
+    with open(filepath, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise MetsiException(f"File '{filepath}' is not a mapped pickle container")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    stream_length, count = struct.unpack_from("<QQ", view, len(MAGIC))
+    table_start = len(MAGIC) + 16
+    table = [struct.unpack_from("<QQ", view, table_start + 16 * i) for i in range(count)]
+    stream_start = table_start + 16 * count
+    return pickle.loads(view[stream_start:stream_start + stream_length],
+                        buffers=[view[start:start + length] for start, length in table])
+
+
+__all__ = ["write_mapped_pickle", "read_mapped_pickle"]
@@ -3,8 +3,6 @@ import math
 from types import SimpleNamespace
 from xml.etree.ElementTree import Element
 
-import geopandas
-from shapely.geometry import Polygon, Point
 from lukefi.metsi.data.formats import util
 from lukefi.metsi.data.model import TreeStratum
 
@@ -201,6 +199,9 @@ def parse_centroid(sns: SimpleNamespace) -> tuple[float, float, str]:
 
     Also the parsed crs is returned altough SMK XML is standardised to use ESPG:3067 as default.
     """
+    # Lazy import of geopandas, needed only for stand geometries.
+    import geopandas  # pylint: disable=import-outside-toplevel
+    from shapely.geometry import Polygon, Point  # pylint: disable=import-outside-toplevel
     crs = sns.egeometry.attrib['srsName']
     raw_coords = sns.egeometry.findtext(sns.coord_xpath, None, NS)
     geometry: Point | Polygon
@@ -0,0 +1,190 @@
+""" Column-wise decoding of VMI reference tree and tree stratum rows into vectorized containers """
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from lukefi.metsi.data.conversion import vmi2internal
+from lukefi.metsi.data.formats import util, vmi_util
+from lukefi.metsi.data.model import ReferenceTree, TreeStratum
+from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata, VectorData
+
+# joins the values of several source columns into a single lookup key
+_KEY_SEPARATOR = "\x1f"
+
+
+def source_columns(rows: Sequence, indices: dict[str, slice] | dict[str, int]) -> dict[str, npt.NDArray[np.str_]]:
+    """Extract each indexed column of the given rows as a string array. VMI12 rows are fixed width strings addressed
+    with slices, which are cut for all rows at once from a character matrix. VMI13 rows are pre-split token lists
+    addressed with integer indices."""
+    if len(rows) == 0:
+        return {name: np.array([], dtype=np.str_) for name in indices}
+    slices = {name: index for name, index in indices.items() if isinstance(index, slice)}
+    if len(slices) == len(indices):
+        width = max(max(len(row) for row in rows), max(index.stop for index in slices.values()))
+        # characters of rows shorter than width are zero padded, which numpy strips as Python slicing would
+        characters = np.array(rows, dtype=f"U{width}").view(np.uint32).reshape(len(rows), width)
+        return {
+            name: np.ascontiguousarray(characters[:, index]).view(f"U{index.stop - index.start}").ravel()
+            for name, index in slices.items()
+        }
+    return {name: np.array([row[index] for row in rows], dtype=np.str_) for name, index in indices.items()}
+
+
+def joined(*parts: npt.NDArray[np.str_] | str) -> npt.NDArray[np.str_]:
+    """Concatenate string columns and literals element-wise"""
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return np.asarray(result)
+
+
+class ColumnBuilder:
+    """Collects the columns of a VectorData container of known length. Source columns are decoded by applying the
+    row-wise conversion rule once per distinct source value and spreading the results, with None replaced by the
+    defaults of the container."""
+
+    def __init__(self, container: VectorData, size: int, defaults: Any):
+        self.container = container
+        self.size = size
+        self.defaults = defaults
+        self.columns: dict[str, npt.NDArray] = {}
+
+    def map(self, name: str, rule: Callable[..., Any], *sources: npt.NDArray) -> npt.NDArray:
+        if len(sources) == 1:
+            unique, inverse = np.unique(sources[0], return_inverse=True)
+            values = [rule(key) for key in unique.tolist()]
+        else:
+            keys = sources[0]
+            for source in sources[1:]:
+                keys = joined(keys, _KEY_SEPARATOR, source)
+            unique, inverse = np.unique(keys, return_inverse=True)
+            values = [rule(*key.split(_KEY_SEPARATOR)) for key in unique.tolist()]
+        return self.put(name, values, inverse)
+
+    def put(self, name: str, values: list, inverse: npt.NDArray) -> npt.NDArray:
+        dtype = self.container.dtypes[name]
+        table = np.array([self.container.to_default(value, dtype) for value in values], dtype)
+        self.columns[name] = table[inverse.reshape(-1)] if len(values) > 0 else np.array([], dtype)
+        return self.columns[name]
+
+    def constant(self, name: str, value: Any):
+        self.put(name, [value], np.zeros(self.size, dtype=np.intp))
+
+    def text(self, name: str, values: npt.NDArray[np.str_]):
+        self.columns[name] = values.astype(self.container.dtypes[name])
+
+    def complete(self) -> dict[str, npt.NDArray]:
+        """Fill the columns not decoded from source with the defaults of the row object type"""
+        for name in self.container.dtypes:
+            if name not in self.columns:
+                self.constant(name, getattr(self.defaults, name, None))
+        return self.columns
+
+
+def stand_identifiers(columns: dict[str, npt.NDArray[np.str_]]) -> npt.NDArray[np.str_]:
+    return joined(columns["lohkomuoto"], "-", columns["section_y"], "-", columns["section_x"], "-",
+                  columns["test_area_number"], "-", columns["stand_number"])
+
+
+def decode_reference_trees(rows: Sequence, indices: dict, is_vmi12: bool
+                           ) -> tuple[npt.NDArray[np.str_], dict[str, npt.NDArray]]:
+    """Decode VMI type 3 rows column-wise into ReferenceTrees columns, as VMIBuilder.convert_tree_entry would.
+
+    :return: a tuple of the stand identifier of each row and the decoded columns
+    """
+    source = source_columns(rows, indices)
+    builder = ColumnBuilder(ReferenceTrees(), len(rows), ReferenceTree())
+    builder.text("tree_category", source["tree_category"])
+    builder.text("identifier", joined(stand_identifiers(source), "-", source["tree_number"], "-tree"))
+    builder.map("species", vmi2internal.convert_species, source["species"])
+    diameter = builder.map("breast_height_diameter", vmi_util.transform_tree_diameter, source["diameter"])
+    ages = (source["d13_age"], source["age_increase"], source["total_age"])
+    builder.map("breast_height_age", lambda *values: vmi_util.determine_tree_age_values(*values)[0], *ages)
+    builder.map("biological_age", lambda *values: vmi_util.determine_tree_age_values(*values)[1], *ages)
+    builder.constant("pruning_year", 0)
+    builder.constant("age_when_10cm_diameter_at_breast_height", 0)
+    builder.constant("origin", 0)
+    builder.map("tree_number", lambda value: util.parse_type(value, int), source["tree_number"])
+    builder.constant("stand_origin_relative_position", (0.0, 0.0, 0.0))
+    builder.map("lowest_living_branch_height",
+                lambda value: util.get_or_default(util.parse_type(value, float), 0.0) / 10.0,
+                source["living_branches_height"])
+    builder.map("management_category", vmi_util.determine_tree_management_category, source["latvuskerros"])
+    builder.map("storey", vmi_util.determine_storey_for_tree, source["latvuskerros"])
+    builder.map("tree_type", vmi_util.determine_tree_type, source["tree_type"])
+    builder.map("tuhon_ilmiasu", lambda value: None if value in ('  ', ' ', '.', '') else value.strip(),
+                source["tuhon_ilmiasu"])
+    builder.map("height", lambda value: vmi_util.determine_tree_height(value, conversion_factor=100.0),
+                source["height"])
+    builder.map("measured_height", lambda value: vmi_util.determine_tree_height(value, conversion_factor=10.0),
+                source["measured_height"])
+    builder.map("stems_per_ha", lambda value: vmi_util.determine_stems_per_ha(value, is_vmi12), diameter)
+    return stand_identifiers(source), builder.complete()
+
+
+def _stratum_age_values(biological_age: str, d13_age: str, avg_height: str) -> tuple[float, float]:
+    return vmi_util.determine_stratum_age_values(
+        biological_age, d13_age, vmi_util.determine_stratum_tree_height(avg_height))
+
+
+def decode_tree_strata(rows: Sequence, indices: dict) -> tuple[npt.NDArray[np.str_], dict[str, npt.NDArray]]:
+    """Decode VMI type 2 rows column-wise into TreeStrata columns, as VMIBuilder.convert_stratum_entry would.
+
+    :return: a tuple of the stand identifier of each row and the decoded columns
+    """
+    source = source_columns(rows, indices)
+    builder = ColumnBuilder(TreeStrata(), len(rows), TreeStratum())
+    builder.text("identifier", joined(stand_identifiers(source), "-", source["stratum_number"], "-stratum"))
+    builder.map("species", vmi2internal.convert_species, source["species"])
+    builder.map("origin", vmi_util.determine_stratum_origin, source["origin"])
+    builder.map("stems_per_ha", lambda value: util.get_or_default(util.parse_type(value, float), 0.0),
+                source["stems_per_ha"])
+    builder.map("sapling_stems_per_ha", lambda value: util.get_or_default(util.parse_type(value, float), 0.0),
+                source["sapling_stems_per_ha"])
+    builder.map("sapling_stratum", lambda value: util.get_or_default(util.parse_type(value, float), 0.0) > 0.0,
+                source["sapling_stems_per_ha"])
+    builder.map("mean_diameter", lambda value: util.parse_type(value, float), source["avg_diameter"])
+    builder.map("mean_height", vmi_util.determine_stratum_tree_height, source["avg_height"])
+    ages = (source["biological_age"], source["d13_age"], source["avg_height"])
+    builder.map("biological_age", lambda *values: _stratum_age_values(*values)[0], *ages)
+    builder.map("breast_height_age", lambda *values: _stratum_age_values(*values)[1], *ages)
+    builder.map("basal_area", lambda value: util.parse_type(value, float), source["basal_area"])
+    builder.constant("cutting_year", 0)
+    builder.constant("age_when_10cm_diameter_at_breast_height", 0)
+    builder.map("tree_number", util.parse_int, source["stratum_number"])
+    builder.constant("stand_origin_relative_position", (0.0, 0.0, 0.0))
+    builder.constant("lowest_living_branch_height", 0.0)
+    builder.constant("management_category", 1)
+    builder.map("storey", vmi_util.determine_storey_for_stratum, source["stratum_rank"])
+    return stand_identifiers(source), builder.complete()
+
+
+def split_by_stand[V: VectorData](identifiers: npt.NDArray[np.str_],
+                                  columns: dict[str, npt.NDArray],
+                                  container_type: Callable[[], V]) -> dict[str, V]:
+    """Split decoded columns into a container per stand identifier, retaining source row order within each stand"""
+    order = np.argsort(identifiers, kind="stable")
+    unique, starts = np.unique(identifiers[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    result: dict[str, V] = {}
+    for identifier, start, end in zip(unique.tolist(), starts, ends):
+        rows = order[start:end]
+        result[identifier] = container_type().assign({name: column[rows] for name, column in columns.items()})
+    return result
+
+
+def concatenate[V: VectorData](containers: Sequence[V], container_type: Callable[[], V]) -> V:
+    """Join the rows of containers of the same type in the given order"""
+    if len(containers) == 0:
+        return container_type()
+    if len(containers) == 1:
+        return containers[0]
+    return container_type().assign({
+        name: np.concatenate([getattr(container, name) for container in containers])
+        for name in containers[0].dtypes
+    })
+
+
+__all__ = ["source_columns", "decode_reference_trees", "decode_tree_strata", "split_by_stand", "concatenate"]
@@ -1,8 +1,6 @@
 from typing import Optional
 from collections.abc import Sequence
 from datetime import datetime as dt
-from shapely.geometry import Point
-from geopandas import GeoSeries
 
 from lukefi.metsi.data.enums.internal import Storey
 from lukefi.metsi.data.formats.util import get_or_default, parse_float, parse_int
@@ -255,6 +253,9 @@ def convert_vmi12_geolocation(lat_source: str, lon_source: str) -> tuple[float,
     :param lon_source: EPSG:2393 longitude
     :return: lat, lon tuple in EPSG:3067
     """
+    # Lazy import of geopandas, needed only for VMI12 coordinates.
+    from shapely.geometry import Point  # pylint: disable=import-outside-toplevel
+    from geopandas import GeoSeries  # pylint: disable=import-outside-toplevel
     point = GeoSeries([Point(float(lon_source), float(lat_source))], crs='EPSG:2393')
     point = point.to_crs(3067)
     return round(point.centroid.y[0]), round(point.centroid.x[0])
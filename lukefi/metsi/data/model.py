@@ -437,6 +437,16 @@ class ForestStand(Finalizable):
     def has_strata(self):
         return len(self.tree_strata) > 0
 
+    @property
+    def nbytes(self) -> int:
+        """Size in bytes of the stand's tree and stratum data. Data not yet vectorized is estimated by its row count."""
+        return sum([
+            self.reference_trees.nbytes,
+            self.tree_strata.nbytes,
+            len(getattr(self, "reference_trees_pre_vec", [])) * self.reference_trees.row_nbytes,
+            len(getattr(self, "tree_strata_pre_vec", [])) * self.tree_strata.row_nbytes
+        ])
+
     def from_row(self, row):
         self.management_unit_id = conv(row[0], int)
         self.year = conv(row[1], int)
@@ -1,3 +1,4 @@
+import pickle
 from copy import copy
 from typing import Any, Optional, overload
 import numpy as np
@@ -62,11 +63,41 @@ class VectorData():
 
     def __init__(self, dtypes: dict[str, npt.DTypeLike]):
         self.dtypes = dtypes
-        self.vectorize({})
+        # empty columns, as vectorize({}) would set them
+        self.size = 0
+        for attribute_name, data_type in dtypes.items():
+            setattr(self, attribute_name, np.empty(0, data_type))
 
     def __len__(self):
         return self.size
 
+    def __reduce_ex__(self, protocol):
+        """
+        With pickle protocol 5, columns are pickled as PickleBuffers of their data, so that they are passed out-of-band
+        to a buffer_callback without copying, and restored as views into the given buffers. Otherwise the default
+        reduction is used.
+        """
+        if protocol < 5:
+            return super().__reduce_ex__(protocol)
+        state = self.__dict__.copy()
+        columns = {}
+        for name in self.dtypes:
+            column = state.get(name)
+            if isinstance(column, np.ndarray) and not column.dtype.hasobject:
+                column = np.ascontiguousarray(state.pop(name))
+                columns[name] = (pickle.PickleBuffer(column), column.dtype, column.shape)
+        return _restore_vector_data, (type(self), state, columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size in bytes of the contained arrays."""
+        return sum(getattr(self, key).nbytes for key in self.dtypes if isinstance(getattr(self, key, None), np.ndarray))
+
+    @property
+    def row_nbytes(self) -> int:
+        """Size in bytes of a single row of data over all declared columns."""
+        return sum(np.dtype(dtype).itemsize for dtype in self.dtypes.values())
+
     def __getitem__(self, name: str) -> npt.NDArray:
         return getattr(self, name)
 
@@ -88,6 +119,26 @@ class VectorData():
                 raise MetsiException("Vectorized data is not contiguous")
         return self
 
+    def assign(self, columns: dict[str, npt.NDArray]):
+        """
+        Set the contained arrays directly from given columns of equal length, without going through row values.
+        Columns are converted to the declared data types, and undeclared columns are ignored. Declared columns
+        missing from the given ones are filled with defaults.
+
+        Args:
+            columns (dict[str, npt.NDArray]): Dictionary mapping attribute names to arrays
+        """
+        self.size = len(next(iter(columns.values()))) if len(columns) > 0 else 0
+        for attribute_name, data_type in self.dtypes.items():
+            if attribute_name in columns:
+                # element type only, as the shape of any sub-array data type is already present in the column
+                setattr(self, attribute_name, np.ascontiguousarray(columns[attribute_name],
+                                                                   dtype=np.dtype(data_type).base))
+            else:
+                default = np.array([self.to_default(None, data_type)], data_type)
+                setattr(self, attribute_name, np.repeat(default, self.size, axis=0))
+        return self
+
     def is_contiguous(self, name: str):
         arr: npt.NDArray = getattr(self, name)
         return bool(arr.flags['CONTIGUOUS']) and bool(arr.flags['C_CONTIGUOUS'])
@@ -232,6 +283,17 @@ class VectorData():
         self.size = 0
 
 
+def _restore_vector_data(cls: type[VectorData], state: dict[str, Any],
+                         columns: dict[str, tuple[Any, np.dtype, tuple[int, ...]]]) -> VectorData:
+    """Restore VectorData reduced with pickle protocol 5. Columns are views into the unpickled buffers, and are
+    writable only if their buffer is."""
+    data = cls.__new__(cls)
+    data.__dict__.update(state)
+    for name, (buffer, dtype, shape) in columns.items():
+        setattr(data, name, np.frombuffer(buffer, dtype).reshape(shape))
+    return data
+
+
 class ReferenceTrees(VectorData):
     identifier: npt.NDArray[np.str_]
     tree_number: npt.NDArray[np.int32]
@@ -280,34 +342,59 @@ class ReferenceTrees(VectorData):
             None,
         ]
 
-    def as_internal_csv_row(self, i) -> list[str]:
+    def rst_columns(self) -> list[npt.NDArray]:
+        """Columns in the order of as_rst_row, with zeros for the empty last field"""
         return [
-            "tree",
-            str(self.identifier[i]),
-            str(self.species[i]),
-            str(self.origin[i]),
-            str(self.stems_per_ha[i]),
-            str(self.breast_height_diameter[i]),
-            str(self.height[i]),
-            str(self.measured_height[i]),
-            str(self.breast_height_age[i]),
-            str(self.biological_age[i]),
-            str(self.saw_log_volume_reduction_factor[i]),
-            str(self.pruning_year[i]),
-            str(self.age_when_10cm_diameter_at_breast_height[i]),
-            str(self.tree_number[i]),
-            str(self.stand_origin_relative_position[i, 0]),
-            str(self.stand_origin_relative_position[i, 1]),
-            str(self.stand_origin_relative_position[i, 2]),
-            str(self.lowest_living_branch_height[i]),
-            str(self.management_category[i]),
-            str(self.tree_category[i]),
-            str(self.sapling[i]),
-            str(self.storey[i]),
-            str(self.tree_type[i]),
-            str(self.tuhon_ilmiasu[i])
+            self.stems_per_ha,
+            self.species,
+            self.breast_height_diameter,
+            self.height,
+            self.breast_height_age,
+            self.biological_age,
+            self.saw_log_volume_reduction_factor,
+            self.pruning_year,
+            self.age_when_10cm_diameter_at_breast_height,
+            self.origin,
+            self.tree_number,
+            self.stand_origin_relative_position[:, 0],
+            self.stand_origin_relative_position[:, 1],
+            self.stand_origin_relative_position[:, 2],
+            self.lowest_living_branch_height,
+            self.management_category,
+            np.zeros(self.size),
         ]
 
+    def internal_csv_columns(self) -> list[npt.NDArray]:
+        """Columns in the order of the values of as_internal_csv_row"""
+        return [
+            self.identifier,
+            self.species,
+            self.origin,
+            self.stems_per_ha,
+            self.breast_height_diameter,
+            self.height,
+            self.measured_height,
+            self.breast_height_age,
+            self.biological_age,
+            self.saw_log_volume_reduction_factor,
+            self.pruning_year,
+            self.age_when_10cm_diameter_at_breast_height,
+            self.tree_number,
+            self.stand_origin_relative_position[:, 0],
+            self.stand_origin_relative_position[:, 1],
+            self.stand_origin_relative_position[:, 2],
+            self.lowest_living_branch_height,
+            self.management_category,
+            self.tree_category,
+            self.sapling,
+            self.storey,
+            self.tree_type,
+            self.tuhon_ilmiasu
+        ]
+
+    def as_internal_csv_row(self, i) -> list[str]:
+        return ["tree", *(str(column[i]) for column in self.internal_csv_columns())]
+
 
 class TreeStrata(VectorData):
     identifier: npt.NDArray[np.str_]
@@ -334,28 +421,31 @@ class TreeStrata(VectorData):
     def __init__(self):
         super().__init__(DTYPES_STRATA)
 
-    def as_internal_csv_row(self, i) -> list[str]:
+    def internal_csv_columns(self) -> list[npt.NDArray]:
+        """Columns in the order of the values of as_internal_csv_row"""
         return [
-            "stratum",
-            str(self.identifier[i]),
-            str(self.species[i]),
-            str(self.origin[i]),
-            str(self.stems_per_ha[i]),
-            str(self.mean_diameter[i]),
-            str(self.mean_height[i]),
-            str(self.breast_height_age[i]),
-            str(self.biological_age[i]),
-            str(self.basal_area[i]),
-            str(self.saw_log_volume_reduction_factor[i]),
-            str(self.cutting_year[i]),
-            str(self.age_when_10cm_diameter_at_breast_height[i]),
-            str(self.tree_number[i]),
-            str(self.stand_origin_relative_position[i, 0]),
-            str(self.stand_origin_relative_position[i, 1]),
-            str(self.stand_origin_relative_position[i, 2]),
-            str(self.lowest_living_branch_height[i]),
-            str(self.management_category[i]),
-            str(self.sapling_stems_per_ha[i]),
-            str(self.sapling_stratum[i]),
-            str(self.storey[i])
+            self.identifier,
+            self.species,
+            self.origin,
+            self.stems_per_ha,
+            self.mean_diameter,
+            self.mean_height,
+            self.breast_height_age,
+            self.biological_age,
+            self.basal_area,
+            self.saw_log_volume_reduction_factor,
+            self.cutting_year,
+            self.age_when_10cm_diameter_at_breast_height,
+            self.tree_number,
+            self.stand_origin_relative_position[:, 0],
+            self.stand_origin_relative_position[:, 1],
+            self.stand_origin_relative_position[:, 2],
+            self.lowest_living_branch_height,
+            self.management_category,
+            self.sapling_stems_per_ha,
+            self.sapling_stratum,
+            self.storey
         ]
+
+    def as_internal_csv_row(self, i) -> list[str]:
+        return ["stratum", *(str(column[i]) for column in self.internal_csv_columns())]
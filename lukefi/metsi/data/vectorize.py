@@ -34,6 +34,9 @@ def vectorize(stands: StandList, **operation_params) -> StandList:
 
     for stand in stands:
         for t in target:
+            if not hasattr(stand, f"{t}_pre_vec"):
+                # already decoded into a vectorized container by the forest builder
+                continue
             attr_dict: dict[str, Any] = {}
 
             for data in getattr(stand, f"{t}_pre_vec", []):
@@ -2,12 +2,23 @@ from typing import Any, Optional
 from lukefi.metsi.data.model import ForestStand
 from lukefi.metsi.domain.forestry_types import ForestCondition
 from lukefi.metsi.domain.natural_processes.grow_acta import grow_acta
-from lukefi.metsi.domain.natural_processes.grow_metsi import grow_metsi
-from lukefi.metsi.domain.natural_processes.grow_motti_dll import grow_motti_dll
+from lukefi.metsi.sim.collected_data import OpTuple
 from lukefi.metsi.sim.generators import Event
 from lukefi.metsi.sim.operations import do_nothing
 
 
+def grow_metsi(input_: OpTuple[ForestStand], /, **operation_parameters) -> OpTuple[ForestStand]:
+    # Lazy import of the optional MetsiGrow model, needed only when the event is run.
+    from lukefi.metsi.domain.natural_processes import grow_metsi as model  # pylint: disable=import-outside-toplevel
+    return model.grow_metsi(input_, **operation_parameters)
+
+
+def grow_motti_dll(input_: OpTuple[ForestStand], /, **operation_parameters) -> OpTuple[ForestStand]:
+    # Lazy import of the Motti DLL wrapper, needed only when the event is run.
+    from lukefi.metsi.domain.natural_processes import grow_motti_dll as model  # pylint: disable=import-outside-toplevel
+    return model.grow_motti_dll(input_, **operation_parameters)
+
+
 class DoNothing(Event[ForestStand]):
     def __init__(self, parameters: Optional[dict[str, Any]] = None,
                  preconditions: Optional[list[ForestCondition]] = None,
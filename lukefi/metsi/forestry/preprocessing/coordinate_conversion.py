@@ -2,6 +2,7 @@ import ctypes as cts
 import sys
 from pathlib import Path
 from enum import Enum
+from functools import cache
 from typing import Optional
 from lukefi.metsi.app.utils import MetsiException
 
@@ -13,14 +14,18 @@ def load_library(path):
     return cts.CDLL(str(path))
 
 
-# Defining and initialize the external library
+# The external library, loaded when a conversion is first made
 LIB_NAME = 'ykjtm35.dll' if sys.platform == "win32" else 'ykjtm35.so'
 DLL_PATH = Path('lukefi', 'metsi', 'forestry', 'c', 'lib', LIB_NAME)
 
-try:
-    DLL = load_library(DLL_PATH)
-except OSError as e:
-    print(f"Failed to load {LIB_NAME}: {e}")
+
+@cache
+def _library() -> cts.CDLL:
+    """ The external library, loaded on first use """
+    try:
+        return load_library(DLL_PATH)
+    except OSError as e:
+        raise MetsiException(f"Failed to load {LIB_NAME}: {e}") from e
 
 
 def _is_error(flag: int) -> bool:
@@ -36,7 +41,7 @@ def _erts_tm35_to_ykj(u: float, v: float) -> tuple[float, float]:
     """
 
     # Type initialization for the input
-    f = DLL.tm35fin_to_ykj
+    f = _library().tm35fin_to_ykj
     f.argtypes = [
         cts.c_double,
         cts.c_double,
@@ -1,7 +1,5 @@
 from pathlib import Path
 
-from rpy2 import robjects
-
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import TreeStratum, ReferenceTree
 
@@ -23,6 +21,8 @@ def tree_generation_lm(
         stand_basal_area: float,
         **params) -> list[ReferenceTree]:
     global lm_tree_generation_loaded  # pylint: disable=global-statement # Not viable to change current implementation.
+    # Lazy import of rpy2, needed only when trees are generated with the R model.
+    from rpy2 import robjects  # pylint: disable=import-outside-toplevel
     dir_ = Path(__file__).parent.parent.resolve() / "r"
     growth_script_file = dir_ / "lm_tree_generation.R"
     if not lm_tree_generation_loaded:
@@ -1,19 +1,22 @@
 from pathlib import Path
-from typing import Any
-
-from rpy2 import robjects
+from typing import TYPE_CHECKING, Any
 
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import ForestStand
 
+if TYPE_CHECKING:
+    from rpy2 import robjects
+
 
 initialised = False  # pylint: disable=invalid-name # Pylint thinks all module scope variables are constants
 
 
-def get_r_with_sourced_scripts() -> robjects.R:
+def get_r_with_sourced_scripts() -> "robjects.R":
     """Returns the R instance that has sourced all required R-scripts. During sourcing, the working directory is set to
     .../forestryfunctions, after which it's set back to the initial directory."""
     global initialised  # pylint: disable=global-statement # Not viable to change current implementation.
+    # Lazy import of rpy2, needed only when R functions are used.
+    from rpy2 import robjects  # pylint: disable=import-outside-toplevel
     r = robjects.r
 
     if not initialised:
@@ -40,6 +43,7 @@ lmfor_species_map = {
 
 
 def lmfor_volume(stand: ForestStand) -> float:
+    from rpy2 import robjects  # pylint: disable=import-outside-toplevel
 
     r = get_r_with_sourced_scripts()
     volmods_path = Path(__file__).parent.resolve() / "r" / "vol_mods_final_LM.rds"
@@ -0,0 +1,167 @@
+""" Checkpointing of the partial tree strategy.
+
+The surviving payloads of a computational unit are written into a checkpoint file after each time point, so that an
+interrupted simulation of the unit resumes from its last completed time point. All payloads of a time point are
+pickled together, so that the vectorized data of the computational units is written as raw buffers and the collected
+data shared by the payloads is written only once.
+
+Functions and partials found in the simulation configuration, such as the treatments in the operation history of the
+payloads, are written as references to their position in the configuration instead of by name, so that functions
+declared in a control file need not be importable. A checkpoint is thus only restored for the configuration it was
+written with. Checkpoints written with other time points or other functions are ignored.
+"""
+import functools
+import os
+import pickle
+import time
+import types
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, Any, Optional
+
+import numpy as np
+
+from lukefi.metsi.app.console_logging import print_logline
+from lukefi.metsi.sim.deduplication import structural_digest
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+
+FORMAT_VERSION = 1
+CHECKPOINT_SUFFIX = ".ckpt"
+
+_REFERENCED = (types.FunctionType, types.BuiltinFunctionType, functools.partial)
+_LEAVES = (bool, int, float, complex, str, bytes, type, types.ModuleType, np.ndarray, np.generic)
+
+
+def configuration_references(value: Any) -> list[Callable]:
+    """Functions and partials of the given configuration, in the order of a depth first walk of its attributes and
+    containers. The order is the same for configurations read from the same declaration."""
+    found: list[Callable] = []
+    _collect_references(value, found, set())
+    return found
+
+
+def _collect_references(value: Any, found: list[Callable], seen: set[int]):
+    if value is None or isinstance(value, _LEAVES) or id(value) in seen:
+        return
+    seen.add(id(value))
+    if isinstance(value, _REFERENCED):
+        found.append(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _collect_references(key, found, seen)
+            _collect_references(item, found, seen)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_references(item, found, seen)
+    elif hasattr(value, "__dict__"):
+        _collect_references(vars(value), found, seen)
+
+
+def _reference_name(reference: Callable) -> str:
+    return f"{getattr(reference, '__module__', None)}.{getattr(reference, '__qualname__', type(reference).__name__)}"
+
+
+class _ReferencePickler(pickle.Pickler):
+    def __init__(self, file: IO[bytes], references: list[Callable]):
+        super().__init__(file, protocol=5)
+        self.positions = {id(reference): i for i, reference in enumerate(references)}
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        return self.positions.get(id(obj))
+
+
+class _ReferenceUnpickler(pickle.Unpickler):
+    def __init__(self, file: IO[bytes], references: list[Callable]):
+        super().__init__(file)
+        self.references = references
+
+    def persistent_load(self, pid: Any) -> Callable:
+        return self.references[pid]
+
+
+class Checkpoint[T]:
+    """Checkpoint file of the simulation of a single computational unit"""
+
+    def __init__(self, path: Path, time_points: list[int], references: list[Callable], min_interval: float):
+        self.path = path
+        self.time_points = list(time_points)
+        self.references = references
+        self.min_interval = min_interval
+        self.enabled = True
+        self.written = time.monotonic()
+
+    def _header(self, completed: int) -> dict[str, Any]:
+        return {
+            "version": FORMAT_VERSION,
+            "time_points": self.time_points,
+            "references": [_reference_name(reference) for reference in self.references],
+            "completed": completed
+        }
+
+    def restore(self) -> Optional[tuple[int, list[SimulationPayload[T]]]]:
+        """Number of completed time points and the surviving payloads after them, if a checkpoint of the unit exists"""
+        if not self.path.is_file():
+            return None
+        try:
+            with open(self.path, "rb") as file:
+                header = pickle.load(file)
+                if {**header, "completed": 0} != self._header(0):
+                    print_logline(f"Ignoring checkpoint '{self.path}' written with another configuration")
+                    return None
+                payloads = _ReferenceUnpickler(file, self.references).load()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print_logline(f"Ignoring unreadable checkpoint '{self.path}': {e}")
+            return None
+        self.written = time.monotonic()
+        return header["completed"], payloads
+
+    def save(self, completed: int, payloads: list[SimulationPayload[T]]):
+        """Write the surviving payloads after the given number of completed time points, unless the simulation is
+        complete or less than the minimum interval has passed since the previous checkpoint"""
+        if not self.enabled or completed >= len(self.time_points) \
+                or time.monotonic() - self.written < self.min_interval:
+            return
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temporary, "wb") as file:
+                pickle.dump(self._header(completed), file, protocol=5)
+                _ReferencePickler(file, self.references).dump(payloads)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            # the simulation goes on without checkpoints rather than failing
+            self.enabled = False
+            temporary.unlink(missing_ok=True)
+            print_logline(f"Checkpointing of '{self.path}' disabled, the checkpoint could not be written: {e}")
+        self.written = time.monotonic()
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+
+class Checkpointing:
+    """Configuration for checkpointing the surviving payloads of the partial tree strategy after each time point. A
+    computational unit whose checkpoint exists in the directory resumes from its last completed time point, and its
+    checkpoint is removed once its simulation is complete. Checkpoint files are named by a digest of the initial state
+    of the unit."""
+    directory: Path
+    min_interval: float
+
+    def __init__(self, directory: str | Path, min_interval: float = 0.0) -> None:
+        """
+        :param directory: directory of the checkpoint files, created when first needed
+        :param min_interval: seconds to pass since the start of the simulation of a unit or its previous checkpoint
+            before a checkpoint is written, so that units simulated quickly are not checkpointed
+        """
+        self.directory = Path(directory)
+        self.min_interval = min_interval
+
+    def open[T](self, payload: SimulationPayload[T], config: Any) -> Checkpoint[T]:
+        """Checkpoint of the simulation of the unit of the given initial payload with the given configuration"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.directory / f"{structural_digest(payload.computational_unit).hex()}{CHECKPOINT_SUFFIX}"
+        return Checkpoint(path, config.time_points, configuration_references(config), self.min_interval)
+
+
+__all__ = ["Checkpointing", "Checkpoint", "configuration_references"]
@@ -0,0 +1,172 @@
+import hashlib
+from copy import copy
+from enum import Enum
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+
+
+class Duplicate(NamedTuple):
+    """Provenance record of a payload merged into an identical representative payload. Only the data which differs
+    from the representative is kept, as the computational unit of the merged payload equals that of the
+    representative.
+
+    operation_history: operation history of the merged payload at the time of merging
+    collected_data: collected data of the merged payload at the time of merging
+    duplicates: duplicates merged earlier into the merged payload
+    time_point: the time point after which the payloads were merged
+    history_length: length of the representative's operation history at the time of merging
+    list_lengths: lengths of the representative's list type collected data at the time of merging
+    """
+    operation_history: list[tuple[int, Any, dict[str, dict]]]
+    collected_data: CollectedData
+    duplicates: "Duplicates"
+    time_point: int
+    history_length: int
+    list_lengths: dict[str, int]
+
+
+class Duplicates(tuple[Duplicate, ...]):
+    """Duplicates merged into a payload. The records are not modified after merging, so they are shared with the
+    payloads derived from it instead of being copied along with each of them."""
+
+    def __deepcopy__(self, memo: dict) -> "Duplicates":
+        return self
+
+
+class Deduplication:
+    """Configuration for merging identical payloads between time points of the partial tree strategy. Payloads are
+    considered identical when their computational units and the declared collected data tags are identical. Operation
+    history is not considered."""
+    collected_data: list[str]
+
+    def __init__(self, collected_data: Optional[list[str]] = None) -> None:
+        self.collected_data = collected_data or []
+
+    def digest(self, payload: SimulationPayload) -> bytes:
+        hasher = hashlib.blake2b(digest_size=16)
+        _update_digest(hasher, payload.computational_unit, set())
+        for tag in self.collected_data:
+            _update_digest(hasher, tag, set())
+            _update_digest(hasher, payload.collected_data.operation_results.get(tag), set())
+        return hasher.digest()
+
+
+def structural_digest(value: Any) -> bytes:
+    """Digest of the structure and contents of the given value, equal for equal values across processes"""
+    hasher = hashlib.blake2b(digest_size=16)
+    _update_digest(hasher, value, set())
+    return hasher.digest()
+
+
+def _update_digest(hasher, value: Any, seen: set[int]):
+    """Feed a structural representation of the given value into the hasher. Objects are walked through their
+    attributes. Objects already visited, such as back-references, are skipped."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes, Enum, type, np.dtype, np.generic)):
+        hasher.update(repr(value).encode())
+        return
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        hasher.update(f"{value.dtype.str}{value.shape}".encode())
+        if value.dtype.hasobject:
+            for item in value.flat:
+                _update_digest(hasher, item, seen)
+        else:
+            hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        hasher.update(b"{")
+        for key in sorted(value.keys(), key=repr):
+            _update_digest(hasher, key, seen)
+            _update_digest(hasher, value[key], seen)
+        hasher.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b"[")
+        for item in value:
+            _update_digest(hasher, item, seen)
+        hasher.update(b"]")
+    elif hasattr(value, "__dict__"):
+        hasher.update(type(value).__qualname__.encode())
+        _update_digest(hasher, vars(value), seen)
+    else:
+        hasher.update(repr(value).encode())
+
+
+def duplicates_of(payload: SimulationPayload) -> Duplicates:
+    return getattr(payload, "duplicates", Duplicates())
+
+
+def inherit_duplicates[T](parent: SimulationPayload[T], children: list[SimulationPayload[T]]):
+    """Carry the duplicates merged into a parent payload over to all payloads derived from it."""
+    duplicates = duplicates_of(parent)
+    if len(duplicates) == 0:
+        return
+    for child in children:
+        child.duplicates = duplicates
+
+
+def merge_duplicates[T](payloads: list[SimulationPayload[T]],
+                        deduplication: Optional[Deduplication],
+                        time_point: int) -> tuple[list[SimulationPayload[T]], int]:
+    """Collapse identical payloads into the first occurring representative payload. The merged payloads are recorded as
+    provenance of the representative so that they can be restored with expand_duplicates.
+
+    :param payloads: surviving payloads of a time point
+    :param deduplication: deduplication configuration or None for no deduplication
+    :param time_point: the time point which has just been evaluated
+    :return: a tuple of the unique payloads and the number of payloads merged
+    """
+    if deduplication is None or len(payloads) < 2:
+        return payloads, 0
+    representatives: dict[bytes, SimulationPayload[T]] = {}
+    for payload in payloads:
+        key = deduplication.digest(payload)
+        representative = representatives.get(key)
+        if representative is None:
+            representatives[key] = payload
+            continue
+        duplicate = Duplicate(
+            operation_history=payload.operation_history,
+            collected_data=payload.collected_data,
+            duplicates=duplicates_of(payload),
+            time_point=time_point,
+            history_length=len(representative.operation_history),
+            list_lengths={tag: len(value) for tag, value in representative.collected_data.operation_results.items()
+                          if isinstance(value, list)})
+        representative.duplicates = Duplicates((*duplicates_of(representative), duplicate))
+    unique = list(representatives.values())
+    return unique, len(payloads) - len(unique)
+
+
+def _expand_duplicate[T](representative: SimulationPayload[T], duplicate: Duplicate) -> SimulationPayload[T]:
+    """Restore a merged payload as if it had been evaluated along with its representative. The state and any data
+    collected after merging come from the representative."""
+    restored = copy(representative)
+    collected_data = copy(duplicate.collected_data)
+    for tag, value in representative.collected_data.operation_results.items():
+        if isinstance(value, list):
+            collected_data.get_list_result(tag).extend(value[duplicate.list_lengths.get(tag, 0):])
+        elif isinstance(value, dict):
+            collected_data.get(tag).update({k: v for k, v in value.items() if k > duplicate.time_point})
+    collected_data.current_time_point = representative.collected_data.current_time_point
+    restored.collected_data = collected_data
+    restored.operation_history = duplicate.operation_history[:] + \
+        representative.operation_history[duplicate.history_length:]
+    restored.duplicates = duplicate.duplicates
+    return restored
+
+
+def expand_duplicates[T](payloads: list[SimulationPayload[T]]) -> list[SimulationPayload[T]]:
+    """Expand all merged payloads back into individual result payloads, placing each after its representative."""
+    result: list[SimulationPayload[T]] = []
+    for payload in payloads:
+        duplicates = duplicates_of(payload)
+        if hasattr(payload, "duplicates"):
+            del payload.duplicates
+        result.append(payload)
+        result.extend(expand_duplicates([_expand_duplicate(payload, duplicate) for duplicate in duplicates]))
+    return result
@@ -11,6 +11,24 @@ def identity[T](x: T) -> T:
     return x
 
 
+def _operation_chains[T](node: "EventTree[T]", known: dict[int, Optional[list[list[ProcessedTreatment[T]]]]]
+                         ) -> list[list[ProcessedTreatment[T]]]:
+    """Operation chains of the given node, memoizing the chains of nodes in the known dict by node identity"""
+    if len(node.branches) == 0:
+        # Yes. A leaf node returns a single chain with a single operation.
+        return [[node.processed_treatment]]
+    cached = known.get(id(node))
+    if cached is not None:
+        return cached
+    result: list[list[ProcessedTreatment[T]]] = []
+    for branch in node.branches:
+        for chain in _operation_chains(branch, known):
+            result.append([node.processed_treatment] + chain)
+    # chains are retained only for nodes reached from a second parent, so plain trees are not held in memory
+    known[id(node)] = result if id(node) in known else None
+    return result
+
+
 class EventTree[T]:
     """
     Event represents a computational operation in a tree of following event paths.
@@ -29,17 +47,9 @@ class EventTree[T]:
     def operation_chains(self) -> list[list[ProcessedTreatment[T]]]:
         """
         Recursively produce a list of lists of possible operation chains represented by this event tree in post-order
-        traversal.
+        traversal. Chains of nodes shared by several parents are produced only once.
         """
-        if len(self.branches) == 0:
-            # Yes. A leaf node returns a single chain with a single operation.
-            return [[self.processed_treatment]]
-        result: list[list[ProcessedTreatment[T]]] = []
-        for branch in self.branches:
-            chains = branch.operation_chains()
-            for chain in chains:
-                result.append([self.processed_treatment] + chain)
-        return result
+        return _operation_chains(self, {})
 
     def evaluate(self,
                  payload: SimulationPayload[T],
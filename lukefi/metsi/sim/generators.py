@@ -22,7 +22,7 @@ ProcessedGenerator = Callable[[Optional[list[EventTree[T]]]], list[EventTree[T]]
 class GeneratorBase[T](ABC):
     """Shared abstract base class for Generator and Event types."""
     @abstractmethod
-    def unwrap(self, parents: list[EventTree[T]], time_point: int) -> list[EventTree[T]]:
+    def unwrap(self, parents: list[EventTree[T]], time_point: int, shared: bool = False) -> list[EventTree[T]]:
         pass
 
 
@@ -35,15 +35,20 @@ class Generator[T](GeneratorBase, ABC):
         self.children = children
         self.time_point = time_point
 
-    def compose_nested(self) -> EventTree[T]:
+    def compose_nested(self, shared: bool = False) -> EventTree[T]:
         """
         Generate a simulation EventTree using the given NestableGenerator.
 
-        :param nestable_generator: NestableGenerator tree for generating a EventTree.
+        In shared mode, each event is composed into a single node attached to all of its parents, instead of a node per
+        parent. The subtrees following such parents are identical, so the result is a directed acyclic graph whose node
+        count scales with the size of the declaration rather than with the number of its operation chains. Walking the
+        shared tree produces the same operation chains and results as walking the corresponding plain tree.
+
+        :param shared: compose the EventTree as a directed acyclic graph sharing identical subtrees
         :return: The root node of the generated EventTree
         """
         root: EventTree[T] = EventTree()
-        self.unwrap([root], 0)
+        self.unwrap([root], 0, shared)
         return root
 
 
@@ -51,10 +56,10 @@ class Sequence[T](Generator[T]):
     """Generator for sequential events."""
 
     @override
-    def unwrap(self, parents: list[EventTree], time_point: int) -> list[EventTree]:
+    def unwrap(self, parents: list[EventTree], time_point: int, shared: bool = False) -> list[EventTree]:
         current = parents
         for child in self.children:
-            current = child.unwrap(current, self.time_point or time_point)
+            current = child.unwrap(current, self.time_point or time_point, shared)
         return current
 
 
@@ -62,10 +67,10 @@ class Alternatives[T](Generator[T]):
     """Generator for branching events"""
 
     @override
-    def unwrap(self, parents: list[EventTree], time_point: int) -> list[EventTree]:
+    def unwrap(self, parents: list[EventTree], time_point: int, shared: bool = False) -> list[EventTree]:
         retval = []
         for child in self.children:
-            retval.extend(child.unwrap(parents, self.time_point or time_point))
+            retval.extend(child.unwrap(parents, self.time_point or time_point, shared))
         return retval
 
 
@@ -105,7 +110,12 @@ class Event[T](GeneratorBase):
             self.postconditions = []
 
     @override
-    def unwrap(self, parents: list[EventTree], time_point: int) -> list[EventTree]:
+    def unwrap(self, parents: list[EventTree], time_point: int, shared: bool = False) -> list[EventTree]:
+        if shared:
+            branch = EventTree(self._prepare_paremeterized_treatment(time_point))
+            for parent in parents:
+                parent.add_branch(branch)
+            return [branch]
         retval = []
         for parent in parents:
             branch = EventTree(self._prepare_paremeterized_treatment(time_point))
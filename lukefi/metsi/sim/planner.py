@@ -0,0 +1,184 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from lukefi.metsi.app.metsi_enum import EvaluationStrategy, FormationStrategy
+from lukefi.metsi.sim.event_tree import EventTree
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
+
+# approximate memory use of a composed EventTree node with its prepared treatment closure
+EVENT_TREE_NODE_NBYTES = 1000
+
+
+@dataclass
+class TimePointPlan:
+    """Shape of the partial event tree of a single time point and the number of alternatives flowing through it.
+    All counts are upper bounds, as the plan does not know which conditions would fail."""
+    time_point: int
+    nodes: int  # event nodes of a single partial tree, excluding its root
+    leaves: int  # alternatives produced from a single incoming alternative
+    branch_copies: int  # payload copies made at branching nodes of a single partial tree
+    chain_operations: int  # event evaluations over all operation chains of a single partial tree
+    width_in: int  # alternatives entering the time point
+    width_out: int  # alternatives leaving the time point
+    shared_nodes: int  # event nodes of the time point when composed as a shared event tree
+
+
+@dataclass
+class StrategyPlan:
+    """Projected cost of one formation and evaluation strategy combination for a single computational unit."""
+    formation_strategy: FormationStrategy
+    evaluation_strategy: EvaluationStrategy
+    tree_nodes: int  # peak number of event tree nodes held at once
+    operations: int  # event evaluations
+    copies: int  # payload copies
+    peak_states: int  # peak number of computational unit states held at once
+
+    def peak_nbytes(self, unit_nbytes: int) -> int:
+        return self.peak_states * unit_nbytes + self.tree_nodes * EVENT_TREE_NODE_NBYTES
+
+
+@dataclass
+class SimulationPlan:
+    """Dry-run analysis of the event trees produced by a simulation configuration."""
+    time_points: list[TimePointPlan]
+    strategies: list[StrategyPlan] = field(default_factory=list)
+    shared_event_tree: bool = False
+
+    @property
+    def leaves(self) -> int:
+        return self.time_points[-1].width_out if self.time_points else 1
+
+    @property
+    def full_tree_nodes(self) -> int:
+        return 1 + sum(tp.width_in * tp.nodes for tp in self.time_points)
+
+    @property
+    def shared_tree_nodes(self) -> int:
+        return 1 + sum(tp.shared_nodes for tp in self.time_points)
+
+    def feasible(self, unit_nbytes: int = 1, memory_budget: Optional[int] = None) -> list[StrategyPlan]:
+        """Strategy combinations whose projected peak memory fits the given budget. Without a budget, combinations
+        within twice the smallest projected peak memory are considered feasible. If none fit, the combination with the
+        smallest projected peak memory is the only feasible one."""
+        smallest = min(self.strategies, key=lambda s: (s.peak_nbytes(unit_nbytes), s.operations))
+        limit = memory_budget if memory_budget is not None else 2 * smallest.peak_nbytes(unit_nbytes)
+        candidates = [s for s in self.strategies if s.peak_nbytes(unit_nbytes) <= limit]
+        return candidates if len(candidates) > 0 else [smallest]
+
+    def recommended(self, unit_nbytes: int = 1, memory_budget: Optional[int] = None) -> StrategyPlan:
+        """Recommend the feasible strategy combination with the fewest event evaluations."""
+        return min(self.feasible(unit_nbytes, memory_budget),
+                   key=lambda s: (s.operations, s.peak_nbytes(unit_nbytes)))
+
+
+def _distinct_nodes(node: EventTree, seen: set[int]) -> int:
+    """Count the distinct nodes below the given event tree, visiting shared nodes once."""
+    count = 0
+    for branch in node.branches:
+        if id(branch) not in seen:
+            seen.add(id(branch))
+            count += 1 + _distinct_nodes(branch, seen)
+    return count
+
+
+def _walk(node: EventTree, depth: int = 0) -> tuple[int, int, int, int]:
+    """Count nodes below, leaves, branching copies and chain operations of the given event tree."""
+    if len(node.branches) == 0:
+        return 0, 1, 0, depth
+    nodes, leaves, copies, operations = 0, 0, 0, 0
+    if len(node.branches) > 1:
+        copies += len(node.branches)
+    for branch in node.branches:
+        b_nodes, b_leaves, b_copies, b_operations = _walk(branch, depth + 1)
+        nodes += 1 + b_nodes
+        leaves += b_leaves
+        copies += b_copies
+        operations += b_operations
+    return nodes, leaves, copies, operations
+
+
+def plan_simulation(config: SimConfiguration) -> SimulationPlan:
+    """Analyze the simulation event trees declared in the given configuration without evaluating any events. Only the
+    partial tree of each time point is composed. Counts for the full tree are derived from these, as the full tree
+    attaches a copy of the next time point's tree into each leaf of the previous one.
+
+    :param config: a prepared SimConfiguration object
+    :return: the SimulationPlan with per time point tree shapes and projected costs per strategy combination
+    """
+    time_points: list[TimePointPlan] = []
+    width = 1
+    for time_point, generator in config.partial_tree_generators_by_time_point().items():
+        nodes, leaves, copies, operations = _walk(generator.compose_nested())
+        shared_nodes = _distinct_nodes(generator.compose_nested(shared=True), set())
+        time_points.append(
+            TimePointPlan(time_point, nodes, leaves, copies, operations, width, width * leaves, shared_nodes))
+        width *= leaves
+    plan = SimulationPlan(time_points, shared_event_tree=config.shared_event_tree)
+    plan.strategies = _strategy_plans(plan)
+    return plan
+
+
+def _strategy_plans(plan: SimulationPlan) -> list[StrategyPlan]:
+    tps = plan.time_points
+    full_nodes = plan.full_tree_nodes
+    full_tree_nodes = plan.shared_tree_nodes if plan.shared_event_tree else full_nodes
+    # every chain of the full tree passes through each time point, repeating its operations for each later branch
+    full_chain_operations = sum(tp.width_in * tp.chain_operations * (plan.leaves // tp.width_out) for tp in tps)
+    # the partial strategy composes the trees of all time points up front, but evaluates one tree at a time
+    partial_nodes = sum(tp.nodes + 1 for tp in tps)
+    widest_tree = max((tp.nodes + 1 for tp in tps), default=1)
+    partial_peak = max((tp.width_in + tp.width_out for tp in tps), default=1)
+    depth_copies = sum(tp.width_in * tp.branch_copies for tp in tps)
+    return [
+        # Chains are deep copied once each, one at a time, and all results are kept.
+        StrategyPlan(FormationStrategy.FULL, EvaluationStrategy.CHAINS,
+                     tree_nodes=full_tree_nodes,
+                     operations=full_chain_operations,
+                     copies=plan.leaves,
+                     peak_states=plan.leaves + 1),
+        # The depth first evaluator records a deep copy of the state of every evaluated node in a state tree.
+        StrategyPlan(FormationStrategy.FULL, EvaluationStrategy.DEPTH,
+                     tree_nodes=full_tree_nodes,
+                     operations=full_nodes - 1,
+                     copies=depth_copies,
+                     peak_states=plan.leaves + full_nodes),
+        StrategyPlan(FormationStrategy.PARTIAL, EvaluationStrategy.CHAINS,
+                     tree_nodes=partial_nodes,
+                     operations=sum(tp.width_in * tp.chain_operations for tp in tps),
+                     copies=sum(tp.width_out for tp in tps),
+                     peak_states=partial_peak + 1),
+        StrategyPlan(FormationStrategy.PARTIAL, EvaluationStrategy.DEPTH,
+                     tree_nodes=partial_nodes,
+                     operations=sum(tp.width_in * tp.nodes for tp in tps),
+                     copies=depth_copies,
+                     peak_states=partial_peak + widest_tree),
+    ]
+
+
+def plan_report(plan: SimulationPlan, unit_nbytes: Optional[list[int]] = None) -> list[str]:
+    """Render the given plan as human readable report lines.
+
+    :param plan: a SimulationPlan
+    :param unit_nbytes: optional sizes in bytes of the computational units to project memory use for
+    :return: list of report lines
+    """
+    lines = [f"{'time point':>10} {'nodes':>10} {'leaves':>8} {'width in':>12} {'width out':>12}"]
+    for tp in plan.time_points:
+        lines.append(f"{tp.time_point:>10} {tp.nodes:>10} {tp.leaves:>8} {tp.width_in:>12} {tp.width_out:>12}")
+    lines.append(f"Alternatives per unit: {plan.leaves}, full tree nodes: {plan.full_tree_nodes}, "
+                 f"shared full tree nodes: {plan.shared_tree_nodes}")
+    largest = max(unit_nbytes or [], default=0)
+    for strategy in plan.strategies:
+        line = (f"{strategy.formation_strategy.value}/{strategy.evaluation_strategy.value}: "
+                f"tree nodes {strategy.tree_nodes}, operations {strategy.operations}, copies {strategy.copies}, "
+                f"peak states {strategy.peak_states}")
+        if unit_nbytes:
+            line += f", peak bytes for largest unit {strategy.peak_nbytes(largest)}"
+        lines.append(line)
+    if unit_nbytes:
+        lines.append(f"Units: {len(unit_nbytes)}, bytes per unit mean {sum(unit_nbytes) // len(unit_nbytes)}, "
+                     f"max {largest}, result bytes total {plan.leaves * sum(unit_nbytes)}")
+    recommended = plan.recommended(largest or 1)
+    lines.append(f"Recommended: formation_strategy '{recommended.formation_strategy.value}', "
+                 f"evaluation_strategy '{recommended.evaluation_strategy.value}'")
+    return lines
@@ -0,0 +1,70 @@
+from collections.abc import Callable
+from typing import Any
+
+from lukefi.metsi.app.utils import ConfigurationException
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+
+
+class PruningRule[T]:
+    """Rule for bounding the number of alternatives carried over a time point of the partial tree strategy. The rule
+    receives all surviving payloads of a time point and returns the ones to keep, in their original order."""
+    rule: Callable[[list[SimulationPayload[T]]], list[SimulationPayload[T]]]
+
+    def __init__(self, rule: Callable[[list[SimulationPayload[T]]], list[SimulationPayload[T]]]) -> None:
+        self.rule = rule
+
+    def __call__(self, payloads: list[SimulationPayload[T]]) -> list[SimulationPayload[T]]:
+        return self.rule(payloads)
+
+
+class TopK[T](PruningRule[T]):
+    """Keep the k payloads with the highest score. Payloads scored as None are ranked last."""
+
+    def __init__(self, k: int, score: Callable[[SimulationPayload[T]], Any]) -> None:
+        if k < 1:
+            raise ConfigurationException(f"TopK pruning requires a positive k, got {k}")
+        super().__init__(lambda payloads: _keep_top_k(payloads, k, score))
+
+
+class Dominance[T](PruningRule[T]):
+    """Keep the payloads which are not dominated by any other payload. The given predicate tells whether its first
+    argument dominates its second argument."""
+
+    def __init__(self, dominates: Callable[[SimulationPayload[T], SimulationPayload[T]], bool]) -> None:
+        super().__init__(lambda payloads: _keep_non_dominated(payloads, dominates))
+
+
+def _keep_top_k[T](payloads: list[SimulationPayload[T]],
+                   k: int,
+                   score: Callable[[SimulationPayload[T]], Any]) -> list[SimulationPayload[T]]:
+    if len(payloads) <= k:
+        return payloads
+    scores = [score(payload) for payload in payloads]
+    ranked = sorted(range(len(payloads)),
+                    key=lambda i: (scores[i] is not None, scores[i] if scores[i] is not None else 0),
+                    reverse=True)
+    kept = sorted(ranked[:k])
+    return [payloads[i] for i in kept]
+
+
+def _keep_non_dominated[T](payloads: list[SimulationPayload[T]],
+                           dominates: Callable[[SimulationPayload[T], SimulationPayload[T]], bool]
+                           ) -> list[SimulationPayload[T]]:
+    return [
+        candidate for i, candidate in enumerate(payloads)
+        if not any(dominates(other, candidate) for j, other in enumerate(payloads) if i != j)
+    ]
+
+
+def prune_alternatives[T](payloads: list[SimulationPayload[T]],
+                          pruning: PruningRule[T] | None) -> tuple[list[SimulationPayload[T]], int]:
+    """Apply the optional pruning rule to the given payloads.
+
+    :param payloads: surviving payloads of a time point
+    :param pruning: a pruning rule or None for no pruning
+    :return: a tuple of the kept payloads and the number of payloads pruned
+    """
+    if pruning is None or len(payloads) == 0:
+        return payloads, 0
+    kept = pruning(payloads)
+    return kept, len(payloads) - len(kept)
@@ -5,8 +5,9 @@ from lukefi.metsi.app.console_logging import print_logline
 from lukefi.metsi.app.utils import ConditionFailed
 from lukefi.metsi.sim.collected_data import CollectedData
 from lukefi.metsi.sim.event_tree import EventTree
+from lukefi.metsi.sim.deduplication import expand_duplicates, inherit_duplicates, merge_duplicates
 from lukefi.metsi.sim.generators import Generator
-
+from lukefi.metsi.sim.pruning import prune_alternatives
 from lukefi.metsi.sim.simulation_payload import SimulationPayload
 from lukefi.metsi.sim.sim_configuration import SimConfiguration
 from lukefi.metsi.sim.state_tree import StateTree
@@ -66,7 +67,9 @@ def run_full_tree_strategy(payload: SimulationPayload[T], config: SimConfigurati
                            evaluator: Evaluator[T] = chain_evaluator) -> list[SimulationPayload[T]]:
     """Process the given operation payload using a simulation state tree created from the declaration. Full simulation
     tree and operation chains are pre-generated for the run. This tree strategy creates the full theoretical branching
-    tree for the simulation, carrying a significant memory and runtime overhead for large trees.
+    tree for the simulation, carrying a significant memory and runtime overhead for large trees. If the configuration
+    declares a shared event tree, identical subtrees are composed only once, and memory use of the tree scales with the
+    size of the declaration instead of the number of alternatives.
 
     :param payload: a simulation state payload
     :param config: a prepared SimConfiguration object
@@ -75,7 +78,7 @@ def run_full_tree_strategy(payload: SimulationPayload[T], config: SimConfigurati
     """
 
     nestable_generator: Generator[T] = config.full_tree_generators()
-    root_node: EventTree[T] = nestable_generator.compose_nested()
+    root_node: EventTree[T] = nestable_generator.compose_nested(config.shared_event_tree)
     result = evaluator(payload, root_node)
     return result
 
@@ -87,6 +90,12 @@ def run_partial_tree_strategy(payload: SimulationPayload[T], config: SimConfigur
     tree and operation chains are generated and executed in order per simulation time point. This reduces the amount of
     redundant, always-failing operation chains and redundant branches of the simulation tree.
 
+    If the configuration declares deduplication, identical surviving payloads are merged after each time point and
+    expanded back into individual results after the last time point. If the configuration declares a pruning rule, it
+    is then applied to the surviving payloads to bound the number of alternatives carried forward. If the
+    configuration declares checkpointing, the surviving payloads are checkpointed after each time point, and a
+    checkpointed computational unit resumes from its last completed time point.
+
     :param payload: a simulation state payload
     :param config: a prepared SimConfiguration object
     :param evaluator: a function for performing computation from given EventTree and for given OperationPayload
@@ -100,14 +109,33 @@ def run_partial_tree_strategy(payload: SimulationPayload[T], config: SimConfigur
     for time_point, nestable_generator in generators_by_time_point.items():
         root_nodes[time_point] = nestable_generator.compose_nested()
 
-    for time_point in config.time_points:
+    checkpoint = None if config.checkpointing is None else config.checkpointing.open(payload, config)
+    completed = 0
+    if checkpoint is not None and (restored := checkpoint.restore()) is not None:
+        completed, results = restored
+        print_logline(f"Resuming from checkpoint after time point {config.time_points[completed - 1]} "
+                      f"with {len(results)} alternatives")
+
+    for completed, time_point in enumerate(config.time_points[completed:], completed + 1):
         root_node = root_nodes[time_point]
         time_point_results: list[SimulationPayload[T]] = []
         for payload_ in results:
             payload_results = evaluator(payload_, root_node)
+            inherit_duplicates(payload_, payload_results)
             time_point_results.extend(payload_results)
+        time_point_results, merged = merge_duplicates(time_point_results, config.deduplication, time_point)
+        if merged > 0:
+            print_logline(f"Merged {merged} identical alternatives at time point {time_point}")
+        time_point_results, pruned = prune_alternatives(time_point_results, config.pruning)
+        if pruned > 0:
+            print_logline(f"Pruned {pruned} alternatives at time point {time_point}, "
+                          f"{len(time_point_results)} remaining")
         results = time_point_results
-    return results
+        if checkpoint is not None:
+            checkpoint.save(completed, results)
+    if checkpoint is not None:
+        checkpoint.remove()
+    return expand_duplicates(results)
 
 
 def default_runner(units: list[T],
@@ -1,4 +1,8 @@
 from types import SimpleNamespace
+from typing import Optional
+from lukefi.metsi.sim.checkpoint import Checkpointing
+from lukefi.metsi.sim.deduplication import Deduplication
+from lukefi.metsi.sim.pruning import PruningRule
 from lukefi.metsi.sim.simulation_instruction import SimulationInstruction, generator_declarations_for_time_point
 from lukefi.metsi.sim.generators import Generator, Sequence
 
@@ -10,12 +14,22 @@ class SimConfiguration[T](SimpleNamespace):
     Attributes:
         instructions: A list of instructions for the simulation.
         time_points: A sorted list of unique time points derived from the simulation instructions.
+        deduplication: Optional merging of identical alternatives between time points of the partial tree strategy.
+        pruning: An optional rule for pruning alternatives after each time point of the partial tree strategy.
+        shared_event_tree: Compose the event tree of the full tree strategy as a directed acyclic graph sharing
+            identical subtrees.
+        checkpointing: Optional checkpointing of the surviving payloads after each time point of the partial tree
+            strategy.
     Methods:
         __init__(**kwargs):
             Initializes the SimConfiguration instance with keyword arguments.
     """
     instructions: list[SimulationInstruction[T]] = []
     time_points: list[int] = []
+    deduplication: Optional[Deduplication] = None
+    pruning: Optional[PruningRule[T]] = None
+    shared_event_tree: bool = False
+    checkpointing: Optional[Checkpointing] = None
 
     def __init__(self, **kwargs):
         """
@@ -1,6 +1,9 @@
-from typing import Any
+import time
+from typing import Any, Optional
 from lukefi.metsi.app.app_io import MetsiConfiguration
+from lukefi.metsi.app.console_logging import print_logline
 from lukefi.metsi.app.metsi_enum import FormationStrategy, EvaluationStrategy
+from lukefi.metsi.sim.planner import StrategyPlan, plan_simulation
 from lukefi.metsi.sim.runners import (
     Runner,
     default_runner,
@@ -8,10 +11,11 @@ from lukefi.metsi.sim.runners import (
     run_partial_tree_strategy,
     depth_first_evaluator,
     chain_evaluator)
-from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.app.utils import ConfigurationException, MetsiException
 from lukefi.metsi.sim.runners import Evaluator
 from lukefi.metsi.sim.runners import TreeRunner
 from lukefi.metsi.sim.sim_configuration import SimConfiguration
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
 
 _FORMATION_STRATEGY_MAP: dict[FormationStrategy, TreeRunner] = {
     FormationStrategy.FULL: run_full_tree_strategy,
@@ -23,12 +27,95 @@ _EVALUATION_STRATEGY_MAP: dict[EvaluationStrategy, Evaluator] = {
     EvaluationStrategy.CHAINS: chain_evaluator
 }
 
+# simulation configuration applied by the partial tree strategy only
+_PARTIAL_TREE_ONLY = ("pruning", "deduplication", "checkpointing")
+
+
+class AutoStrategy[T]:
+    """TreeRunner choosing the formation and evaluation strategy combination for each computational unit.
+
+    Candidates are the combinations of the simulation plan allowed by the configured strategies, restricted to those
+    whose projected peak memory is feasible for the size of the unit. Combinations planned to take more than
+    probe_ratio times the event evaluations of the cheapest allowed combination are not candidates, so that a full tree
+    growing exponentially with the number of time points is never run just to time it. Each candidate is first run
+    for a number of calibration units to measure its time per event evaluation. After that, the candidate with the
+    smallest projected time for the plan is chosen. The evaluator passed in by the runner is ignored, as the
+    evaluation strategy is chosen along with the formation strategy."""
+
+    def __init__(self,
+                 config: SimConfiguration[T],
+                 formation_strategy: FormationStrategy = FormationStrategy.AUTO,
+                 evaluation_strategy: EvaluationStrategy = EvaluationStrategy.AUTO,
+                 calibration_units: int = 2,
+                 probe_ratio: float = 4.0):
+        self.plan = plan_simulation(config)
+        self.candidates = [
+            s for s in self.plan.strategies
+            if formation_strategy in (FormationStrategy.AUTO, s.formation_strategy)
+            and evaluation_strategy in (EvaluationStrategy.AUTO, s.evaluation_strategy)]
+        if any(getattr(config, name) is not None for name in _PARTIAL_TREE_ONLY):
+            self.candidates = [s for s in self.candidates if s.formation_strategy == FormationStrategy.PARTIAL]
+        if len(self.candidates) == 0:
+            raise MetsiException(f"Unable to resolve automatic strategy for formation strategy "
+                                 f"'{formation_strategy}' and evaluation strategy '{evaluation_strategy}'")
+        fewest_operations = max(min(s.operations for s in self.candidates), 1)
+        self.candidates = [s for s in self.candidates if s.operations <= probe_ratio * fewest_operations]
+        self.calibration_units = calibration_units
+        self.timings: dict[tuple[FormationStrategy, EvaluationStrategy], list[float]] = {}
+        self.selected: Optional[StrategyPlan] = None
+
+    def seconds_per_operation(self, strategy: StrategyPlan) -> Optional[float]:
+        timings = self.timings.get((strategy.formation_strategy, strategy.evaluation_strategy), [])
+        if len(timings) < self.calibration_units:
+            return None
+        return sum(timings) / len(timings)
+
+    def select(self, unit_nbytes: int = 1) -> StrategyPlan:
+        feasible = [s for s in self.plan.feasible(unit_nbytes) if s in self.candidates]
+        if len(feasible) == 0:
+            feasible = [min(self.candidates, key=lambda s: (s.peak_nbytes(unit_nbytes), s.operations))]
+        uncalibrated = [s for s in feasible if self.seconds_per_operation(s) is None]
+        if len(uncalibrated) > 0:
+            return min(uncalibrated, key=lambda s: (s.operations, s.peak_nbytes(unit_nbytes)))
+        projected = [(seconds * s.operations, s) for s in feasible
+                     if (seconds := self.seconds_per_operation(s)) is not None]
+        return min(projected, key=lambda projection: projection[0])[1]
+
+    def __call__(self,
+                 payload: SimulationPayload[T],
+                 config: SimConfiguration[T],
+                 evaluator: Evaluator[T] = depth_first_evaluator) -> list[SimulationPayload[T]]:
+        _ = evaluator
+        strategy = self.select(int(getattr(payload.computational_unit, 'nbytes', 1)))
+        seconds_per_operation = self.seconds_per_operation(strategy)
+        if strategy != self.selected:
+            reason = "calibrating" if seconds_per_operation is None \
+                else f"projected {seconds_per_operation * strategy.operations:.3f} s per unit"
+            print_logline(f"Selected formation_strategy '{strategy.formation_strategy.value}', "
+                          f"evaluation_strategy '{strategy.evaluation_strategy.value}' ({reason})")
+            self.selected = strategy
+        start = time.perf_counter()
+        result = _FORMATION_STRATEGY_MAP[strategy.formation_strategy](
+            payload, config, _EVALUATION_STRATEGY_MAP[strategy.evaluation_strategy])
+        elapsed = time.perf_counter() - start
+        self.timings.setdefault((strategy.formation_strategy, strategy.evaluation_strategy), []) \
+            .append(elapsed / max(strategy.operations, 1))
+        return result
+
 
 def simulate_alternatives[T](config: MetsiConfiguration,
                              control: dict[str, Any],
                              stands: list[T],
                              runner: Runner[T] = default_runner):
     simconfig = SimConfiguration[T](**control)
+    if config.formation_strategy == FormationStrategy.FULL:
+        for name in _PARTIAL_TREE_ONLY:
+            if getattr(simconfig, name) is not None:
+                raise ConfigurationException(f"'{name}' is applied by the partial tree strategy only, "
+                                             f"it can not be declared with formation_strategy 'full'")
+    if config.formation_strategy == FormationStrategy.AUTO or config.evaluation_strategy == EvaluationStrategy.AUTO:
+        auto_strategy = AutoStrategy[T](simconfig, config.formation_strategy, config.evaluation_strategy)
+        return runner(stands, simconfig, auto_strategy, depth_first_evaluator)
     formation_strategy = _resolve_formation_strategy(config.formation_strategy)
     evaluation_strategy = _resolve_evaluation_strategy(config.evaluation_strategy)
     result = runner(stands, simconfig, formation_strategy, evaluation_strategy)
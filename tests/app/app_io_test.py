@@ -10,10 +10,20 @@ class TestAppIO(unittest.TestCase):
     def test_sim_cli_arguments(self):
         args = ['input.dat', 'out', 'control.py']
         result = parse_cli_arguments(args)
-        self.assertEqual(3, len(result.keys()))
+        self.assertEqual(5, len(result.keys()))
         self.assertEqual('input.dat', result['input_path'])
         self.assertEqual('out', result['target_directory'])
         self.assertEqual('control.py', result['control_file'])
+        self.assertFalse(result['dry_run'])
+        self.assertFalse(result['resume'])
+
+    def test_dry_run_cli_argument(self):
+        result = generate_application_configuration(parse_cli_arguments(['input.dat', 'out', '--dry-run']))
+        self.assertTrue(result.dry_run)
+
+    def test_resume_cli_argument(self):
+        result = generate_application_configuration(parse_cli_arguments(['input.dat', 'out', '--resume']))
+        self.assertTrue(result.resume)
 
     def test_control_configurations(self):
         args = ['cli_input', 'cli_output', 'cli_control.py']
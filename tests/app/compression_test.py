@@ -0,0 +1,56 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+from lukefi.metsi.app import compression
+from lukefi.metsi.app.utils import MetsiException
+
+
+class CompressionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compressed_path(self):
+        self.assertEqual(Path("a.csv"), compression.compressed_path("a.csv", None))
+        self.assertEqual(Path("a.csv.gz"), compression.compressed_path("a.csv", "gzip"))
+        self.assertEqual(Path("a.csv.bz2"), compression.compressed_path("a.csv", "bz2"))
+        self.assertEqual(Path("a.csv.xz"), compression.compressed_path("a.csv", "lzma"))
+        self.assertRaises(MetsiException, compression.compressed_path, "a.csv", "zip")
+
+    def test_compression_of(self):
+        self.assertIsNone(compression.compression_of("a.csv"))
+        self.assertEqual("gzip", compression.compression_of("a.csv.gz"))
+        self.assertEqual("lzma", compression.compression_of(Path("a.csv.xz")))
+
+    def test_open_file(self):
+        for codec in ("gzip", "bz2", "lzma", None):
+            path = compression.compressed_path(Path(self.tmp.name, "rows.csv"), codec)
+            with compression.open_file(path, "w", encoding="utf-8", newline="\n", buffering=1024) as file:
+                file.write("a;b\n")
+            with compression.open_file(path, "a", encoding="utf-8", newline="\n") as file:
+                file.write("c;d\n")
+            with compression.open_file(path, "r", encoding="utf-8") as file:
+                self.assertEqual(["a;b\n", "c;d\n"], file.readlines(), codec)
+
+    def test_chunked(self):
+        for codec in ("gzip", "bz2", "lzma"):
+            path = compression.compressed_path(Path(self.tmp.name, "stands.csv"), codec)
+            compression.write_chunked(path, [(["1", "2"], "stand;1\nstand;2\n"), (["3"], "stand;3\n")], "header\n")
+            self.assertTrue(compression.is_chunked(path))
+            index = compression.read_chunk_index(path)
+            self.assertEqual(index["1"], index["2"])
+            self.assertEqual("stand;3\n", compression.read_chunk(path, *index["3"]))
+            with compression.open_file(path, "r", encoding="utf-8") as file:
+                self.assertEqual("header\nstand;1\nstand;2\nstand;3\n", file.read(), codec)
+
+    def test_chunked_requires_codec(self):
+        self.assertRaises(MetsiException, compression.write_chunked, Path(self.tmp.name, "stands.csv"), [])
+
+    def test_gzip_members(self):
+        path = Path(self.tmp.name, "stands.csv.gz")
+        compression.write_chunked(path, [(["1"], "a\n"), (["2"], "b\n")])
+        self.assertEqual(b"a\nb\n", gzip.decompress(path.read_bytes()))
@@ -0,0 +1,128 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from lukefi.metsi.app import daemon
+from lukefi.metsi.app.file_io import pickle_reader
+from lukefi.metsi.app.utils import MetsiException
+
+INPUT_PATH = str(Path("tests", "data", "resources", "VMI13_source_mini.dat").resolve())
+
+CONTROL_SOURCE = (
+    'control_structure = {\n'
+    '    "app_configuration": {"state_format": "vmi13", "run_modes": ["preprocess", "export_prepro"]},\n'
+    '    "preprocessing_operations": [],\n'
+    '    "export_prepro": {"pickle": {}}\n'
+    '}\n'
+)
+
+
+class ReadCompiledControlTest(unittest.TestCase):
+    def test_recompiled_on_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            control_file = Path(directory, "control.py")
+            control_file.write_text('control_structure = {"value": []}\n', encoding="utf-8")
+            first = daemon.read_compiled_control(str(control_file))
+            second = daemon.read_compiled_control(str(control_file))
+            self.assertEqual({"value": []}, first)
+            # the module is executed anew on each read
+            self.assertIsNot(first["value"], second["value"])
+            code = daemon._compiled_controls[control_file.resolve()][1]
+            daemon.read_compiled_control(str(control_file))
+            self.assertIs(code, daemon._compiled_controls[control_file.resolve()][1])
+
+            control_file.write_text('control_structure = {"value": 1}\n', encoding="utf-8")
+            os.utime(control_file, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            self.assertEqual({"value": 1}, daemon.read_compiled_control(str(control_file)))
+            self.assertRaises(AttributeError, daemon.read_compiled_control, str(control_file), "missing")
+
+    def test_job_request(self):
+        request = daemon.job_request({"input_path": "in", "target_directory": "out"})
+        self.assertEqual({"input_path": "in", "target_directory": "out", "control_file": None, "dry_run": False,
+                          "resume": False, "working_directory": None}, request)
+        for invalid in [[], {"input_path": "in"}, {"input_path": "in", "target_directory": "out", "control_file": 1}]:
+            self.assertRaises(MetsiException, daemon.job_request, invalid)
+
+
+class DaemonTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = daemon.WorkerPool(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.control_file = Path(self.temp_dir.name, "control.py")
+        self.control_file.write_text(CONTROL_SOURCE, encoding="utf-8")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def request(self, target: str, **fields) -> dict:
+        return daemon.job_request({"input_path": INPUT_PATH, "target_directory": target,
+                                   "control_file": str(self.control_file), **fields})
+
+    def assert_job_done(self, events: list[dict], status: int = 0):
+        self.assertEqual("started", events[0]["event"])
+        self.assertEqual({"event": "done", "status": status}, events[-1])
+
+    def test_worker_pool(self):
+        for name in ("first", "second"):
+            target = Path(self.temp_dir.name, name)
+            events = list(self.pool.run(self.request(str(target))))
+            self.assert_job_done(events)
+            self.assertIn("Exiting successfully", " ".join(e["message"] for e in events if e["event"] == "log"))
+            self.assertEqual(4, len(pickle_reader(target / "preprocessing_result.pickle")))
+
+    def test_failed_job(self):
+        events = list(self.pool.run(self.request(self.temp_dir.name, control_file="missing.py")))
+        self.assert_job_done(events, 1)
+        # the worker is released for the next job
+        self.assert_job_done(list(self.pool.run(self.request(str(Path(self.temp_dir.name, "out"))))))
+
+    def test_closed_early(self):
+        events = self.pool.run(self.request(str(Path(self.temp_dir.name, "early"))))
+        self.assertEqual("started", next(events)["event"])
+        events.close()
+        self.assert_job_done(list(self.pool.run(self.request(str(Path(self.temp_dir.name, "next"))))))
+
+    def serve(self, address: daemon.Address):
+        server = daemon.create_server(address, self.pool)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server.server_address
+
+    def test_submit_over_tcp(self):
+        address = self.serve((daemon.LOCALHOST, 0))
+        target = Path(self.temp_dir.name, "tcp")
+        self.assert_job_done(list(daemon.submit(address, INPUT_PATH, str(target), str(self.control_file))))
+        self.assertTrue((target / "preprocessing_result.pickle").exists())
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not supported")
+    def test_submit_over_unix_socket(self):
+        address = self.serve(str(Path(self.temp_dir.name, "daemon.sock")))
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        try:
+            # relative paths are relative to the directory of the submitter
+            events = list(daemon.submit(address, INPUT_PATH, "relative", "control.py"))
+        finally:
+            os.chdir(cwd)
+        self.assert_job_done(events)
+        self.assertTrue(Path(self.temp_dir.name, "relative", "preprocessing_result.pickle").exists())
+
+    def test_invalid_request(self):
+        address = self.serve((daemon.LOCALHOST, 0))
+        with socket.create_connection(address) as connection:
+            connection.sendall(b'{"input_path": "in"}\n')
+            with connection.makefile("rb") as events:
+                self.assertIn(b'"status": 1', events.readline())
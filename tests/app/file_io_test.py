@@ -1,3 +1,4 @@
+import gzip
 import unittest
 import os
 import shutil
@@ -10,8 +11,11 @@ from lukefi.metsi.app import file_io
 from lukefi.metsi.data.enums.internal import (DrainageCategory, LandUseCategory, OwnerCategory, SiteType,
                                               SoilPeatlandCategory, Storey, TreeSpecies)
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
+from lukefi.metsi.data.formats.fdm_columnar import ColumnarStandStore
 from lukefi.metsi.app.app_types import ExportableContainer
 from lukefi.metsi.app.app_io import MetsiConfiguration
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.app.sim_results import LazySimResults
 from lukefi.metsi.data.vectorize import vectorize
 
 
@@ -180,6 +184,94 @@ class TestFileReading(unittest.TestCase):
                         getattr(result[i].tree_strata, attribute)))
         shutil.rmtree('outdir')
 
+    def test_columnar(self):
+        data = vectorize([
+            ForestStand(
+                identifier="123-234",
+                geo_location=(600000.0, 300000.0, 30.0, "EPSG:3067"),
+                reference_trees_pre_vec=[
+                    ReferenceTree(identifier="123-234-1", species=TreeSpecies.PINE, stems_per_ha=10.0),
+                    ReferenceTree(identifier="123-234-2", species=TreeSpecies.SPRUCE, stems_per_ha=20.0)
+                ]
+            )
+        ])
+        ec = ExportableContainer(export_objects=data, additional_vars=None)
+
+        file_io.prepare_target_directory("outdir")
+        file_io.stand_writer("columnar")(Path("outdir", "output.columnar"), ec)
+        config = MetsiConfiguration(
+            input_path="outdir/output.columnar",
+            state_format="fdm",
+            state_input_container="columnar"
+        )
+        result = file_io.read_stands_from_file(config, {})
+        self.assertEqual(1, len(result))
+        self.assertEqual(data[0].geo_location, result[0].geo_location)
+        self.assertEqual(["123-234-1", "123-234-2"], result[0].reference_trees.identifier.tolist())
+        self.assertEqual([10.0, 20.0], result[0].reference_trees.stems_per_ha.tolist())
+        self.assertEqual(0, result[0].tree_strata.size)
+        lazy = file_io.read_stand_sequence(config, {})
+        self.assertIsInstance(lazy, ColumnarStandStore)
+        self.assertEqual(["123-234"], [stand.identifier for stand in lazy])
+        streamed = list(file_io.stream_stands_from_file(config, {}))
+        self.assertEqual([10.0, 20.0], streamed[0].reference_trees.stems_per_ha.tolist())
+
+    def test_mapped_pickle(self):
+        data = vectorize([
+            ForestStand(
+                identifier="123-234",
+                geo_location=(600000.0, 300000.0, 30.0, "EPSG:3067"),
+                reference_trees_pre_vec=[
+                    ReferenceTree(identifier="123-234-1", species=TreeSpecies.PINE, stems_per_ha=10.0),
+                    ReferenceTree(identifier="123-234-2", species=TreeSpecies.SPRUCE, stems_per_ha=20.0)
+                ]
+            )
+        ])
+        ec = ExportableContainer(export_objects=data, additional_vars=None)
+
+        file_io.prepare_target_directory("outdir")
+        file_io.stand_writer("mapped_pickle")(Path("outdir", "output.mapped_pickle"), ec)
+        config = MetsiConfiguration(
+            input_path="outdir/output.mapped_pickle",
+            state_format="fdm",
+            state_input_container="mapped_pickle"
+        )
+        result = file_io.read_stands_from_file(config, {})
+        self.assertEqual(1, len(result))
+        self.assertEqual(data[0].geo_location, result[0].geo_location)
+        self.assertEqual(["123-234-1", "123-234-2"], result[0].reference_trees.identifier.tolist())
+        self.assertEqual([10.0, 20.0], result[0].reference_trees.stems_per_ha.tolist())
+        self.assertFalse(result[0].reference_trees.stems_per_ha.flags.writeable)
+
+    def test_ndjson(self):
+        data = vectorize([
+            ForestStand(
+                identifier=f"123-{i}",
+                geo_location=(600000.0, 300000.0, 30.0, "EPSG:3067"),
+                reference_trees_pre_vec=[
+                    ReferenceTree(identifier=f"123-{i}-1", species=TreeSpecies.PINE, stems_per_ha=10.0)
+                ]
+            )
+            for i in range(3)
+        ])
+        ec = ExportableContainer(export_objects=data, additional_vars=None)
+
+        file_io.prepare_target_directory("outdir")
+        file_io.stand_writer("ndjson")(Path("outdir", "output.ndjson"), ec)
+        config = MetsiConfiguration(
+            input_path="outdir/output.ndjson",
+            state_format="fdm",
+            state_input_container="ndjson"
+        )
+        result = file_io.read_stands_from_file(config, {})
+        self.assertEqual(["123-0", "123-1", "123-2"], [stand.identifier for stand in result])
+        self.assertEqual(data[0].geo_location, result[0].geo_location)
+        self.assertEqual([TreeSpecies.PINE], result[2].reference_trees.species.tolist())
+        streamed = file_io.stream_stands_from_file(config, {})
+        self.assertEqual("123-0", next(streamed).identifier)
+        self.assertEqual(2, len(list(streamed)))
+        shutil.rmtree('outdir')
+
     def test_rst(self):
         data = [
             ForestStand(
@@ -249,6 +341,18 @@ class TestFileReading(unittest.TestCase):
         self.assertEqual(type(stands_from_csv[0]), ForestStand)
         self.assertEqual(type(stands_from_csv[0].tree_strata_pre_vec[0]), TreeStratum)
 
+    def test_read_vectorized_stands_from_csv_file(self):
+        config = MetsiConfiguration(
+            input_path="tests/resources/file_io_test/forest_centre.csv",
+            state_format="fdm",
+            state_input_container="csv",
+            vectorized_input=True
+        )
+        stands_from_csv = file_io.read_stands_from_file(config, {})
+        self.assertEqual(len(stands_from_csv), 2)
+        self.assertFalse(hasattr(stands_from_csv[0], "tree_strata_pre_vec"))
+        self.assertEqual(["100-331-stratum", "100-332-stratum"], stands_from_csv[0].tree_strata.identifier.tolist()[:2])
+
     def test_read_stands_from_vmi12_file(self):
         config = MetsiConfiguration(
             input_path="tests/resources/file_io_test/vmi12.dat",
@@ -267,6 +371,33 @@ class TestFileReading(unittest.TestCase):
         stands = file_io.read_stands_from_file(config, {})
         self.assertEqual(len(stands), 4)
 
+    def test_read_stands_from_compressed_vmi13_file_multiprocessing(self):
+        source = Path("tests", "data", "resources", "VMI13_source_mini.dat")
+        file_io.prepare_target_directory("outdir")
+        filepath = Path("outdir", "VMI13_source_mini.dat.gz")
+        with gzip.open(filepath, "wb") as file:
+            file.write(source.read_bytes())
+        config = MetsiConfiguration(
+            input_path=str(filepath),
+            state_format="vmi13",
+            state_input_container="",
+            multiprocessing=True
+        )
+        stands = file_io.read_stands_from_file(config, {})
+        expected = file_io.read_stands_from_file(MetsiConfiguration(input_path=source, state_format="vmi13"), {})
+        self.assertEqual([stand.identifier for stand in expected], [stand.identifier for stand in stands])
+        shutil.rmtree('outdir')
+
+    def test_stream_stands_from_vmi13_file(self):
+        config = MetsiConfiguration(
+            input_path=Path("tests", "data", "resources", "VMI13_source_mini.dat"),
+            state_format="vmi13",
+            state_input_container=""
+        )
+        stands = file_io.stream_stands_from_file(config, {})
+        self.assertEqual(next(stands).identifier, file_io.read_stands_from_file(config, {})[0].identifier)
+        self.assertEqual(3, len(list(stands)))
+
     def test_read_stands_from_xml_file(self):
         config = MetsiConfiguration(
             input_path="tests/resources/file_io_test/forest_centre.xml",
@@ -299,6 +430,122 @@ class TestFileReading(unittest.TestCase):
         self.assertEqual("3", result["3"][0].computational_unit.identifier)
         self.assertEqual(2, len(result["3"][0].collected_data.get_list_result("calculate_biomass")))
 
+    def test_lazy_simulation_results(self):
+        result = file_io.lazy_simulation_results(Path("tests/resources/file_io_test/testing_output_directory"))
+        self.assertIsInstance(result, LazySimResults)
+        self.assertEqual(["3"], list(result))
+        self.assertEqual("3", result["3"][0].computational_unit.identifier)
+        self.assertEqual([1], [len(schedules) for schedules in result.values()])
+
+    def test_simulation_result_dirtree(self):
+        source = file_io.read_full_simulation_result_dirtree(
+            Path("tests/resources/file_io_test/testing_output_directory"))
+        config = MetsiConfiguration(
+            target_directory="outdir",
+            state_output_container="pickle",
+            derived_data_output_container="pickle"
+        )
+        file_io.write_full_simulation_result_dirtree(source, config)
+        self.assertTrue(Path("outdir", "3", "0", "derived_data.pickle").is_file())
+        result = file_io.read_full_simulation_result_dirtree("outdir")
+        self.assertEqual("3", result["3"][0].computational_unit.identifier)
+        self.assertEqual(2, len(result["3"][0].collected_data.get_list_result("calculate_biomass")))
+        shutil.rmtree('outdir')
+
+    def test_simulation_result_store(self):
+        source = file_io.read_full_simulation_result_dirtree(
+            Path("tests/resources/file_io_test/testing_output_directory"))
+        config = MetsiConfiguration(
+            target_directory="outdir",
+            state_output_container="pickle",
+            derived_data_output_container="pickle",
+            consolidated_results=True
+        )
+        file_io.write_full_simulation_result_dirtree(source, config)
+        self.assertEqual([], file_io.get_subdirectory_names("outdir"))
+        result = file_io.read_full_simulation_result_dirtree("outdir")
+        self.assertEqual(["3"], list(result))
+        self.assertEqual("3", result["3"][0].computational_unit.identifier)
+        self.assertEqual(2, len(result["3"][0].collected_data.get_list_result("calculate_biomass")))
+        shutil.rmtree('outdir')
+
+    def test_simulation_result_dirtree_compressed(self):
+        source = file_io.read_full_simulation_result_dirtree(
+            Path("tests/resources/file_io_test/testing_output_directory"))
+        config = MetsiConfiguration(
+            target_directory="outdir",
+            state_output_container="csv",
+            derived_data_output_container="json",
+            output_compression="gzip"
+        )
+        file_io.write_full_simulation_result_dirtree(source, config)
+        self.assertTrue(Path("outdir", "3", "0", "sim_result.csv.gz").is_file())
+        self.assertTrue(Path("outdir", "3", "0", "derived_data.json.gz").is_file())
+        result = file_io.read_full_simulation_result_dirtree("outdir")
+        self.assertEqual("3", result["3"][0].computational_unit.identifier)
+        self.assertEqual(2, len(result["3"][0].collected_data.get_list_result("calculate_biomass")))
+        shutil.rmtree('outdir')
+
+    def test_simulation_result_dirtree_compression_skipped(self):
+        source = file_io.read_full_simulation_result_dirtree(
+            Path("tests/resources/file_io_test/testing_output_directory"))
+        config = MetsiConfiguration(
+            target_directory="outdir",
+            state_output_container="columnar",
+            derived_data_output_container="json",
+            output_compression="gzip"
+        )
+        file_io.write_full_simulation_result_dirtree(source, config)
+        # columnar containers are written uncompressed, other containers compressed
+        self.assertTrue(Path("outdir", "3", "0", "sim_result.columnar").is_file())
+        self.assertTrue(Path("outdir", "3", "0", "derived_data.json.gz").is_file())
+        shutil.rmtree('outdir')
+
+    def test_compressed_stands(self):
+        data = vectorize([
+            ForestStand(identifier=f"123-{i}", geo_location=(600000.0, 300000.0, 30.0, "EPSG:3067"),
+                        reference_trees_pre_vec=[ReferenceTree(identifier=f"123-{i}-1", species=TreeSpecies.PINE)])
+            for i in range(3)
+        ])
+        ec = ExportableContainer(export_objects=data, additional_vars=None)
+        file_io.prepare_target_directory("outdir")
+        for container in ("csv", "pickle", "json", "ndjson"):
+            filepath = Path("outdir", f"output.{container}.bz2")
+            file_io.stand_writer(container)(filepath, ec)
+            config = MetsiConfiguration(
+                input_path=str(filepath),
+                state_format="fdm",
+                state_input_container=container
+            )
+            result = file_io.read_stands_from_file(config, {})
+            self.assertEqual(["123-0", "123-1", "123-2"], [stand.identifier for stand in result], container)
+        self.assertRaises(MetsiException, file_io.stand_writer("columnar"), Path("outdir", "output.columnar.gz"), ec)
+        shutil.rmtree('outdir')
+
+    def test_chunked_stands(self):
+        data = vectorize([
+            ForestStand(identifier=f"123-{i}", geo_location=(600000.0, 300000.0, 30.0, "EPSG:3067"),
+                        reference_trees_pre_vec=[ReferenceTree(identifier=f"123-{i}-1", species=TreeSpecies.PINE,
+                                                               stems_per_ha=float(i))])
+            for i in range(5)
+        ])
+        ec = ExportableContainer(export_objects=data, additional_vars=None)
+        file_io.prepare_target_directory("outdir")
+        for container in ("csv", "ndjson"):
+            filepath = Path("outdir", f"output.{container}.gz")
+            file_io.write_stands_chunked(ec, filepath, container, 2)
+            stand = file_io.read_stand_from_chunked(filepath, container, "123-3")
+            self.assertEqual("123-3", stand.identifier)
+            config = MetsiConfiguration(
+                input_path=str(filepath),
+                state_format="fdm",
+                state_input_container=container
+            )
+            self.assertEqual(5, len(file_io.read_stands_from_file(config, {})), container)
+        self.assertEqual(3.0, stand.reference_trees.stems_per_ha[0])
+        self.assertRaises(MetsiException, file_io.write_stands_chunked, ec, Path("outdir", "output.rst.gz"), "rst", 2)
+        shutil.rmtree('outdir')
+
     def test_read_stands_from_nonexisting_file(self):
         config = MetsiConfiguration(
             input_path="nonexisting_file.pickle",
@@ -0,0 +1,43 @@
+"""
+Imports of the application entry point and the modules commonly imported by control files. Heavy optional
+dependencies must not be imported before a state format or operation that needs them is used.
+"""
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ENTRY_MODULES = [
+    "lukefi.metsi.app.metsi",
+    "lukefi.metsi.domain.pre_ops",
+    "lukefi.metsi.domain.events",
+]
+
+LAZY_MODULES = ["pandas", "geopandas", "shapely", "pyproj", "rpy2", "cffi"]
+
+IMPORTS = """
+import json, sys
+for module in {modules}:
+    __import__(module)
+from lukefi.metsi.forestry.preprocessing import coordinate_conversion
+print(json.dumps({{
+    "loaded": [module for module in {lazy} if module in sys.modules],
+    "library_loaded": coordinate_conversion._library.cache_info().currsize > 0
+}}))
+"""
+
+
+def run_imports() -> dict:
+    """Import the entry modules in a fresh interpreter, reporting the optional dependencies loaded by them"""
+    root = Path(__file__).resolve().parents[2]
+    script = IMPORTS.format(modules=ENTRY_MODULES, lazy=LAZY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_optional_dependencies_not_imported(self):
+        result = run_imports()
+        self.assertEqual([], result["loaded"])
+        self.assertFalse(result["library_loaded"])
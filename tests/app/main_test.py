@@ -11,6 +11,12 @@ from lukefi.metsi.app import metsi
 import tempfile
 from pathlib import Path
 from types import SimpleNamespace
+from lukefi.metsi.app.app_io import generate_application_configuration
+from lukefi.metsi.app.file_io import pickle_reader, read_control_module
+from lukefi.metsi.app.memory_budget import SliceSizer
+from lukefi.metsi.app.preprocessor import stream_stands_by_budget
+from lukefi.metsi.app.run_journal import JOURNAL_FILE, RunJournal
+from lukefi.metsi.data.model import ForestStand
 
 @unittest.skip("Not working")
 class MainTest(unittest.TestCase):
@@ -78,3 +84,100 @@ class RemoveExistingExportFilesTest(unittest.TestCase):
         self.assertNotIn("data.cda", remaining_files)
         self.assertNotIn("custom_export.txt", remaining_files)
         self.assertNotIn("preprocessing_result.csv", remaining_files)
+
+
+class SliceRunTest(unittest.TestCase):
+    control_source = (
+        'control_structure = {\n'
+        '    "app_configuration": {"run_modes": ["preprocess", "export_prepro"]},\n'
+        '    "preprocessing_operations": [],\n'
+        '    "export_prepro": {"pickle": {}},\n'
+        '    "unpicklable": lambda value: value\n'
+        '}\n'
+    )
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.target_path = Path(self.temp_dir.name, "output")
+        self.control_file = str(Path(self.temp_dir.name, "control.py"))
+        Path(self.control_file).write_text(self.control_source, encoding="utf-8")
+        self.control = read_control_module(self.control_file)
+        self.config = generate_application_configuration({
+            **self.control["app_configuration"],
+            "target_directory": str(self.target_path)
+        })
+        self.slices = [[ForestStand(identifier="1"), ForestStand(identifier="2")], [ForestStand(identifier="3")]]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assert_slice_results(self):
+        for i, identifiers in enumerate([["1", "2"], ["3"]]):
+            result = pickle_reader(self.target_path / f"slice_{i + 1}" / "preprocessing_result.pickle")
+            self.assertEqual(identifiers, [stand.identifier for stand in result])
+        self.assertFalse((self.target_path / "preprocessing_result.pickle").exists())
+
+    def test_slice_configuration(self):
+        self.assertEqual(str(self.target_path), metsi.slice_configuration(self.config, 1, False).target_directory)
+        self.assertEqual(os.path.join(str(self.target_path), "slice_2"),
+                         metsi.slice_configuration(self.config, 1, True).target_directory)
+        self.assertEqual(str(self.target_path), self.config.target_directory)
+
+    def test_run_sequential(self):
+        metsi.run_sequential(self.config, self.control, self.slices, True)
+        self.assert_slice_results()
+
+    def test_run_pipelined(self):
+        metsi.run_pipelined(self.config, self.control, self.control_file, self.slices, True)
+        self.assert_slice_results()
+
+    def test_run_slices_unsliced(self):
+        metsi.run_sequential(self.config, self.control, [self.slices[0]], False)
+        result = pickle_reader(self.target_path / "preprocessing_result.pickle")
+        self.assertEqual(["1", "2"], [stand.identifier for stand in result])
+
+    def test_run_sequential_by_budget(self):
+        sizer = SliceSizer(10 ** 9, initial_size=1)
+        stands = (ForestStand(identifier=str(i)) for i in range(5))
+        metsi.run_sequential(self.config, self.control, stream_stands_by_budget(stands, sizer), True, sizer)
+        sizes = [len(pickle_reader(self.target_path / f"slice_{i + 1}" / "preprocessing_result.pickle"))
+                 for i in range(3)]
+        self.assertEqual([1, 2, 2], sizes)
+
+    def test_run_sequential_journal(self):
+        journal = RunJournal(self.target_path)
+        metsi.run_sequential(self.config, self.control, self.slices, True, journal=journal)
+        self.assert_slice_results()
+        resumed = RunJournal(self.target_path, resume=True)
+        self.assertEqual({"1": 0, "2": 0, "3": 1}, resumed.completed)
+        self.assertEqual(2, resumed.next_slice)
+
+    def test_run_journaled_only_when_sliced(self):
+        arguments = {"input_path": str(Path("tests", "data", "resources", "VMI13_source_mini.dat")),
+                     "target_directory": str(self.target_path), "control_file": self.control_file,
+                     "dry_run": False, "resume": False}
+        control = {**self.control, "app_configuration": {**self.control["app_configuration"], "state_format": "vmi13"}}
+        # an unsliced run can not be resumed
+        self.assertEqual(1, metsi.run({**arguments, "resume": True}, lambda _: control))
+        self.assertFalse(self.target_path.exists())
+        self.assertEqual(0, metsi.run(arguments, lambda _: {**control, "slice_size": 2}))
+        self.assertEqual(2, RunJournal(self.target_path, resume=True).next_slice)
+        # an unsliced run removes the journal of an earlier run
+        self.assertEqual(0, metsi.run(arguments, lambda _: control))
+        self.assertFalse((self.target_path / JOURNAL_FILE).exists())
+
+    def test_run_pipelined_resumed(self):
+        os.makedirs(self.target_path)
+        journal = RunJournal(self.target_path)
+        journal.record(0, ["1", "2"])
+        metsi.run_pipelined(self.config, self.control, self.control_file, self.slices[1:], True, journal=journal)
+        # slices of a resumed run are numbered after the completed ones
+        result = pickle_reader(self.target_path / "slice_2" / "preprocessing_result.pickle")
+        self.assertEqual(["3"], [stand.identifier for stand in result])
+        self.assertEqual({"1": 0, "2": 0, "3": 1}, RunJournal(self.target_path, resume=True).completed)
+
+    def test_remove_incomplete_slices(self):
+        for name in ("slice_1", "slice_2", "slice_3", "other"):
+            os.makedirs(self.target_path / name)
+        metsi.remove_incomplete_slices(str(self.target_path), 1)
+        self.assertEqual(["other", "slice_1"], sorted(os.listdir(self.target_path)))
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from lukefi.metsi.app.memory_budget import SliceSizer, SliceUsage, parse_memory_budget, peak_rss
+from lukefi.metsi.app.preprocessor import stream_stands_by_budget
+from lukefi.metsi.app.utils import ConfigurationException
+from lukefi.metsi.data.formats.fdm_columnar import ColumnarStandStore, write_columnar
+from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.data.vector_model import ReferenceTrees
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+
+
+def stand_with_trees(identifier: str, trees: int) -> ForestStand:
+    stand = ForestStand(identifier=identifier)
+    stand.reference_trees = ReferenceTrees().vectorize({"stems_per_ha": np.ones(trees)})
+    return stand
+
+
+class MemoryBudgetTest(unittest.TestCase):
+    def test_parse_memory_budget(self):
+        self.assertEqual(1000, parse_memory_budget(1000))
+        self.assertEqual(512 * 1024 ** 2, parse_memory_budget("512M"))
+        self.assertEqual(2 * 1024 ** 3, parse_memory_budget("2G"))
+        self.assertEqual(int(1.5 * 1024 ** 3), parse_memory_budget("1.5GiB"))
+        self.assertEqual(64 * 1024, parse_memory_budget("64k"))
+        for invalid in ["", "many", "-1G", 0, "0M"]:
+            self.assertRaises(ConfigurationException, parse_memory_budget, invalid)
+
+    def test_peak_rss(self):
+        rss = peak_rss()
+        if rss is not None:
+            self.assertGreater(rss, 0)
+
+    def test_slice_usage(self):
+        stands = [stand_with_trees("1", 10), stand_with_trees("2", 30)]
+        usage = SliceUsage()
+        usage.record(stands)
+        self.assertEqual(2, usage.stands)
+        self.assertEqual(stands[0].nbytes + stands[1].nbytes, usage.stand_nbytes)
+        results = {
+            stand.identifier: [SimulationPayload(computational_unit=stand, collected_data=CollectedData(),
+                                                 operation_history=[])] * 3
+            for stand in stands
+        }
+        usage.record(results)
+        self.assertEqual(3 * usage.stand_nbytes, usage.result_nbytes)
+        self.assertEqual(2 * usage.stand_nbytes, usage.footprint)
+
+    def test_slice_sizer_fits_budget(self):
+        sizer = SliceSizer(10000, initial_size=4)
+        self.assertEqual(4, sizer.next_size())
+        sizer.observe(SliceUsage(stands=4, stand_nbytes=400, result_nbytes=3600))
+        # 1000 bytes per stand, filling 80 % of the budget
+        self.assertEqual(8, sizer.next_size())
+        sizer.observe(SliceUsage(stands=8, stand_nbytes=800, result_nbytes=800))
+        # the largest footprint per stand seen is kept
+        self.assertEqual(8, sizer.next_size())
+
+    def test_slice_sizer_growth(self):
+        sizer = SliceSizer(10 ** 9, initial_size=2)
+        sizer.observe(SliceUsage(stands=2, stand_nbytes=100, result_nbytes=100))
+        self.assertEqual(4, sizer.next_size())
+        sizer.observe(SliceUsage(stands=4, stand_nbytes=200, result_nbytes=200))
+        self.assertEqual(8, sizer.next_size())
+
+    def test_slice_sizer_shares_budget(self):
+        sizer = SliceSizer(30000, initial_size=10, concurrent_slices=3)
+        sizer.observe(SliceUsage(stands=10, stand_nbytes=1000, result_nbytes=9000))
+        self.assertEqual(8, sizer.next_size())
+
+    def test_slice_sizer_shrinks_over_peak_rss(self):
+        sizer = SliceSizer(1000, initial_size=10)
+        sizer.observe(SliceUsage(stands=10, stand_nbytes=10, result_nbytes=10, peak_rss=4000))
+        self.assertEqual(2, sizer.next_size())
+        sizer.observe(SliceUsage(stands=2, stand_nbytes=10, result_nbytes=10, peak_rss=10 ** 6))
+        self.assertEqual(1, sizer.next_size())
+
+    def test_stream_stands_by_budget(self):
+        sizer = SliceSizer(10 ** 9, initial_size=1)
+        sizes = []
+        for batch in stream_stands_by_budget((ForestStand(identifier=str(i)) for i in range(10)), sizer):
+            sizes.append(len(batch))
+            sizer.observe(SliceUsage(stands=len(batch), stand_nbytes=len(batch)))
+        self.assertEqual([1, 2, 4, 3], sizes)
+
+    def test_stream_store_by_budget(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "stands.columnar")
+            stands = [stand_with_trees(str(i), i) for i in range(6)]
+            write_columnar(path, stands)
+            sizer = SliceSizer(10 ** 9, initial_size=1)
+            batches = []
+            for batch in stream_stands_by_budget(ColumnarStandStore(path), sizer):
+                # slices of the store stay lazy, sized without building their stands
+                self.assertIsInstance(batch, ColumnarStandStore)
+                usage = SliceUsage()
+                usage.record(batch)
+                self.assertEqual(sum(stand.nbytes for stand in batch), usage.stand_nbytes)
+                batches.append(batch.identifiers)
+                sizer.observe(usage)
+            self.assertEqual([["0"], ["1", "2"], ["3", "4", "5"]], batches)
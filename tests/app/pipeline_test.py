@@ -0,0 +1,61 @@
+import unittest
+from lukefi.metsi.app.pipeline import prefetched, run_pipeline
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def fail_on_three(value: int) -> int:
+    if value == 3:
+        raise ValueError("three")
+    return value
+
+
+def failing_source():
+    yield 1
+    yield 2
+    raise ValueError("source")
+
+
+class PipelineTest(unittest.TestCase):
+    def test_prefetched(self):
+        self.assertEqual(list(range(10)), list(prefetched(range(10))))
+        self.assertEqual(list(range(10)), list(prefetched(range(10), depth=4)))
+        self.assertEqual([], list(prefetched([])))
+
+    def test_prefetched_raises_source_exception(self):
+        result = []
+        with self.assertRaises(ValueError):
+            for item in prefetched(failing_source()):
+                result.append(item)
+        self.assertEqual([1, 2], result)
+
+    def test_prefetched_closed_early(self):
+        items = prefetched(iter(range(100)))
+        self.assertEqual(0, next(items))
+        items.close()
+
+    def test_run_pipeline(self):
+        written = []
+        run_pipeline(range(10), square, written.append)
+        self.assertEqual([i * i for i in range(10)], written)
+
+    def test_run_pipeline_writes_in_order_with_several_workers(self):
+        written = []
+        run_pipeline(range(20), square, written.append, workers=3, depth=2)
+        self.assertEqual([i * i for i in range(20)], written)
+
+    def test_run_pipeline_raises_compute_exception(self):
+        written = []
+        with self.assertRaises(ValueError):
+            run_pipeline(range(10), fail_on_three, written.append)
+        self.assertEqual([0, 1, 2], written)
+
+    def test_run_pipeline_raises_write_exception(self):
+        def write(value: int):
+            if value == 4:
+                raise ValueError("write")
+
+        with self.assertRaises(ValueError):
+            run_pipeline(range(10), square, write)
@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from pathlib import Path
+from lukefi.metsi.app.result_store import (ResultStore, ResultStoreWriter, chunk_path, is_result_store,
+                                           remove_result_store)
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.sim.collected_data import CollectedData
+
+
+class ResultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name, "results")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_and_read(self):
+        with ResultStoreWriter(self.directory) as writer:
+            for stand_id in ["1", "2"]:
+                for schedule in range(3):
+                    data = CollectedData(initial_time_point=schedule)
+                    writer.append(stand_id, schedule, ForestStand(identifier=stand_id, year=schedule), data)
+        self.assertTrue(is_result_store(self.directory))
+        with ResultStore(self.directory) as store:
+            self.assertEqual(6, len(store))
+            self.assertEqual(["1", "2"], store.stands())
+            self.assertEqual([0, 1, 2], store.schedules("2"))
+            payload = store[("2", 1)]
+            self.assertEqual("2", payload.computational_unit.identifier)
+            self.assertEqual(1, payload.computational_unit.year)
+            self.assertEqual(1, payload.collected_data.initial_time_point)
+            self.assertEqual([0, 1, 2], [p.computational_unit.year for p in store.read_all()["1"]])
+            self.assertRaises(KeyError, store.__getitem__, ("3", 0))
+
+    def test_chunks(self):
+        with ResultStoreWriter(self.directory, chunk_size=1) as writer:
+            for schedule in range(3):
+                writer.append("1", schedule, ForestStand(identifier="1", year=schedule))
+        self.assertTrue(chunk_path(self.directory, 2).is_file())
+        self.assertFalse(chunk_path(self.directory, 3).exists())
+        with ResultStore(self.directory) as store:
+            self.assertEqual([0, 1, 2], [p.computational_unit.year for p in store.read_stand("1")])
+            self.assertIsNone(store[("1", 0)].collected_data)
+
+    def test_append(self):
+        with ResultStoreWriter(self.directory) as writer:
+            writer.append("1", 0, ForestStand(identifier="1", year=1))
+            writer.append("1", 1, ForestStand(identifier="1", year=1))
+        with ResultStoreWriter(self.directory) as writer:
+            writer.append("1", 1, ForestStand(identifier="1", year=2))
+            writer.append("2", 0, ForestStand(identifier="2", year=2))
+        with ResultStore(self.directory) as store:
+            self.assertEqual(3, len(store))
+            self.assertEqual([1, 2], [p.computational_unit.year for p in store.read_stand("1")])
+            self.assertEqual(["1", "2"], store.stands())
+
+    def test_remove(self):
+        with ResultStoreWriter(self.directory) as writer:
+            writer.append("1", 0, ForestStand(identifier="1"))
+        remove_result_store(self.directory)
+        self.assertFalse(is_result_store(self.directory))
+        self.assertEqual([], list(self.directory.iterdir()))
+        self.assertRaises(MetsiException, ResultStore, self.directory)
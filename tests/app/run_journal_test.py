@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+from pathlib import Path
+from lukefi.metsi.app.run_journal import JOURNAL_FILE, RunJournal
+
+
+class RunJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name, JOURNAL_FILE)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_record_and_resume(self):
+        journal = RunJournal(self.temp_dir.name)
+        self.assertEqual(0, journal.next_slice)
+        journal.record(0, ["a", "b;c"])
+        journal.record(1, ["d"])
+        self.assertIn("b;c", journal)
+        resumed = RunJournal(self.temp_dir.name, resume=True)
+        self.assertEqual({"a": 0, "b;c": 0, "d": 1}, resumed.completed)
+        self.assertEqual(2, resumed.next_slice)
+        self.assertNotIn("e", resumed)
+
+    def test_new_run_starts_empty_journal(self):
+        RunJournal(self.temp_dir.name).record(0, ["a"])
+        self.assertEqual(0, len(RunJournal(self.temp_dir.name)))
+        self.assertFalse(self.path.exists())
+        self.assertEqual(0, len(RunJournal(self.temp_dir.name, resume=True)))
+
+    def test_interrupted_record_ignored(self):
+        RunJournal(self.temp_dir.name).record(0, ["a", "b"])
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("1;c;d")
+        resumed = RunJournal(self.temp_dir.name, resume=True)
+        self.assertEqual({"a": 0, "b": 0}, resumed.completed)
+        self.assertEqual(1, resumed.next_slice)
+        # the cut line is removed, so that new records start on a line of their own
+        resumed.record(1, ["c", "d"])
+        self.assertEqual(["0;a;b", "1;c;d"], self.path.read_text(encoding="utf-8").splitlines())
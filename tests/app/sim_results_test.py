@@ -0,0 +1,45 @@
+import threading
+import unittest
+from lukefi.metsi.app.sim_results import LazySimResults
+from lukefi.metsi.domain.forestry_types import ForestOpPayload
+from lukefi.metsi.sim.collected_data import CollectedData
+
+
+class LazySimResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loaded: list[str] = []
+        self.lock = threading.Lock()
+
+    def loader(self, stand_id: str) -> list[ForestOpPayload]:
+        with self.lock:
+            self.loaded.append(stand_id)
+        return [ForestOpPayload(computational_unit=stand_id, collected_data=CollectedData(), operation_history=[])]
+
+    def test_loads_on_access(self):
+        results = LazySimResults(["1", "2", "3"], self.loader)
+        self.assertEqual(3, len(results))
+        self.assertEqual(["1", "2", "3"], list(results))
+        self.assertIn("2", results)
+        self.assertNotIn("4", results)
+        self.assertEqual([], self.loaded)
+        self.assertEqual("2", results["2"][0].computational_unit)
+        self.assertEqual(["2"], self.loaded)
+        self.assertRaises(KeyError, results.__getitem__, "4")
+
+    def test_prefetched_items(self):
+        stand_ids = [str(i) for i in range(10)]
+        results = LazySimResults(stand_ids, self.loader, prefetch=2)
+        items = iter(results.items())
+        stand_id, schedules = next(items)
+        self.assertEqual(("0", "0"), (stand_id, schedules[0].computational_unit))
+        # the first stand and at most two stands ahead of it have been requested
+        self.assertLessEqual(len(self.loaded), 3)
+        self.assertEqual(stand_ids[1:], [stand_id for stand_id, _ in items])
+        self.assertEqual(stand_ids, sorted(self.loaded, key=int))
+        self.assertEqual(stand_ids, [schedules[0].computational_unit for schedules in results.values()])
+
+    def test_without_prefetch(self):
+        results = LazySimResults(["1", "2"], self.loader, prefetch=0)
+        self.assertEqual({"1": "1", "2": "2"}, {k: v[0].computational_unit for k, v in results.items()})
+        self.assertEqual(["1", "2"], self.loaded)
@@ -0,0 +1,126 @@
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.fdm_columnar import ColumnarStandStore, read_columnar, write_columnar
+from lukefi.metsi.data.model import ForestStand, ReferenceTree, stand_as_internal_row
+from lukefi.metsi.data.enums.internal import TreeSpecies
+from lukefi.metsi.data.vectorize import vectorize
+from tests.data.test_util import ForestBuilderTestBench
+
+
+class FdmColumnarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name, "stands.columnar")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_same_vectors(self, expected, actual):
+        self.assertEqual(expected.size, actual.size)
+        for name in expected.dtypes:
+            expected_column = getattr(expected, name)
+            actual_column = getattr(actual, name)
+            self.assertEqual(expected_column.shape, actual_column.shape, name)
+            if np.issubdtype(expected_column.dtype, np.floating):
+                np.testing.assert_array_equal(expected_column, actual_column, err_msg=name)
+            else:
+                self.assertEqual(expected_column.tolist(), actual_column.tolist(), name)
+
+    def test_roundtrip(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_columnar(self.path, stands)
+        result = read_columnar(self.path)
+        self.assertEqual(len(stands), len(result))
+        for expected, actual in zip(stands, result):
+            self.assertEqual(expected.identifier, actual.identifier)
+            self.assertEqual([str(v) for v in stand_as_internal_row(expected)],
+                             [str(v) for v in stand_as_internal_row(actual)])
+            self.assertFalse(hasattr(actual, "reference_trees_pre_vec"))
+            self.assert_same_vectors(expected.reference_trees, actual.reference_trees)
+            self.assert_same_vectors(expected.tree_strata, actual.tree_strata)
+
+    def test_not_vectorized(self):
+        stands = ForestBuilderTestBench.vmi12_built()
+        write_columnar(self.path, stands)
+        result = read_columnar(self.path)
+        for expected, actual in zip(vectorize(stands), result):
+            self.assert_same_vectors(expected.reference_trees, actual.reference_trees)
+            self.assert_same_vectors(expected.tree_strata, actual.tree_strata)
+
+    def test_memory_mapped(self):
+        stand = ForestStand(identifier="1", reference_trees_pre_vec=[
+            ReferenceTree(identifier="1-1", species=TreeSpecies.PINE, stems_per_ha=10.0),
+            ReferenceTree(identifier="1-2", species=TreeSpecies.SPRUCE, stems_per_ha=20.0)])
+        write_columnar(self.path, [stand, ForestStand(identifier="2")])
+        result = read_columnar(self.path)
+        trees = result[0].reference_trees
+        self.assertFalse(trees.stems_per_ha.flags.owndata)
+        self.assertFalse(trees.stems_per_ha.flags.writeable)
+        trees.update({"stems_per_ha": 15.0}, 0)
+        self.assertEqual([15.0, 20.0], trees.stems_per_ha.tolist())
+        self.assertEqual([10.0, 20.0], read_columnar(self.path)[0].reference_trees.stems_per_ha.tolist())
+        self.assertEqual(0, result[1].reference_trees.size)
+        self.assertEqual(0, result[1].tree_strata.size)
+
+    def test_stand_store(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_columnar(self.path, stands)
+        store = ColumnarStandStore(self.path)
+        self.assertEqual(len(stands), len(store))
+        self.assertIsNone(store._columns)
+        self.assertEqual(stands[-1].identifier, store[-1].identifier)
+        self.assert_same_vectors(stands[1].reference_trees, store[1].reference_trees)
+        self.assertIsNot(store[1], store[1])
+        self.assertRaises(IndexError, store.__getitem__, len(stands))
+
+        part = store[1:]
+        self.assertIsInstance(part, ColumnarStandStore)
+        self.assertEqual([stand.identifier for stand in stands[1:]], [stand.identifier for stand in part])
+        self.assertEqual(stands[2].identifier, part[1].identifier)
+
+    def test_stand_store_nbytes(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_columnar(self.path, stands)
+        store = ColumnarStandStore(self.path)
+        self.assertEqual(sum(stand.nbytes for stand in stands), store.nbytes)
+        self.assertEqual(sum(stand.nbytes for stand in stands[1:3]), store[1:3].nbytes)
+        self.assertEqual(stands[1].nbytes, store.excluding({stands[0].identifier, stands[2].identifier})[:1].nbytes)
+        self.assertEqual(0, store[:0].nbytes)
+
+    def test_stand_store_excluding(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_columnar(self.path, stands)
+        store = ColumnarStandStore(self.path)
+        self.assertEqual([stand.identifier for stand in stands], store.identifiers)
+        excluded = {stands[0].identifier, stands[2].identifier}
+        remaining = store.excluding(excluded)
+        self.assertIsInstance(remaining, ColumnarStandStore)
+        expected = [stand.identifier for stand in stands if stand.identifier not in excluded]
+        self.assertEqual(expected, remaining.identifiers)
+        self.assertEqual(expected, [stand.identifier for stand in pickle.loads(pickle.dumps(remaining))])
+        self.assertEqual(expected[1:], [stand.identifier for stand in remaining[1:]])
+
+    def test_stand_store_pickle(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_columnar(self.path, stands)
+        part = ColumnarStandStore(self.path)[2:]
+        pickled = pickle.dumps(part)
+        self.assertLess(len(pickled), 200)
+        unpickled = pickle.loads(pickled)
+        self.assertEqual(len(part), len(unpickled))
+        for expected, actual in zip(stands[2:], unpickled):
+            self.assertEqual(expected.identifier, actual.identifier)
+            self.assert_same_vectors(expected.tree_strata, actual.tree_strata)
+
+    def test_empty(self):
+        write_columnar(self.path, [])
+        self.assertEqual([], read_columnar(self.path))
+
+    def test_not_a_container(self):
+        self.path.write_bytes(b"stand;1\n")
+        self.assertRaises(MetsiException, read_columnar, self.path)
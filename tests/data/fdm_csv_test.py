@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from lukefi.metsi.app.app_types import ExportableContainer
+from lukefi.metsi.app.file_io import csv_writer, fdm_reader
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.fdm_csv import read_csv_columnar
+from lukefi.metsi.data.model import stand_as_internal_row
+from lukefi.metsi.data.vectorize import vectorize
+from tests.data.test_util import ForestBuilderTestBench
+
+
+class FdmCsvTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name, "stands.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_same_stands(self, path):
+        expected_stands = vectorize(fdm_reader("csv")(path))
+        stands = read_csv_columnar(path)
+        self.assertEqual(len(expected_stands), len(stands))
+        for expected, actual in zip(expected_stands, stands):
+            self.assertEqual(expected.identifier, actual.identifier)
+            self.assertEqual(stand_as_internal_row(expected), stand_as_internal_row(actual))
+            self.assertFalse(hasattr(actual, "reference_trees_pre_vec"))
+            for target in ("reference_trees", "tree_strata"):
+                expected_container = getattr(expected, target)
+                container = getattr(actual, target)
+                self.assertEqual(expected_container.size, container.size)
+                for name in expected_container.dtypes:
+                    expected_column = getattr(expected_container, name)
+                    column = getattr(container, name)
+                    self.assertEqual(expected_column.shape, column.shape, name)
+                    self.assertEqual(expected_column.dtype.kind, column.dtype.kind, name)
+                    if expected_column.dtype.kind == "f":
+                        np.testing.assert_array_equal(expected_column, column, err_msg=name)
+                    else:
+                        self.assertEqual(expected_column.tolist(), column.tolist(), name)
+
+    def test_vmi13(self):
+        csv_writer(self.path, ExportableContainer(vectorize(ForestBuilderTestBench.vmi13_built()), None))
+        self.assert_same_stands(self.path)
+
+    def test_vmi12(self):
+        csv_writer(self.path, ExportableContainer(vectorize(ForestBuilderTestBench.vmi12_built()), None))
+        self.assert_same_stands(self.path)
+
+    def test_forest_centre(self):
+        self.assert_same_stands(Path("tests", "resources", "file_io_test", "forest_centre.csv"))
+
+    def test_orphan_rows(self):
+        csv_writer(self.path, ExportableContainer(vectorize(ForestBuilderTestBench.vmi13_built()), None))
+        lines = self.path.read_text(encoding="utf-8").splitlines(keepends=True)
+        first_tree = next(i for i, line in enumerate(lines) if line.startswith("tree"))
+        self.path.write_text(lines[first_tree], encoding="utf-8")
+        self.assertRaises(MetsiException, read_csv_columnar, self.path)
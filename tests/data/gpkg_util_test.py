@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from geopandas import GeoDataFrame
 from shapely import Polygon
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.data.formats import gpkg_util
 from tests.data import test_util
 
@@ -81,4 +82,21 @@ class TestGeoPackageConversion(test_util.ConverterTestSuite):
         result = gpkg_util._attach_location(df, gdf)
         self.assertEqual(type(result), pd.DataFrame)
         self.assertEqual(result.iloc[0].centroid.get('centroid'), (1.67, 20.0))
-        self.assertEqual(result.iloc[0].centroid.get('crs'), 'EPSG:3067')
\ No newline at end of file
+        self.assertEqual(result.iloc[0].centroid.get('crs'), 'EPSG:3067')
+    def test_read_stand_centroids(self):
+        conn = sqlite3.connect(self.GPKG_DB_PATH)
+        centroids = gpkg_util._read_stand_centroids(conn)
+        conn.close()
+        gdf = gpkg_util._read_stand_geometry(self.GPKG_DB_PATH)
+        self.assertEqual(len(gdf), len(centroids))
+        for sid in gdf['standid']:
+            expected = gpkg_util._extract_centroid(gdf[gdf['standid'] == sid]['geometry'])
+            self.assertEqual(expected, centroids[sid])
+
+    def test_attach_location_from_centroids(self):
+        p = Polygon([(1,10), (3, 30), (1, 20)])
+        centroids = gpkg_util._stand_centroids([123, 456], [p, p], 'epsg:3067')
+        df = gpkg_util._attach_location(pd.DataFrame(dict(standid=[456, 123, 456])), centroids)
+        self.assertEqual(3, len(df))
+        self.assertEqual({'centroid': (1.67, 20.0), 'crs': 'EPSG:3067'}, df.centroid[0])
+        self.assertRaises(MetsiException, gpkg_util._attach_location, pd.DataFrame(dict(standid=[789])), centroids)
@@ -8,7 +8,7 @@ from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata
 from lukefi.metsi.data.vectorize import vectorize
 from tests.data.test_util import ConverterTestSuite, ForestBuilderTestBench
 from lukefi.metsi.data.formats.io_utils import c_var_rst_row
-from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.data.model import ForestStand, stand_as_internal_csv_row
 
 vmi13_builder = ForestBuilderTestBench.vmi13_builder()
 
@@ -74,6 +74,30 @@ class IoUtilsTest(ConverterTestSuite):
         self.assertTrue(all(length == tree_row_lengths[0] for length in tree_row_lengths))
         self.assertTrue(all(length == stratum_rows_lengths[0] for length in stratum_rows_lengths))
 
+    def test_columnwise_rows_match_row_formatting(self):
+        vmi13_stands = vmi13_builder.build()
+        vectorize(vmi13_stands)
+        container = ExportableContainer(vmi13_stands, additional_vars=["site_type_category"])
+        csv_expected = []
+        rst_expected = []
+        for stand in vmi13_stands:
+            csv_expected.append(";".join(map(csv_value, stand_as_internal_csv_row(stand, container.additional_vars))))
+            csv_expected.extend(";".join(map(csv_value, stand.reference_trees.as_internal_csv_row(i)))
+                                for i in range(stand.reference_trees.size))
+            csv_expected.extend(";".join(map(csv_value, stand.tree_strata.as_internal_csv_row(i)))
+                                for i in range(stand.tree_strata.size))
+            rst_expected.extend(rst_stand_rows(stand, container.additional_vars))
+            rst_expected.extend(" ".join(map(rst_float, stand.reference_trees.as_rst_row(i)))
+                                for i in range(stand.reference_trees.size))
+        self.assertEqual(csv_expected, stands_to_csv_content(container, ";"))
+        self.assertEqual(rst_expected, stands_to_rst_content(container))
+
+    def test_csv_cells(self):
+        self.assertEqual(["None", "1", "None"], csv_cells(np.array([-1, 1, -1])).tolist())
+        self.assertEqual(["None", "1.5", "-1.0"], csv_cells(np.array([np.nan, 1.5, -1.0])).tolist())
+        self.assertEqual(["None", "a"], csv_cells(np.array(["", "a"])).tolist())
+        self.assertEqual(["True", "False"], csv_cells(np.array([True, False])).tolist())
+
     def test_csv_to_stands(self):
         """tests that the roundtrip conversion stands-->csv-->stands maintains the stand structure"""
         vmi13_stands = vmi13_builder.build()
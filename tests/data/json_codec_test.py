@@ -0,0 +1,95 @@
+import json
+import tempfile
+import unittest
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import jsonpickle
+import numpy as np
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.enums.internal import OwnerCategory, TreeSpecies
+from lukefi.metsi.data.formats import json_codec
+from lukefi.metsi.data.model import ForestStand, ReferenceTree, stand_as_internal_row
+from lukefi.metsi.data.vectorize import vectorize
+from lukefi.metsi.sim.collected_data import CollectedData
+from tests.data.test_util import ForestBuilderTestBench
+
+
+@dataclass
+class Unknown:
+    value: int
+
+
+class JsonCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name, "stands.ndjson")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_same_stands(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for expected_stand, actual_stand in zip(expected, actual):
+            self.assertEqual(stand_as_internal_row(expected_stand), stand_as_internal_row(actual_stand))
+            for target in ("reference_trees", "tree_strata"):
+                expected_data, actual_data = getattr(expected_stand, target), getattr(actual_stand, target)
+                self.assertEqual(expected_data.size, actual_data.size)
+                for name in expected_data.dtypes:
+                    expected_column, actual_column = getattr(expected_data, name), getattr(actual_data, name)
+                    self.assertEqual(expected_column.dtype, actual_column.dtype, name)
+                    self.assertEqual(expected_column.shape, actual_column.shape, name)
+                    np.testing.assert_array_equal(expected_column, actual_column, err_msg=name)
+
+    def test_stands(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        text = json_codec.dumps(stands)
+        self.assertNotIn("py/object", text)
+        self.assertEqual(1, len(text.splitlines()))
+        result = json_codec.loads(text)
+        self.assert_same_stands(stands, result)
+        self.assertIsInstance(result[1].owner_category, OwnerCategory)
+        self.assertIsInstance(result[1].geo_location, tuple)
+
+    def test_columns_as_arrays(self):
+        stand = vectorize(ForestBuilderTestBench.vmi13_built())[1]
+        encoded = json.loads(json_codec.dumps(stand, indent=2))["data"]
+        self.assertEqual(stand.reference_trees.height.tolist(), encoded["reference_trees"]["columns"]["height"])
+
+    def test_entries_not_vectorized(self):
+        stand = ForestStand(identifier="1", reference_trees_pre_vec=[
+            ReferenceTree(identifier="1-1", species=TreeSpecies.PINE, stems_per_ha=10.0)
+        ])
+        result = json_codec.loads(json_codec.dumps(stand))
+        tree = result.reference_trees_pre_vec[0]
+        self.assertEqual(TreeSpecies.PINE, tree.species)
+        self.assertEqual(10.0, tree.stems_per_ha)
+        self.assertIs(result, tree.stand)
+
+    def test_collected_data(self):
+        collected_data = CollectedData(initial_time_point=2020)
+        collected_data.store("volume", {"pine": 1.5})
+        collected_data.store("values", np.arange(3.0))
+        collected_data.extend_list_result("events", [(2020, "thinning"), np.int64(1)])
+        collected_data.store("unknown", Unknown(5))
+        result = json_codec.loads(json_codec.dumps(collected_data))
+        self.assertEqual(2020, result.initial_time_point)
+        self.assertIsInstance(result.operation_results["volume"], OrderedDict)
+        self.assertEqual({"pine": 1.5}, result.prev("volume"))
+        np.testing.assert_array_equal(np.arange(3.0), result.prev("values"))
+        self.assertEqual([(2020, "thinning"), 1], result.operation_results["events"])
+        self.assertEqual(Unknown(5), result.prev("unknown"))
+
+    def test_jsonpickle_document(self):
+        self.assertEqual([Unknown(1)], json_codec.loads(jsonpickle.encode([Unknown(1)])))
+
+    def test_ndjson(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        json_codec.write_ndjson(self.path, stands)
+        self.assertEqual(len(stands) + 1, len(self.path.read_text(encoding="utf-8").splitlines()))
+        self.assert_same_stands(stands, json_codec.read_ndjson(self.path))
+
+    def test_not_ndjson(self):
+        self.path.write_text("[]\n", encoding="utf-8")
+        self.assertRaises(MetsiException, json_codec.read_ndjson, self.path)
@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.mapped_pickle import ALIGNMENT, read_mapped_pickle, write_mapped_pickle
+from lukefi.metsi.data.model import stand_as_internal_row
+from lukefi.metsi.data.vectorize import vectorize
+from tests.data.test_util import ForestBuilderTestBench
+
+
+class MappedPickleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name, "stands.mapped_pickle")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_mapped_pickle(self.path, stands)
+        result = read_mapped_pickle(self.path)
+        self.assertEqual(len(stands), len(result))
+        for expected, actual in zip(stands, result):
+            self.assertEqual(stand_as_internal_row(expected), stand_as_internal_row(actual))
+            for target in ("reference_trees", "tree_strata"):
+                expected_data, actual_data = getattr(expected, target), getattr(actual, target)
+                self.assertEqual(expected_data.size, actual_data.size)
+                for name in expected_data.dtypes:
+                    np.testing.assert_array_equal(getattr(expected_data, name), getattr(actual_data, name), name)
+
+    def test_memory_mapped(self):
+        stands = vectorize(ForestBuilderTestBench.vmi13_built())
+        write_mapped_pickle(self.path, stands)
+        trees = read_mapped_pickle(self.path)[1].reference_trees
+        self.assertFalse(trees.height.flags.owndata)
+        self.assertFalse(trees.height.flags.writeable)
+        self.assertEqual(0, trees.height.__array_interface__["data"][0] % ALIGNMENT)
+
+        trees.update({"height": 1.0}, 0)
+        self.assertEqual(1.0, trees.height[0])
+
+    def test_plain_objects(self):
+        data = {"values": np.arange(10.0), "name": "test", "nested": [np.zeros((2, 2), np.int32)]}
+        write_mapped_pickle(self.path, data)
+        result = read_mapped_pickle(self.path)
+        self.assertEqual("test", result["name"])
+        np.testing.assert_array_equal(data["values"], result["values"])
+        np.testing.assert_array_equal(data["nested"][0], result["nested"][0])
+
+    def test_not_a_container(self):
+        self.path.write_bytes(b"not a container")
+        self.assertRaises(MetsiException, read_mapped_pickle, self.path)
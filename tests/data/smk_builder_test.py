@@ -4,6 +4,7 @@ from functools import reduce
 from lukefi.metsi.data.formats.forest_builder import XMLBuilder, GeoPackageBuilder
 from lukefi.metsi.data.enums.internal import *
 from lukefi.metsi.app.metsi_enum import StrataOrigin
+from lukefi.metsi.app.utils import MetsiException
 
 builder_flags = {
     'strata_origin': StrataOrigin.INVENTORY
@@ -173,6 +174,29 @@ class TestXMLBuilder(unittest.TestCase):
         self.assertEqual(Storey.REMOTE, self.smk_stands[0].tree_strata_pre_vec[0].storey)
         self.assertEqual(Storey.REMOTE, self.smk_stands[0].tree_strata_pre_vec[1].storey)
 
+    def test_smk_builder_stream(self):
+        builder = XMLBuilder(builder_flags, declared_conversions)
+        stands = builder.stream(self.absolute_resource_path)
+        first = next(stands)
+        self.assertEqual('10', first.identifier)
+        streamed = [first, *stands]
+        self.assertEqual([s.identifier for s in self.smk_stands], [s.identifier for s in streamed])
+        for expected, actual in zip(self.smk_stands, streamed):
+            self.assertEqual(expected.geo_location, actual.geo_location)
+            self.assertEqual(expected.basal_area, actual.basal_area)
+            self.assertEqual(expected.cutting_year, actual.cutting_year)
+            self.assertEqual([t.identifier for t in expected.tree_strata_pre_vec],
+                             [t.identifier for t in actual.tree_strata_pre_vec])
+            self.assertEqual([t.mean_height for t in expected.tree_strata_pre_vec],
+                             [t.mean_height for t in actual.tree_strata_pre_vec])
+
+    def test_smk_builder_stream_file_object(self):
+        with open(self.absolute_resource_path, 'rb') as source:
+            events = iter(XMLBuilder(builder_flags, declared_conversions).stream(source))
+            next(events)
+            self.assertEqual(1, len(list(events)))
+        self.assertRaises(MetsiException, XMLBuilder(builder_flags, declared_conversions).build)
+
 class TestGeoPackageBuilder(unittest.TestCase):
     
     gpkg_data = 'SMK_source.gpkg'
@@ -22,7 +22,12 @@ class ForestBuilderTestBench(unittest.TestCase):
 
     @classmethod
     def vmi12_builder(cls, vmi_builder_flags: dict = default_builder_flags) -> VMI12Builder:
-        vmi12_data = [
+        vmi12_builder: VMIBuilder = VMI12Builder(vmi_builder_flags, {}, cls.vmi12_data())
+        return vmi12_builder
+
+    @classmethod
+    def vmi12_data(cls) -> list[str]:
+        return [
             'K0999999 99 11    66521333246174    1010   0041721         000059500417      1   0         40020618 B0          0   0 0   0              0  0                   6652133.85 C 102600.11 66521333246174                                                                                          0      0',
             'K0999999 98 11    66521333246174    1010   1141721         140259100417404   6  99  1241271S1280818 101 1 30    0   0 0   0   00  0 10   0  0   111 011004322   6652133.94 J 118950.77 66521333246174 S1 5 1         09K10E10L09M09M19           24189 04506      1298460   0 0   0 0   00 222 1      1',
             'K0999999 98 12 01  1 11             24 190  04606N17 1  84A1 0',
@@ -32,16 +37,16 @@ class ForestBuilderTestBench(unittest.TestCase):
             'K0999999 96 21    66521333246174    0100   1041721         000059100417      4  55         S0280818 101 3 4     0   0 0   0    132       0  0        1          6652133.05 T 117155.45 66521333246174    5 1                                                          0A                              3  19 21'
         ]
 
-        vmi12_builder: VMIBuilder = VMI12Builder(vmi_builder_flags, {}, vmi12_data)
-        return vmi12_builder
-
     @classmethod
     def vmi13_builder(cls, vmi_builder_flags: dict = default_builder_flags) -> VMI13Builder:
-        vmi13_file_path = Path('tests', 'data', 'resources', 'VMI13_source_mini.dat')
-        vmi13_data = file_io.vmi_file_reader(vmi13_file_path)
-        vmi13_builder: VMIBuilder = VMI13Builder(vmi_builder_flags, {}, vmi13_data)
+        vmi13_builder: VMIBuilder = VMI13Builder(vmi_builder_flags, {}, cls.vmi13_data())
         return vmi13_builder
 
+    @classmethod
+    def vmi13_data(cls) -> list[str]:
+        vmi13_file_path = Path('tests', 'data', 'resources', 'VMI13_source_mini.dat')
+        return file_io.vmi_file_reader(vmi13_file_path)
+
     @classmethod
     def vmi12_built(cls, vmi_builder_flags: dict =default_builder_flags):
         return cls.vmi12_builder(vmi_builder_flags).build()
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 import numpy as np
@@ -282,3 +283,42 @@ class VectorModelTest(unittest.TestCase):
         self.assertTrue(np.array_equal(vector_data.z, np.asarray([[11.0, 12.0, 13.0],
                                                                   [5.0, 6.0, 7.0],
                                                                   [17.0, 18.0, 19.0]], dtype=np.float64)))
+
+    def test_assign(self):
+        vector_data = DummyVectors(MULTIDIMENSIONAL_DUMMY_DTYPES)
+        vector_data.assign({
+            "y": np.array([[1, 2], [3, 4]], dtype=np.int32),
+            "z": np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        })
+
+        self.assertEqual(len(vector_data), 2)
+        self.assertTrue(np.array_equal(vector_data.x, np.asarray([-1, -1], dtype=np.int32)))
+        self.assertEqual(vector_data.y.dtype, np.int64)
+        self.assertEqual(vector_data.y.shape, (2, 2))
+        self.assertEqual(vector_data.z.shape, (2, 3))
+        self.assertTrue(vector_data.is_contiguous("z"))
+
+    def test_pickle_out_of_band(self):
+        vector_data = DummyVectors(MULTIDIMENSIONAL_DUMMY_DTYPES).assign({
+            "x": np.array([1, 2], dtype=np.int32),
+            "y": np.array([[1, 2], [3, 4]]),
+            "z": np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        })
+        buffers: list[pickle.PickleBuffer] = []
+        stream = pickle.dumps(vector_data, protocol=5, buffer_callback=buffers.append)
+        self.assertEqual(3, len(buffers))
+
+        result = pickle.loads(stream, buffers=buffers)
+        self.assertIsInstance(result, DummyVectors)
+        self.assertEqual(2, result.size)
+        self.assertEqual(MULTIDIMENSIONAL_DUMMY_DTYPES, result.dtypes)
+        self.assertTrue(np.shares_memory(vector_data.z, result.z))
+        self.assertEqual((2, 3), result.z.shape)
+        self.assertEqual([[1, 2], [3, 4]], result.y.tolist())
+
+        in_band = pickle.loads(pickle.dumps(vector_data, protocol=5))
+        self.assertFalse(np.shares_memory(vector_data.z, in_band.z))
+        self.assertTrue(in_band.z.flags.writeable)
+        self.assertEqual(vector_data.z.tolist(), in_band.z.tolist())
+        in_band.update({"x": 5}, 0)
+        self.assertEqual([5, 2], in_band.x.tolist())
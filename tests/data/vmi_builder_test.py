@@ -1,8 +1,11 @@
+import tempfile
 import unittest
 from copy import deepcopy
+from pathlib import Path
 from lukefi.metsi.data.formats import vmi_const
 from lukefi.metsi.data.formats.forest_builder import *
 from lukefi.metsi.data.enums.internal import *
+from lukefi.metsi.app.utils import MetsiException
 from tests.data.test_util import ForestBuilderTestBench
 
 class TestForestBuilder(unittest.TestCase):
@@ -424,3 +427,74 @@ class TestForestBuilder(unittest.TestCase):
         self.vmi13_builder().remove_strata(stands)
         self.assertEqual(0, len(stands[1].tree_strata_pre_vec))
 
+    def assert_same_stands(self, expected: list, actual: list):
+        self.assertEqual([s.identifier for s in expected], [s.identifier for s in actual])
+        self.assertEqual([s.stand_id for s in expected], [s.stand_id for s in actual])
+        self.assertEqual([s.area for s in expected], [s.area for s in actual])
+        self.assertEqual([[t.identifier for t in s.reference_trees_pre_vec] for s in expected],
+                         [[t.identifier for t in s.reference_trees_pre_vec] for s in actual])
+        self.assertEqual([[t.identifier for t in s.tree_strata_pre_vec] for s in expected],
+                         [[t.identifier for t in s.tree_strata_pre_vec] for s in actual])
+
+    def test_vmi12_stream(self):
+        rows = ForestBuilderTestBench.vmi12_data()
+        builder = VMI12Builder(ForestBuilderTestBench.default_builder_flags, {})
+        self.assert_same_stands(self.vmi12_stands, list(builder.stream(iter(rows))))
+
+    def test_vmi13_stream(self):
+        rows = ForestBuilderTestBench.vmi13_data()
+        builder = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {})
+        self.assert_same_stands(self.vmi13_stands, list(builder.stream(iter(rows))))
+        builder = VMI13Builder({'measured_trees': False, 'strata': True}, {})
+        self.assert_same_stands(self.vmi13_stands_ref_trees_false, list(builder.stream(iter(rows))))
+
+    def test_stream_ungrouped(self):
+        rows = ForestBuilderTestBench.vmi13_data()
+        shuffled = rows[1:2] + rows[:1] + rows[2:]
+        builder = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {})
+        self.assertRaises(MetsiException, lambda: list(builder.stream(shuffled)))
+
+    def test_stream_spilled(self):
+        rows = ForestBuilderTestBench.vmi13_data()
+        shuffled = rows[::-1]
+        expected = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {}, shuffled).build()
+        builder = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {})
+        for buckets in (1, 3):
+            stands = sorted(builder.stream_spilled(shuffled, buckets), key=lambda s: s.stand_id)
+            self.assert_same_stands(expected, stands)
+
+    def test_stream_spilled_grouped(self):
+        rows = ForestBuilderTestBench.vmi13_data()
+        builder = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {})
+        for buckets in (1, 3):
+            # stands of grouped rows are yielded in source order
+            self.assert_same_stands(self.vmi13_stands, list(builder.stream_spilled(iter(rows), buckets)))
+
+    def test_chunk_ranges(self):
+        path = Path('tests', 'data', 'resources', 'VMI13_source_mini.dat')
+        ranges = vmi_chunk_ranges(path, 8)
+        self.assertEqual(0, ranges[0][0])
+        self.assertEqual(path.stat().st_size, ranges[-1][1])
+        self.assertEqual([end for _, end in ranges[:-1]], [start for start, _ in ranges[1:]])
+        rows = [row for start, end in ranges for row in vmi_chunk_rows(path, start, end)]
+        self.assertEqual(ForestBuilderTestBench.vmi13_data(), rows)
+
+    def test_vmi13_parallel(self):
+        path = Path('tests', 'data', 'resources', 'VMI13_source_mini.dat')
+        self.assertGreater(len(vmi_chunk_ranges(path, 8)), 2)
+        builder = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {})
+        for workers in (1, 2):
+            self.assert_same_stands(self.vmi13_stands, builder.build_parallel(path, workers))
+
+    def test_vmi12_parallel_split_stands(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'vmi12.dat')
+            rows = [row + '\n' for row in ForestBuilderTestBench.vmi12_data()]
+            # strata and trees of a stand in chunks before and after the one with its stand row
+            rows = rows[2:4] + rows[:2] + rows[4:]
+            path.write_text(''.join(rows), encoding='utf-8')
+            expected = VMI12Builder(ForestBuilderTestBench.default_builder_flags, {}, rows)
+            builder = VMI12Builder(ForestBuilderTestBench.default_builder_flags, {})
+            self.assert_same_stands(expected.build(), builder.build_parallel(path, 2))
+            path.write_text(rows[0], encoding='utf-8')
+            self.assertRaises(MetsiException, builder.build_parallel, path, 2)
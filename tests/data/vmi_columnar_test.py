@@ -0,0 +1,98 @@
+import unittest
+from pathlib import Path
+import numpy as np
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.declarative_conversion import Conversion
+from lukefi.metsi.data.formats.forest_builder import VMI12Builder, VMI13Builder
+from lukefi.metsi.data.formats.vmi_columnar import source_columns
+from lukefi.metsi.data.model import ReferenceTree, TreeStratum
+from lukefi.metsi.data.vector_model import ReferenceTrees, TreeStrata
+from lukefi.metsi.data.vectorize import vectorize
+from tests.data.test_util import ForestBuilderTestBench
+
+
+class VMIColumnarTest(unittest.TestCase):
+    flags = {'measured_trees': True, 'strata': True}
+    vectorized_flags = {'measured_trees': True, 'strata': True, 'vectorized': True}
+
+    def assert_same_vectors(self, expected, actual):
+        self.assertEqual(type(expected), type(actual))
+        self.assertEqual(expected.size, actual.size)
+        for name in expected.dtypes:
+            expected_column = getattr(expected, name)
+            actual_column = getattr(actual, name)
+            self.assertEqual(expected_column.dtype, actual_column.dtype, name)
+            self.assertEqual(expected_column.shape, actual_column.shape, name)
+            if np.issubdtype(expected_column.dtype, np.floating):
+                np.testing.assert_array_equal(expected_column, actual_column, err_msg=name)
+            else:
+                self.assertEqual(expected_column.tolist(), actual_column.tolist(), name)
+
+    def assert_same_stands(self, expected, actual):
+        self.assertEqual([s.identifier for s in expected], [s.identifier for s in actual])
+        for expected_stand, actual_stand in zip(expected, actual):
+            self.assertEqual(expected_stand.stand_id, actual_stand.stand_id)
+            self.assertFalse(hasattr(actual_stand, "reference_trees_pre_vec"))
+            self.assertFalse(hasattr(actual_stand, "tree_strata_pre_vec"))
+            self.assert_same_vectors(expected_stand.reference_trees, actual_stand.reference_trees)
+            self.assert_same_vectors(expected_stand.tree_strata, actual_stand.tree_strata)
+
+    def test_source_columns(self):
+        rows = ["abcdef", "ghi"]
+        columns = source_columns(rows, {"first": slice(0, 2), "second": slice(2, 5)})
+        self.assertEqual(["ab", "gh"], columns["first"].tolist())
+        self.assertEqual(["cde", "i"], columns["second"].tolist())
+        columns = source_columns([["1", "2"], ["3", "4"]], {"first": 0, "second": 1})
+        self.assertEqual(["2", "4"], columns["second"].tolist())
+
+    def test_vmi12(self):
+        data = ForestBuilderTestBench.vmi12_data()
+        expected = vectorize(VMI12Builder(self.flags, {}, data).build())
+        actual = VMI12Builder(self.vectorized_flags, {}, data).build()
+        self.assert_same_stands(expected, actual)
+        self.assertEqual(1, sum(stand.reference_trees.size for stand in actual))
+
+    def test_vmi13(self):
+        data = ForestBuilderTestBench.vmi13_data()
+        expected = vectorize(VMI13Builder(self.flags, {}, data).build())
+        actual = VMI13Builder(self.vectorized_flags, {}, data).build()
+        self.assert_same_stands(expected, actual)
+        self.assertGreater(sum(stand.reference_trees.size for stand in actual), 1)
+        self.assertGreater(sum(stand.tree_strata.size for stand in actual), 1)
+        self.assert_same_stands(expected, vectorize(actual))
+
+    def test_vmi13_stream(self):
+        data = ForestBuilderTestBench.vmi13_data()
+        expected = vectorize(VMI13Builder(self.flags, {}, data).build())
+        actual = list(VMI13Builder(self.vectorized_flags, {}).stream(data, chunk_rows=3))
+        self.assert_same_stands(expected, actual)
+
+    def test_declared_conversions_fall_back(self):
+        data = ForestBuilderTestBench.vmi13_data()
+        conversions = {'tree_number': Conversion(lambda tree: tree.tree_number * 2, object_type=ReferenceTree)}
+        builder = VMI13Builder(self.vectorized_flags, conversions, data)
+        self.assertFalse(builder.uses_columnar_decoding(ReferenceTree()))
+        self.assertTrue(builder.uses_columnar_decoding(TreeStratum()))
+        expected = vectorize(VMI13Builder(self.flags, conversions, data).build())
+        actual = builder.build()
+        self.assertTrue(hasattr(actual[0], "reference_trees_pre_vec"))
+        self.assert_same_stands(expected, vectorize(actual))
+
+    def test_missing_stand(self):
+        data = ForestBuilderTestBench.vmi12_data()
+        rows = [row for row in data if not row.startswith('K0999999 98 11')]
+        for flags in (self.flags, self.vectorized_flags):
+            self.assertRaises(MetsiException, VMI12Builder(flags, {}, rows).build)
+
+    def test_empty_containers(self):
+        stands = VMI12Builder(self.vectorized_flags, {}, ForestBuilderTestBench.vmi12_data()).build()
+        self.assertIsInstance(stands[0].reference_trees, ReferenceTrees)
+        self.assertIsInstance(stands[0].tree_strata, TreeStrata)
+        self.assertEqual(0, stands[0].tree_strata.size)
+
+    def test_vmi13_parallel(self):
+        data = ForestBuilderTestBench.vmi13_data()
+        expected = vectorize(VMI13Builder(self.flags, {}, data).build())
+        path = Path('tests', 'data', 'resources', 'VMI13_source_mini.dat')
+        actual = VMI13Builder(self.vectorized_flags, {}).build_parallel(path, 2)
+        self.assert_same_stands(expected, actual)
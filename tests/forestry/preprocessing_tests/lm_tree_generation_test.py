@@ -4,8 +4,14 @@ from statistics import mean
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import TreeStratum, ReferenceTree
 from lukefi.metsi.forestry.preprocessing.tree_generation_lm import tree_generation_lm
+try:
+    unrunnable = False
+    import rpy2
+except ImportError:
+    unrunnable = True
 
 
+@unittest.skipIf(unrunnable, "rpy2 not installed")
 class TestLmTreeGeneration(unittest.TestCase):
     def test_lm_tree_generation(self):
         G = 17.0
@@ -2,9 +2,10 @@ import unittest
 
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import ForestStand, ReferenceTree
+import lukefi.metsi.forestry.r_utils as r_utils
 try:
     unrunnable = False
-    import lukefi.metsi.forestry.r_utils as r_utils
+    import rpy2
 except ImportError:
     unrunnable = True
 
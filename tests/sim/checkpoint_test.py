@@ -0,0 +1,123 @@
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from lukefi.metsi.sim.checkpoint import CHECKPOINT_SUFFIX, Checkpointing, configuration_references
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.deduplication import Deduplication
+from lukefi.metsi.sim.generators import Alternatives, Event, Sequence
+from lukefi.metsi.sim.operations import do_nothing
+from lukefi.metsi.sim.runners import run_partial_tree_strategy
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
+from lukefi.metsi.sim.simulation_instruction import SimulationInstruction
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+from tests.test_utils import collect_results
+
+
+class Interrupted(Exception):
+    pass
+
+
+def create_config(checkpointing=None, time_points=None, interrupt_at=None, evaluated=None) -> SimConfiguration:
+    # treatments local to a function can not be pickled by name, as functions declared in a control file
+    def increment(input_, **operation_params):
+        _ = operation_params
+        state, collected_data = input_
+        if collected_data.current_time_point == interrupt_at:
+            raise Interrupted()
+        if evaluated is not None:
+            evaluated.append(collected_data.current_time_point)
+        collected_data.store('increment', state + 1)
+        return state + 1, collected_data
+
+    return SimConfiguration(
+        checkpointing=checkpointing,
+        deduplication=Deduplication(),
+        simulation_instructions=[
+            SimulationInstruction(
+                time_points=time_points or [1, 2, 3, 4],
+                events=Sequence([
+                    Alternatives([
+                        Event(do_nothing),
+                        Event(increment),
+                        Event(increment, parameters={"amount": 2})
+                    ])
+                ])
+            )
+        ])
+
+
+def initial_payload() -> SimulationPayload:
+    return SimulationPayload(computational_unit=1, collected_data=CollectedData(), operation_history=[])
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name, "checkpoints")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def checkpoints(self) -> list[Path]:
+        return sorted(self.directory.glob(f"*{CHECKPOINT_SUFFIX}"))
+
+    def test_configuration_references(self):
+        first, second = create_config(), create_config()
+        self.assertEqual([reference.__qualname__ for reference in configuration_references(first)],
+                         [reference.__qualname__ for reference in configuration_references(second)])
+        self.assertIn(do_nothing, configuration_references(first))
+
+    def test_resume_after_interruption(self):
+        expected = run_partial_tree_strategy(initial_payload(), create_config())
+
+        with self.assertRaises(Interrupted):
+            run_partial_tree_strategy(initial_payload(), create_config(Checkpointing(self.directory), interrupt_at=3))
+        self.assertEqual(1, len(self.checkpoints()))
+
+        evaluated: list[int] = []
+        config = create_config(Checkpointing(self.directory), evaluated=evaluated)
+        resumed = run_partial_tree_strategy(initial_payload(), config)
+        # time points completed before the interruption are not evaluated again
+        self.assertEqual({3, 4}, set(evaluated))
+        self.assertEqual(collect_results(expected), collect_results(resumed))
+        self.assertEqual([payload.collected_data.operation_results for payload in expected],
+                         [payload.collected_data.operation_results for payload in resumed])
+        # treatments of the restored operation history are those of the configuration
+        references = configuration_references(config)
+        for payload in resumed:
+            self.assertEqual(4, len(payload.operation_history))
+            for _, treatment, _ in payload.operation_history:
+                self.assertTrue(any(treatment is reference for reference in references))
+        self.assertEqual([], self.checkpoints())
+
+    def test_checkpoint_of_other_configuration_ignored(self):
+        with self.assertRaises(Interrupted):
+            run_partial_tree_strategy(initial_payload(), create_config(Checkpointing(self.directory), interrupt_at=3))
+        evaluated: list[int] = []
+        config = create_config(Checkpointing(self.directory), time_points=[1, 2, 3, 5], evaluated=evaluated)
+        run_partial_tree_strategy(initial_payload(), config)
+        self.assertIn(1, evaluated)
+
+    def test_unreadable_checkpoint_ignored(self):
+        with self.assertRaises(Interrupted):
+            run_partial_tree_strategy(initial_payload(), create_config(Checkpointing(self.directory), interrupt_at=3))
+        path = self.checkpoints()[0]
+        path.write_bytes(path.read_bytes()[:-10])
+        expected = run_partial_tree_strategy(initial_payload(), create_config())
+        resumed = run_partial_tree_strategy(initial_payload(), create_config(Checkpointing(self.directory)))
+        self.assertEqual(collect_results(expected), collect_results(resumed))
+
+    def test_min_interval(self):
+        with self.assertRaises(Interrupted):
+            run_partial_tree_strategy(initial_payload(),
+                                      create_config(Checkpointing(self.directory, min_interval=3600), interrupt_at=3))
+        self.assertEqual([], self.checkpoints())
+
+    def test_checkpoint_header(self):
+        with self.assertRaises(Interrupted):
+            run_partial_tree_strategy(initial_payload(), create_config(Checkpointing(self.directory), interrupt_at=4))
+        with open(self.checkpoints()[0], "rb") as file:
+            header = pickle.load(file)
+        self.assertEqual(3, header["completed"])
+        self.assertEqual([1, 2, 3, 4], header["time_points"])
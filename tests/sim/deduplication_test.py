@@ -0,0 +1,107 @@
+import unittest
+from copy import deepcopy
+import numpy as np
+from lukefi.metsi.data.vector_model import ReferenceTrees
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.deduplication import Deduplication, expand_duplicates, merge_duplicates
+from lukefi.metsi.sim.generators import Alternatives, Event, Sequence
+from lukefi.metsi.sim.operations import do_nothing
+from lukefi.metsi.sim.runners import run_partial_tree_strategy, chain_evaluator, depth_first_evaluator
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
+from lukefi.metsi.sim.simulation_instruction import SimulationInstruction
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+from tests.test_utils import collect_results, collecting_increment
+
+call_count = 0
+
+
+def counting_nothing(input_, **operation_params):
+    global call_count
+    _ = operation_params
+    call_count += 1
+    return input_
+
+
+def payload_of(value, tag_value=None) -> SimulationPayload:
+    collected_data = CollectedData()
+    if tag_value is not None:
+        collected_data.store('tag', tag_value)
+    return SimulationPayload(computational_unit=value, collected_data=collected_data, operation_history=[])
+
+
+def create_config(deduplication=None) -> SimConfiguration:
+    return SimConfiguration(
+        deduplication=deduplication,
+        simulation_instructions=[
+            SimulationInstruction(
+                time_points=[1, 2, 3],
+                events=Sequence([
+                    Event(counting_nothing),
+                    Alternatives([
+                        Event(do_nothing),
+                        Event(do_nothing),
+                        Event(collecting_increment)
+                    ])
+                ])
+            )
+        ])
+
+
+class DeduplicationTest(unittest.TestCase):
+    def test_digest_of_vector_data(self):
+        a = ReferenceTrees().vectorize({'identifier': ['1', '2'], 'stems_per_ha': [1.0, 2.0]})
+        b = ReferenceTrees().vectorize({'identifier': ['1', '2'], 'stems_per_ha': [1.0, 2.0]})
+        c = ReferenceTrees().vectorize({'identifier': ['1', '2'], 'stems_per_ha': [1.0, 3.0]})
+        dedup = Deduplication()
+        self.assertEqual(dedup.digest(payload_of(a)), dedup.digest(payload_of(b)))
+        self.assertNotEqual(dedup.digest(payload_of(a)), dedup.digest(payload_of(c)))
+
+    def test_digest_of_collected_data(self):
+        dedup = Deduplication(collected_data=['tag'])
+        self.assertEqual(dedup.digest(payload_of(1, {'x': np.array([1])})),
+                         dedup.digest(payload_of(1, {'x': np.array([1])})))
+        self.assertNotEqual(dedup.digest(payload_of(1, 1)), dedup.digest(payload_of(1, 2)))
+        self.assertEqual(Deduplication().digest(payload_of(1, 1)), Deduplication().digest(payload_of(1, 2)))
+
+    def test_merge_and_expand(self):
+        payloads = [payload_of(1), payload_of(2), payload_of(1), payload_of(1)]
+        merged, count = merge_duplicates(payloads, Deduplication(), 0)
+        self.assertEqual([1, 2], collect_results(merged))
+        self.assertEqual(2, count)
+        self.assertEqual([1, 1, 1, 2], collect_results(expand_duplicates(merged)))
+
+    def test_duplicates_shared_by_copies(self):
+        merged, _ = merge_duplicates([payload_of([1]), payload_of([1])], Deduplication(), 0)
+        duplicates = merged[0].duplicates
+        self.assertFalse(hasattr(duplicates[0], 'computational_unit'))
+        self.assertIs(duplicates, deepcopy(merged[0]).duplicates)
+        self.assertEqual([[1], [1]], collect_results(expand_duplicates(merged)))
+
+    def test_no_deduplication(self):
+        payloads = [payload_of(1), payload_of(1)]
+        merged, count = merge_duplicates(payloads, None, 0)
+        self.assertIs(payloads, merged)
+        self.assertEqual(0, count)
+
+    def test_partial_strategy_equivalence(self):
+        global call_count
+        for evaluator in (chain_evaluator, depth_first_evaluator):
+            call_count = 0
+            reference = run_partial_tree_strategy(payload_of(0), create_config(), evaluator)
+            reference_calls = call_count
+
+            call_count = 0
+            deduplicated = run_partial_tree_strategy(
+                payload_of(0), create_config(Deduplication(collected_data=['collecting_increment'])), evaluator)
+
+            self.assertEqual(27, len(reference))
+            self.assertEqual(27, len(deduplicated))
+            self.assertLess(call_count, reference_calls)
+            self.assertEqual(sorted(collect_results(reference)), sorted(collect_results(deduplicated)))
+            self.assertEqual(
+                sorted(len(p.operation_history) for p in reference),
+                sorted(len(p.operation_history) for p in deduplicated))
+            self.assertEqual(
+                sorted(str(dict(p.collected_data.get('collecting_increment'))) for p in reference),
+                sorted(str(dict(p.collected_data.get('collecting_increment'))) for p in deduplicated))
+            self.assertFalse(any(hasattr(p, 'duplicates') for p in deduplicated))
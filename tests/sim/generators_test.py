@@ -333,6 +333,48 @@ class TestGenerators(unittest.TestCase):
                 results[i].append(value)
         self.assertListEqual(results[0], results[1])
 
+    def test_shared_composition(self):
+        declaration = {
+            "simulation_instructions": [
+                SimulationInstruction(
+                    time_points=[0, 1, 2],
+                    events=Sequence([
+                        Event(collecting_increment),
+                        Alternatives([
+                            Event(collecting_increment),
+                            Sequence([Event(collecting_increment), Event(collecting_increment)]),
+                            Event(collecting_increment, parameters={'incrementation': 2})
+                        ])
+                    ])
+                )
+            ]
+        }
+        generator = SimConfiguration(**declaration).full_tree_generators()
+        tree = generator.compose_nested()
+        shared_tree = generator.compose_nested(shared=True)
+
+        def count_nodes(node, seen: set[int]) -> int:
+            for branch in node.branches:
+                if id(branch) not in seen:
+                    seen.add(id(branch))
+                    count_nodes(branch, seen)
+            return len(seen)
+
+        self.assertEqual(5 + 3 * 5 + 9 * 5, count_nodes(tree, set()))
+        self.assertEqual(3 * 5, count_nodes(shared_tree, set()))
+
+        def evaluate_chains(root) -> list:
+            return [
+                evaluate_sequence(
+                    SimulationPayload(computational_unit=0, operation_history=[], collected_data=CollectedData()),
+                    *chain
+                ).computational_unit
+                for chain in root.operation_chains()
+            ]
+
+        self.assertEqual(27, len(shared_tree.operation_chains()))
+        self.assertListEqual(evaluate_chains(tree), evaluate_chains(shared_tree))
+
     def test_simple_processable_chain(self):
         operation_tags: list[Callable] = [inc, inc, inc, parametrized_operation]
         operation_params = {parametrized_operation: [{'amplify': True}]}
@@ -0,0 +1,100 @@
+import unittest
+from lukefi.metsi.app.metsi_enum import EvaluationStrategy, FormationStrategy
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.generators import Alternatives, Event, Sequence
+from lukefi.metsi.sim.operations import do_nothing
+from lukefi.metsi.sim.planner import plan_simulation, plan_report
+from lukefi.metsi.sim.runners import run_full_tree_strategy, run_partial_tree_strategy
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
+from lukefi.metsi.sim.simulation_instruction import SimulationInstruction
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+
+
+def count_nodes(node) -> int:
+    return 1 + sum(count_nodes(branch) for branch in node.branches)
+
+
+def branching_config() -> SimConfiguration:
+    return SimConfiguration(simulation_instructions=[
+        SimulationInstruction(
+            time_points=[0],
+            events=[Event(do_nothing)]
+        ),
+        SimulationInstruction(
+            time_points=[5, 10],
+            events=Sequence([
+                Event(do_nothing),
+                Alternatives([
+                    Event(do_nothing),
+                    Sequence([Event(do_nothing), Event(do_nothing)]),
+                    Event(do_nothing)
+                ])
+            ])
+        )
+    ])
+
+
+class PlannerTest(unittest.TestCase):
+    def test_time_point_shapes(self):
+        plan = plan_simulation(branching_config())
+        self.assertEqual([0, 5, 10], [tp.time_point for tp in plan.time_points])
+        self.assertEqual([1, 5, 5], [tp.nodes for tp in plan.time_points])
+        self.assertEqual([1, 3, 3], [tp.leaves for tp in plan.time_points])
+        self.assertEqual([1, 1, 3], [tp.width_in for tp in plan.time_points])
+        self.assertEqual([1, 3, 9], [tp.width_out for tp in plan.time_points])
+        self.assertEqual(9, plan.leaves)
+
+    def test_plan_matches_full_tree(self):
+        config = branching_config()
+        plan = plan_simulation(config)
+        root = config.full_tree_generators().compose_nested()
+        chains = root.operation_chains()
+        self.assertEqual(count_nodes(root), plan.full_tree_nodes)
+        self.assertEqual(len(chains), plan.leaves)
+        full_chains = next(s for s in plan.strategies if s.formation_strategy == FormationStrategy.FULL
+                           and s.evaluation_strategy == EvaluationStrategy.CHAINS)
+        self.assertEqual(sum(len(chain) - 1 for chain in chains), full_chains.operations)
+
+    def test_plan_matches_shared_tree(self):
+        config = SimConfiguration(shared_event_tree=True, simulation_instructions=branching_config().instructions)
+        plan = plan_simulation(config)
+        root = config.full_tree_generators().compose_nested(shared=True)
+        seen: set[int] = set()
+        pending = [root]
+        while pending:
+            for branch in pending.pop().branches:
+                if id(branch) not in seen:
+                    seen.add(id(branch))
+                    pending.append(branch)
+        self.assertEqual(len(seen) + 1, plan.shared_tree_nodes)
+        self.assertLess(plan.shared_tree_nodes, plan.full_tree_nodes)
+        full_chains = next(s for s in plan.strategies if s.formation_strategy == FormationStrategy.FULL
+                           and s.evaluation_strategy == EvaluationStrategy.CHAINS)
+        self.assertEqual(plan.shared_tree_nodes, full_chains.tree_nodes)
+
+    def test_plan_matches_results(self):
+        config = branching_config()
+        plan = plan_simulation(config)
+        for strategy in (run_full_tree_strategy, run_partial_tree_strategy):
+            payload = SimulationPayload(computational_unit=0, collected_data=CollectedData(), operation_history=[])
+            self.assertEqual(plan.leaves, len(strategy(payload, config)))
+
+    def test_recommendation(self):
+        narrow = SimConfiguration(simulation_instructions=[
+            SimulationInstruction(time_points=list(range(20)), events=[Event(do_nothing)])
+        ])
+        wide = SimConfiguration(simulation_instructions=[
+            SimulationInstruction(time_points=list(range(6)), events=Alternatives([Event(do_nothing)] * 3))
+        ])
+        recommended = plan_simulation(narrow).recommended(10000)
+        self.assertEqual(FormationStrategy.FULL, recommended.formation_strategy)
+        self.assertEqual(EvaluationStrategy.CHAINS, recommended.evaluation_strategy)
+        recommended = plan_simulation(wide).recommended(10000, memory_budget=1)
+        self.assertEqual(min(s.peak_nbytes(10000) for s in plan_simulation(wide).strategies),
+                         recommended.peak_nbytes(10000))
+
+    def test_report(self):
+        lines = plan_report(plan_simulation(branching_config()), [1000, 3000])
+        self.assertEqual(4, len([line for line in lines if line.startswith(("full/", "partial/"))]))
+        self.assertTrue(lines[-1].startswith("Recommended: formation_strategy"))
+        self.assertIn("max 3000", lines[-2])
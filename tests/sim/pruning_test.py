@@ -0,0 +1,55 @@
+import unittest
+from pathlib import Path
+from lukefi.metsi.app.file_io import read_control_module
+from lukefi.metsi.app.utils import ConfigurationException
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.pruning import Dominance, TopK, prune_alternatives
+from lukefi.metsi.sim.runners import run_partial_tree_strategy, depth_first_evaluator, chain_evaluator
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+from tests.test_utils import collect_results
+
+
+def payloads_of(*values) -> list[SimulationPayload]:
+    return [SimulationPayload(computational_unit=v, collected_data=CollectedData(), operation_history=[])
+            for v in values]
+
+
+class PruningTest(unittest.TestCase):
+    def test_top_k_keeps_best_in_original_order(self):
+        payloads = payloads_of(3, 1, 5, 2, 4)
+        kept, pruned = prune_alternatives(payloads, TopK(3, lambda p: p.computational_unit))
+        self.assertEqual([3, 5, 4], collect_results(kept))
+        self.assertEqual(2, pruned)
+
+    def test_top_k_ranks_unscored_last(self):
+        payloads = payloads_of(None, 1, 2)
+        kept, _ = prune_alternatives(payloads, TopK(2, lambda p: p.computational_unit))
+        self.assertEqual([1, 2], collect_results(kept))
+
+    def test_top_k_requires_positive_k(self):
+        self.assertRaises(ConfigurationException, TopK, 0, lambda p: 0)
+
+    def test_dominance(self):
+        payloads = payloads_of((1, 5), (2, 2), (3, 1), (1, 1))
+        rule = Dominance(lambda a, b: a.computational_unit[0] >= b.computational_unit[0]
+                         and a.computational_unit[1] >= b.computational_unit[1]
+                         and a.computational_unit != b.computational_unit)
+        kept, pruned = prune_alternatives(payloads, rule)
+        self.assertEqual([(1, 5), (2, 2), (3, 1)], collect_results(kept))
+        self.assertEqual(1, pruned)
+
+    def test_no_pruning(self):
+        payloads = payloads_of(1, 2)
+        kept, pruned = prune_alternatives(payloads, None)
+        self.assertIs(payloads, kept)
+        self.assertEqual(0, pruned)
+
+    def test_partial_strategy_with_pruning(self):
+        control_path = str(Path("tests", "resources", "runners_test", "branching.py").resolve())
+        declaration = read_control_module(control_path)
+        for evaluator in (chain_evaluator, depth_first_evaluator):
+            config = SimConfiguration(pruning=TopK(2, lambda p: p.computational_unit), **declaration)
+            initial = SimulationPayload(computational_unit=1, collected_data=CollectedData(), operation_history=[])
+            results = collect_results(run_partial_tree_strategy(initial, config, evaluator))
+            self.assertEqual([3, 3], results)
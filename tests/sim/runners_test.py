@@ -73,6 +73,26 @@ class RunnersTest(unittest.TestCase):
         self.assertEqual(8, len(results_depth))
         self.assertEqual(results_chains, results_depth)
 
+    def test_shared_full_tree_by_comparison(self):
+        control_path = str(Path("tests",
+                                "resources",
+                                "runners_test",
+                                "branching.py").resolve())
+        declaration = read_control_module(control_path)
+        config = SimConfiguration(**declaration)
+        shared_config = SimConfiguration(shared_event_tree=True, **declaration)
+        for evaluator in (chain_evaluator, depth_first_evaluator):
+            results = run_full_tree_strategy(
+                SimulationPayload(computational_unit=1, collected_data=CollectedData(), operation_history=[]),
+                config, evaluator)
+            shared_results = run_full_tree_strategy(
+                SimulationPayload(computational_unit=1, collected_data=CollectedData(), operation_history=[]),
+                shared_config, evaluator)
+            self.assertEqual(8, len(shared_results))
+            self.assertEqual(collect_results(results), collect_results(shared_results))
+            self.assertEqual([len(p.operation_history) for p in results],
+                             [len(p.operation_history) for p in shared_results])
+
     def test_partial_formation_evaluation_strategies_by_comparison(self):
         control_path = str(Path("tests",
                                 "resources",
@@ -0,0 +1,92 @@
+import unittest
+from pathlib import Path
+from lukefi.metsi.app.app_io import MetsiConfiguration
+from lukefi.metsi.app.file_io import read_control_module
+from lukefi.metsi.app.metsi_enum import EvaluationStrategy, FormationStrategy
+from lukefi.metsi.app.utils import ConfigurationException
+from lukefi.metsi.sim.checkpoint import Checkpointing
+from lukefi.metsi.sim.collected_data import CollectedData
+from lukefi.metsi.sim.deduplication import Deduplication
+from lukefi.metsi.sim.pruning import TopK
+from lukefi.metsi.sim.runners import run_partial_tree_strategy
+from lukefi.metsi.sim.sim_configuration import SimConfiguration
+from lukefi.metsi.sim.simulation_payload import SimulationPayload
+from lukefi.metsi.sim.simulator import AutoStrategy, simulate_alternatives
+from tests.test_utils import collect_results
+
+
+def branching_declaration() -> dict:
+    control_path = str(Path("tests", "resources", "runners_test", "branching.py").resolve())
+    return read_control_module(control_path)
+
+
+def initial_payload() -> SimulationPayload:
+    return SimulationPayload(computational_unit=1, collected_data=CollectedData(), operation_history=[])
+
+
+class AutoStrategyTest(unittest.TestCase):
+    def test_calibrates_each_candidate(self):
+        config = SimConfiguration(**branching_declaration())
+        auto = AutoStrategy(config, calibration_units=1)
+        reference = collect_results(run_partial_tree_strategy(initial_payload(), config))
+        feasible = [s for s in auto.plan.feasible() if s in auto.candidates]
+        for _ in feasible:
+            self.assertEqual(reference, collect_results(auto(initial_payload(), config)))
+        self.assertEqual({(s.formation_strategy, s.evaluation_strategy) for s in feasible}, set(auto.timings))
+        self.assertEqual(reference, collect_results(auto(initial_payload(), config)))
+
+    def test_selects_fastest_projection(self):
+        config = SimConfiguration(**branching_declaration())
+        auto = AutoStrategy(config, calibration_units=1)
+        for strategy in auto.candidates:
+            slow = strategy.evaluation_strategy == EvaluationStrategy.DEPTH
+            auto.timings[(strategy.formation_strategy, strategy.evaluation_strategy)] = [1.0 if slow else 0.001]
+        selected = auto.select()
+        self.assertEqual(EvaluationStrategy.CHAINS, selected.evaluation_strategy)
+        self.assertEqual(min(s.operations for s in auto.candidates
+                             if s.evaluation_strategy == EvaluationStrategy.CHAINS), selected.operations)
+
+    def test_fixed_strategy_restricts_candidates(self):
+        config = SimConfiguration(**branching_declaration())
+        auto = AutoStrategy(config, FormationStrategy.FULL, EvaluationStrategy.AUTO)
+        self.assertEqual({FormationStrategy.FULL}, {s.formation_strategy for s in auto.candidates})
+        self.assertEqual(2, len(auto.candidates))
+
+    def test_pruning_restricts_to_partial(self):
+        config = SimConfiguration(pruning=TopK(2, lambda p: p.computational_unit), **branching_declaration())
+        auto = AutoStrategy(config)
+        self.assertEqual({FormationStrategy.PARTIAL}, {s.formation_strategy for s in auto.candidates})
+
+    def test_simulate_alternatives(self):
+        config = MetsiConfiguration(formation_strategy='auto', evaluation_strategy='auto')
+        result = simulate_alternatives(config, branching_declaration(), [1, 1, 1])
+        self.assertEqual(3, len(result))
+        self.assertTrue(all(len(payloads) == 8 for payloads in result.values()))
+
+    def test_pruning_rejected_with_full_strategy(self):
+        config = MetsiConfiguration(formation_strategy='full', evaluation_strategy='auto')
+        declaration = {**branching_declaration(), "pruning": TopK(2, lambda p: p.computational_unit)}
+        self.assertRaises(ConfigurationException, simulate_alternatives, config, declaration, [1])
+
+    def test_deduplication_rejected_with_full_strategy(self):
+        config = MetsiConfiguration(formation_strategy='full', evaluation_strategy='auto')
+        declaration = {**branching_declaration(), "deduplication": Deduplication()}
+        self.assertRaises(ConfigurationException, simulate_alternatives, config, declaration, [1])
+
+    def test_checkpointing_rejected_with_full_strategy(self):
+        config = MetsiConfiguration(formation_strategy='full', evaluation_strategy='auto')
+        declaration = {**branching_declaration(), "checkpointing": Checkpointing("checkpoints")}
+        self.assertRaises(ConfigurationException, simulate_alternatives, config, declaration, [1])
+        # the automatic strategy checkpoints with the partial tree strategy only
+        auto = AutoStrategy(SimConfiguration(**declaration))
+        self.assertTrue(all(s.formation_strategy == FormationStrategy.PARTIAL for s in auto.candidates))
+
+    def test_probe_capped_by_planned_operations(self):
+        config = SimConfiguration(**branching_declaration())
+        auto = AutoStrategy(config, probe_ratio=2.0)
+        fewest = min(s.operations for s in auto.plan.strategies)
+        self.assertTrue(all(s.operations <= 2 * fewest for s in auto.candidates))
+        self.assertLess(len(auto.candidates), len(auto.plan.strategies))
+        # a fixed strategy keeps its cheapest combination
+        auto = AutoStrategy(config, FormationStrategy.FULL, EvaluationStrategy.CHAINS, probe_ratio=1.0)
+        self.assertEqual(1, len(auto.candidates))